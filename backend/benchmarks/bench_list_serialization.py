@@ -0,0 +1,104 @@
+"""
+Benchmark: get_inventory response encoding, Pydantic models + response_model vs TrustedSchema + orjson.
+
+Builds synthetic inventory documents as Mongo returns them (native UTC
+datetimes, no _id), runs both response paths the endpoint can take, checks
+the decoded JSON bodies are identical and reports the speedup.
+
+    cd backend && python benchmarks/bench_list_serialization.py --rows 5000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "magnova_benchmark")
+
+from fastapi import Response  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_response_field  # noqa: E402
+
+from server import INVENTORY_SCHEMA, IMEIInventory  # noqa: E402
+
+MODELS = [("Apple", "iPhone 15"), ("Samsung", "Galaxy S24"), ("OnePlus", "OnePlus 12"), ("Xiaomi", "Xiaomi 14")]
+LOCATIONS = ["Mumbai", "Delhi", "Chennai", "Kolkata", "Bengaluru", "Hyderabad"]
+STATUSES = ["Procured", "Inward Nova", "Inward Magnova", "Dispatched", "Reserved", "Sold"]
+
+
+def build_inventory(rows: int, seed: int = 7) -> List[dict]:
+    """Inventory documents at BSON precision (milliseconds), some with optional fields missing"""
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    docs = []
+    for i in range(rows):
+        brand, model = rng.choice(MODELS)
+        created = start + timedelta(milliseconds=rng.randrange(10 ** 10))
+        doc = {
+            "imei": f"35{i:013d}", "procurement_id": f"proc-{i:08d}", "device_model": model,
+            "brand": brand, "model": model, "colour": "Black", "storage": "128GB", "vendor": f"Vendor {i % 40:03d}",
+            "status": rng.choice(STATUSES), "current_location": rng.choice(LOCATIONS), "organization": "Nova",
+            "po_number": f"PO-MAG-{i % 500:05d}", "purchase_price": float(rng.randrange(10000, 90000)),
+            "inward_nova_date": created + timedelta(days=1), "created_at": created, "updated_at": created + timedelta(days=2),
+        }
+        if rng.random() < 0.3:
+            # Older rows predate the catalogue fields
+            for key in ("brand", "model", "colour", "storage", "inward_nova_date"):
+                del doc[key]
+        docs.append(doc)
+    return docs
+
+
+async def validated_body(docs: List[dict]) -> bytes:
+    """What get_inventory does by default: a model per row, then FastAPI's response_model pass"""
+    field = create_response_field(name="Response_get_inventory", type_=List[IMEIInventory])
+    content = await serialize_response(field=field, response_content=[IMEIInventory(**doc) for doc in docs], is_coroutine=True)
+    return JSONResponse(content).body
+
+
+async def trusted_body(docs: List[dict]) -> bytes:
+    """get_inventory?fast=true"""
+    return INVENTORY_SCHEMA.response(docs, Response()).body
+
+
+async def timed(fn, docs, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = await fn(docs)
+        best = min(best, time.perf_counter() - started)
+    return body, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=5000, help="inventory rows per response (default 5000, MAX_PAGE_LIMIT)")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per path, best time reported (default 5)")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    docs = build_inventory(args.rows, args.seed)
+    print(f"Dataset: {len(docs)} inventory rows")
+
+    old, old_seconds = asyncio.run(timed(validated_body, docs, args.repeat))
+    print(f"pydantic + response_model: {old_seconds * 1000:8.1f}ms  {len(old):>9} bytes")
+    new, new_seconds = asyncio.run(timed(trusted_body, docs, args.repeat))
+    print(f"trusted schema + orjson:   {new_seconds * 1000:8.1f}ms  {len(new):>9} bytes")
+
+    old_rows, new_rows = json.loads(old), json.loads(new)
+    if old_rows != new_rows:
+        mismatch = next(i for i, (a, b) in enumerate(zip(old_rows, new_rows)) if a != b)
+        sys.exit(f"Row mismatch at row {mismatch + 1}:\n  validated: {old_rows[mismatch]}\n  trusted:   {new_rows[mismatch]}")
+    print(f"bodies match ({len(new_rows)} rows); speedup {old_seconds / new_seconds:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
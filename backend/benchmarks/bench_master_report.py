@@ -0,0 +1,148 @@
+"""
+Benchmark: master report join, nested linear scans vs MasterReportJoin hash indexes.
+
+Builds a synthetic dataset (default ~50k records across POs, procurement,
+payments, shipments and inventory), checks both joins produce identical rows
+and reports the speedup.
+
+    cd backend && python benchmarks/bench_master_report.py --rows 50000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "magnova_benchmark")
+
+from server import MasterReportJoin, iter_master_report_rows, master_report_row  # noqa: E402
+
+BRANDS = {
+    "Apple": ["iPhone 13", "iPhone 14", "iPhone 15", "iPhone 15 Pro"],
+    "Samsung": ["Galaxy S23", "Galaxy S24", "Galaxy A54"],
+    "OnePlus": ["OnePlus 11", "OnePlus 12"],
+    "Xiaomi": ["Redmi Note 13", "Xiaomi 14"],
+}
+LOCATIONS = ["Mumbai", "Delhi", "Chennai", "Kolkata", "Bengaluru", "Hyderabad"]
+
+
+def build_dataset(rows: int, seed: int = 7):
+    """Split `rows` records roughly 2:40:8:6:40 across POs/procurement/payments/shipments/inventory"""
+    rng = random.Random(seed)
+    unit = rows / 96
+    n_pos = max(1, int(unit * 2))
+    vendors = [f"Vendor {i:03d}" for i in range(max(5, n_pos // 10))]
+
+    pos = []
+    for p in range(n_pos):
+        items = []
+        for sl_no in range(1, rng.randint(3, 7) + 1):
+            brand = rng.choice(list(BRANDS))
+            items.append({
+                "sl_no": sl_no, "vendor": rng.choice(vendors), "location": rng.choice(LOCATIONS),
+                "brand": brand, "model": rng.choice(BRANDS[brand]), "storage": "128GB", "colour": "Black",
+                "imei": None, "qty": 10, "rate": 50000.0, "po_value": 500000.0,
+            })
+        pos.append({"po_number": f"PO-MAG-{p:05d}", "po_date": "2025-02-03T00:00:00+00:00",
+                    "purchase_office": "Magnova Head Office", "items": items})
+
+    def item_of(po):
+        return rng.choice(po["items"])
+
+    procurements, inventory = [], []
+    for i in range(int(unit * 40)):
+        po = rng.choice(pos)
+        item = item_of(po)
+        imei = f"35{i:013d}"
+        procurements.append({
+            "procurement_id": f"proc-{i:08d}", "po_number": po["po_number"],
+            "vendor_name": item["vendor"] if rng.random() < 0.5 else rng.choice(vendors),
+            "device_model": item["model"] if rng.random() < 0.5 else "Unknown", "imei": imei,
+        })
+    for i in range(int(unit * 40)):
+        brand = rng.choice(list(BRANDS))
+        inventory.append({
+            "imei": f"86{i:013d}", "brand": brand if rng.random() < 0.1 else None,
+            "model": rng.choice(BRANDS[brand]) if rng.random() < 0.1 else None,
+            "created_at": "2025-02-04T00:00:00+00:00", "current_location": rng.choice(LOCATIONS), "status": "Procured",
+        })
+    payments = []
+    for i in range(int(unit * 8)):
+        payments.append({
+            "payment_id": f"pay-{i:08d}", "po_number": rng.choice(pos)["po_number"],
+            "payment_type": rng.choice(["internal", "external", None]), "payment_mode": "Bank Transfer",
+            "payment_date": "2025-02-05T00:00:00+00:00", "amount": 1000.0, "payee_name": "Nova",
+        })
+    shipments = []
+    for i in range(int(unit * 6)):
+        po = rng.choice(pos)
+        item = item_of(po)
+        shipments.append({
+            "shipment_id": f"ship-{i:08d}", "po_number": po["po_number"],
+            "vendor": item["vendor"] if rng.random() < 0.3 else None,
+            "from_location": rng.choice(LOCATIONS), "transporter_name": "BlueDart",
+            "pickup_date": "2025-02-06T00:00:00+00:00", "status": "In Transit",
+        })
+    return pos, procurements, payments, shipments, inventory
+
+
+def legacy_rows(pos, procurements, payments, shipments, inventory):
+    """The original export_master_report join: a linear scan per related list per item"""
+    internal_payments = [p for p in payments if p.get("payment_type") == "internal" or not p.get("payment_type")]
+    external_payments = [p for p in payments if p.get("payment_type") == "external"]
+    sl_no = 1
+    for po in pos:
+        for item in po.get("items", [{}]):
+            related_proc = next((p for p in procurements if p.get("po_number") == po.get("po_number") and
+                                 (p.get("vendor_name") == item.get("vendor") or p.get("device_model", "").find(item.get("model", "")) >= 0)), None)
+            related_int_payment = next((p for p in internal_payments if p.get("po_number") == po.get("po_number")), None)
+            related_ext_payment = next((p for p in external_payments if p.get("po_number") == po.get("po_number")), None)
+            related_shipment = next((s for s in shipments if s.get("po_number") == po.get("po_number") and
+                                     (s.get("vendor") == item.get("vendor") or s.get("from_location") == item.get("location"))), None)
+            related_inv = next((i for i in inventory if
+                                (i.get("brand") and item.get("brand") and i.get("brand") == item.get("brand")) or
+                                (i.get("model") and item.get("model") and i.get("model") == item.get("model"))), None)
+            yield master_report_row(sl_no, po, item, (related_proc, related_int_payment, related_ext_payment, related_shipment, related_inv))
+            sl_no += 1
+
+
+def hashed_rows(pos, procurements, payments, shipments, inventory):
+    join = MasterReportJoin.from_records(procurements, payments, shipments, inventory)
+    return iter_master_report_rows(pos, join)
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    rows = list(fn(*args))
+    return rows, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=50000, help="total synthetic records (default 50000)")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    dataset = build_dataset(args.rows, args.seed)
+    pos, procurements, payments, shipments, inventory = dataset
+    items = sum(len(po["items"]) for po in pos)
+    print(f"Dataset: {len(pos)} POs / {items} line items, {len(procurements)} procurement, "
+          f"{len(payments)} payments, {len(shipments)} shipments, {len(inventory)} inventory "
+          f"({len(pos) + len(procurements) + len(payments) + len(shipments) + len(inventory)} records)")
+
+    new, new_seconds = timed(hashed_rows, *dataset)
+    print(f"hash join:   {new_seconds:8.3f}s")
+    old, old_seconds = timed(legacy_rows, *dataset)
+    print(f"linear scan: {old_seconds:8.3f}s")
+
+    if old != new:
+        mismatch = next(i for i, (a, b) in enumerate(zip(old, new)) if a != b)
+        sys.exit(f"Row mismatch at row {mismatch + 1}:\n  legacy: {old[mismatch]}\n  hashed: {new[mismatch]}")
+    print(f"rows match ({len(new)}); speedup {old_seconds / new_seconds:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
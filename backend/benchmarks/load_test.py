@@ -0,0 +1,333 @@
+"""
+Load test: per-endpoint latency and throughput for server:app, run in-process.
+
+Boots the FastAPI app on an httpx ASGI transport (no uvicorn, no network),
+points it at either a local mongod or an in-memory mongomock-motor database,
+seeds a synthetic dataset (POs, procurement + IMEI inventory, payments) and
+drives each endpoint scenario with concurrent requests. Reports p50/p95/p99
+latency and requests per second, writes the results as JSON and, given a
+baseline, fails when an endpoint regressed beyond the tolerance.
+
+The target database is dropped before seeding, so point --db-name at a
+scratch database only. Absolute numbers differ between machines and between
+mongod and the in-memory stand-in, whose pure-Python query engine dominates
+its timings; keep one baseline per setup.
+
+    cd backend && python benchmarks/load_test.py --in-memory
+    cd backend && python benchmarks/load_test.py --mongo-url mongodb://localhost:27017 --pos 2000 --imeis 100000
+    cd backend && python benchmarks/load_test.py --in-memory --baseline benchmarks/baselines/loadtest-inmemory.json
+    cd backend && python benchmarks/load_test.py --in-memory --baseline benchmarks/baselines/loadtest-inmemory.json --save-baseline
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCHMARK_DIR.parent))
+
+VENDORS = [f"Vendor {i:03d}" for i in range(40)]
+LOCATIONS = ["Mumbai", "Delhi", "Chennai", "Kolkata", "Bengaluru", "Hyderabad"]
+MODELS = [("Apple", "iPhone 15"), ("Samsung", "Galaxy S24"), ("OnePlus", "OnePlus 12"), ("Xiaomi", "Xiaomi 14")]
+ADMIN = {"email": "loadtest@magnova.com", "password": "loadtest", "name": "Load Test", "organization": "Magnova", "role": "Admin"}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--mongo-url", help="local mongod to run against (default: MONGO_URL)")
+    target.add_argument("--in-memory", action="store_true", help="use mongomock-motor instead of a mongod")
+    parser.add_argument("--db-name", default="magnova_loadtest", help="scratch database, dropped before seeding (default magnova_loadtest)")
+    parser.add_argument("--pos", type=int, default=200, help="purchase orders to seed (default 200)")
+    parser.add_argument("--imeis", type=int, default=5000, help="procured IMEIs to seed (default 5000)")
+    parser.add_argument("--payments", type=int, default=1000, help="payments to seed (default 1000)")
+    parser.add_argument("--requests", type=int, default=100, help="requests per endpoint (default 100)")
+    parser.add_argument("--concurrency", type=int, default=8, help="requests in flight per endpoint (default 8)")
+    parser.add_argument("--only", action="append", default=[], help="run only scenarios whose name contains this (repeatable)")
+    parser.add_argument("--output", default=str(BENCHMARK_DIR / "results" / "loadtest-latest.json"), help="where to write results")
+    parser.add_argument("--baseline", help="baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="write these results to --baseline instead of comparing")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p99 / throughput regression fraction (default 0.25)")
+    parser.add_argument("--min-delta-ms", type=float, default=5.0, help="ignore p99 increases smaller than this (default 5ms)")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    if args.save_baseline and not args.baseline:
+        parser.error("--save-baseline needs --baseline")
+    return args
+
+
+def configure_environment(args):
+    """server reads MONGO_URL / DB_NAME at import time, so set them before importing it"""
+    if args.mongo_url:
+        os.environ["MONGO_URL"] = args.mongo_url
+    os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    os.environ["DB_NAME"] = args.db_name
+
+
+def use_in_memory_database(server, db_name: str):
+    try:
+        from mongomock_motor import AsyncMongoMockClient
+    except ImportError:
+        sys.exit("--in-memory needs mongomock-motor: pip install mongomock-motor")
+    server.client = AsyncMongoMockClient(tz_aware=True)
+    server.db = server.client[db_name]
+
+
+def build_dataset(args):
+    """Documents shaped like the write handlers produce, at the current schema version"""
+    from server import SCHEMA_VERSION
+
+    rng = random.Random(args.seed)
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+    def stamp(i: int, total: int) -> datetime:
+        # Spread creation times over a year, in insertion order like real traffic
+        return start + timedelta(seconds=int(i * 365 * 86400 / max(total, 1)), milliseconds=rng.randrange(1000))
+
+    pos = []
+    for p in range(args.pos):
+        created = stamp(p, args.pos)
+        items = []
+        for sl_no in range(1, rng.randint(1, 5) + 1):
+            brand, model = rng.choice(MODELS)
+            qty = rng.randint(5, 50)
+            items.append({
+                "sl_no": sl_no, "vendor": rng.choice(VENDORS), "location": rng.choice(LOCATIONS),
+                "brand": brand, "model": model, "storage": "128GB", "colour": "Black", "imei": None,
+                "qty": qty, "rate": 50000.0, "po_value": qty * 50000.0,
+            })
+        approval = rng.choice(["Pending", "Approved", "Approved", "Rejected"])
+        pos.append({
+            "po_id": f"po-{p:08d}", "po_number": f"PO-MAG-{p + 1:05d}", "po_date": created,
+            "purchase_office": "Magnova Head Office", "created_by": "loadtest", "created_by_name": "Load Test",
+            "organization": "Magnova", "status": "Created", "total_quantity": sum(i["qty"] for i in items),
+            "total_value": sum(i["po_value"] for i in items), "items": items, "notes": None,
+            "approval_status": approval, "approved_by": None, "approved_at": None, "rejection_reason": None,
+            "created_at": created, "updated_at": created, "schema_version": SCHEMA_VERSION,
+        })
+
+    procurement, inventory = [], []
+    for i in range(args.imeis):
+        po = rng.choice(pos)
+        item = rng.choice(po["items"])
+        created = stamp(i, args.imeis)
+        imei = f"35{i:013d}"
+        procurement_id = f"proc-{i:08d}"
+        procurement.append({
+            "procurement_id": procurement_id, "po_number": po["po_number"], "vendor_name": item["vendor"],
+            "store_location": item["location"], "imei": imei, "serial_number": None, "device_model": item["model"],
+            "quantity": 1, "purchase_price": item["rate"], "procurement_date": created, "created_by": "loadtest",
+            "created_at": created, "schema_version": SCHEMA_VERSION,
+        })
+        inventory.append({
+            "imei": imei, "procurement_id": procurement_id, "device_model": item["model"], "brand": item["brand"],
+            "model": item["model"], "colour": item["colour"], "storage": item["storage"], "vendor": item["vendor"],
+            "status": rng.choice(["Procured", "Procured", "Inward Nova", "Inward Magnova", "Dispatched"]),
+            "current_location": item["location"], "organization": "Nova", "po_number": po["po_number"],
+            "purchase_price": item["rate"], "created_at": created, "updated_at": created,
+        })
+
+    payments = []
+    for i in range(args.payments):
+        created = stamp(i, args.payments)
+        payment_type = rng.choice(["internal", "external"])
+        payments.append({
+            "payment_id": f"pay-{i:08d}", "po_number": rng.choice(pos)["po_number"], "payment_type": payment_type,
+            "procurement_id": None, "payee_type": "vendor" if payment_type == "external" else None,
+            "payee_name": rng.choice(VENDORS), "payee_phone": None, "payee_account": None, "payee_bank": None,
+            "account_number": None, "ifsc_code": None, "location": None, "payment_mode": "Bank Transfer",
+            "amount": float(rng.randrange(10000, 500000)), "transaction_ref": None, "utr_number": None,
+            "payment_date": created, "status": "Completed", "created_by": "loadtest", "created_at": created,
+            "schema_version": SCHEMA_VERSION,
+        })
+    return {"purchase_orders": pos, "procurement": procurement, "imei_inventory": inventory, "payments": payments}
+
+
+async def seed(server, dataset: dict, chunk: int = 5000):
+    await server.client.drop_database(server.db.name)
+    for collection, docs in dataset.items():
+        for i in range(0, len(docs), chunk):
+            await server.db[collection].insert_many(docs[i:i + chunk], ordered=False)
+    # Indexes after the bulk load, then the same derived state startup builds
+    report = await server.reconcile_indexes()
+    failed = {c: list(r["failed"]) for c, r in report.items() if r["failed"]}
+    if failed:
+        print(f"  indexes not created: {failed}")
+    # seed_sequences' $substrCP scan is not supported in-memory; the seeded PO numbers are known anyway
+    await server.db.counters.update_one({"_id": "purchase_orders"}, {"$max": {"seq": len(dataset["purchase_orders"])}}, upsert=True)
+    await server.backfill_po_balances()
+    await server.rebuild_dashboard_stats()
+
+
+def scenarios(dataset: dict, rng: random.Random) -> list:
+    """(name, method, path or callable -> path, json body or callable -> body, expected status)"""
+    po_numbers = [po["po_number"] for po in dataset["purchase_orders"]]
+    imeis = [doc["imei"] for doc in dataset["imei_inventory"]]
+    return [
+        ("GET /purchase-orders", "GET", "/api/purchase-orders?limit=100", None, 200),
+        ("GET /purchase-orders?vendor", "GET", lambda: f"/api/purchase-orders?limit=100&vendor={rng.choice(VENDORS)}", None, 200),
+        ("GET /purchase-orders/{po_number}", "GET", lambda: f"/api/purchase-orders/{rng.choice(po_numbers)}", None, 200),
+        ("GET /procurement", "GET", "/api/procurement?limit=500", None, 200),
+        ("GET /inventory", "GET", "/api/inventory?limit=500", None, 200),
+        ("GET /inventory?fast", "GET", "/api/inventory?limit=500&fast=true", None, 200),
+        ("GET /inventory/lookup/{imei}", "GET", lambda: f"/api/inventory/lookup/{rng.choice(imeis)}", None, 200),
+        ("GET /payments", "GET", "/api/payments?limit=100", None, 200),
+        ("GET /payments/summary/{po_number}", "GET", lambda: f"/api/payments/summary/{rng.choice(po_numbers)}", None, 200),
+        ("GET /reports/dashboard", "GET", "/api/reports/dashboard", None, 200),
+        ("POST /inventory/scan", "POST", "/api/inventory/scan", lambda: {
+            "imei": rng.choice(imeis), "action": "inward_nova", "location": rng.choice(LOCATIONS), "organization": "Nova"
+        }, 200),
+    ]
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    """Nearest-rank percentile"""
+    return sorted_values[max(0, math.ceil(q * len(sorted_values)) - 1)]
+
+
+async def run_scenario(client, scenario, requests: int, concurrency: int) -> dict:
+    name, method, path, body, expected = scenario
+    latencies, errors = [], 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            url = path() if callable(path) else path
+            payload = body() if callable(body) else body
+            started = time.perf_counter()
+            response = await client.request(method, url, json=payload)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != expected:
+                errors += 1
+
+    # A few untimed requests first so caches and lazily started workers are warm
+    for _ in range(min(5, requests)):
+        url = path() if callable(path) else path
+        await client.request(method, url, json=body() if callable(body) else body)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float, min_delta_ms: float) -> list:
+    """Endpoints whose p99 rose or throughput fell by more than `tolerance`, or that started failing.
+
+    A p99 increase also has to exceed min_delta_ms, since one slow request
+    moves the p99 of a fast endpoint by more than any sensible fraction.
+    """
+    regressions = []
+    for name, current in results["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(name)
+        if not previous:
+            continue
+        p99_increase = current["p99_ms"] - previous["p99_ms"]
+        if p99_increase > previous["p99_ms"] * tolerance and p99_increase > min_delta_ms:
+            regressions.append(f"{name}: p99 {previous['p99_ms']}ms -> {current['p99_ms']}ms")
+        if current["throughput_rps"] < previous["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {previous['throughput_rps']} -> {current['throughput_rps']} req/s")
+        if current["errors"] > previous["errors"]:
+            regressions.append(f"{name}: errors {previous['errors']} -> {current['errors']}")
+    return regressions
+
+
+async def run(args) -> dict:
+    import httpx
+    import server
+
+    if args.in_memory:
+        use_in_memory_database(server, args.db_name)
+    rng = random.Random(args.seed)
+
+    print(f"Seeding {args.pos} POs, {args.imeis} IMEIs, {args.payments} payments "
+          f"into {'in-memory' if args.in_memory else os.environ['MONGO_URL']} / {args.db_name}")
+    started = time.perf_counter()
+    dataset = build_dataset(args)
+    await seed(server, dataset)
+    print(f"  seeded in {time.perf_counter() - started:.1f}s")
+
+    results = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "database": "in-memory" if args.in_memory else "mongod",
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "dataset": {"pos": args.pos, "imeis": args.imeis, "payments": args.payments, "seed": args.seed},
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+        },
+        "endpoints": {},
+    }
+    transport = httpx.ASGITransport(app=server.app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=None) as client:
+            response = await client.post("/api/auth/register", json=ADMIN)
+            if response.status_code != 200:
+                sys.exit(f"Could not register load test user: {response.text}")
+            client.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+
+            print(f"{'endpoint':<36} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>9} {'errors':>7}")
+            for scenario in scenarios(dataset, rng):
+                name = scenario[0]
+                if args.only and not any(part in name for part in args.only):
+                    continue
+                stats = await run_scenario(client, scenario, args.requests, args.concurrency)
+                results["endpoints"][name] = stats
+                print(f"{name:<36} {stats['p50_ms']:>9} {stats['p95_ms']:>9} {stats['p99_ms']:>9} "
+                      f"{stats['throughput_rps']:>9} {stats['errors']:>7}")
+    finally:
+        await server.audit_writer.stop()
+        if not args.in_memory:
+            await server.client.drop_database(args.db_name)
+        server.client.close()
+        server.password_hasher.shutdown()
+    return results
+
+
+def main():
+    args = parse_args()
+    configure_environment(args)
+    results = asyncio.run(run(args))
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2) + "\n")
+    print(f"Results written to {output}")
+
+    if not args.baseline:
+        return
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Baseline saved to {baseline_path}")
+        return
+    baseline = json.loads(baseline_path.read_text())
+    if baseline.get("meta", {}).get("dataset") != results["meta"]["dataset"]:
+        print("warning: baseline was recorded with a different dataset; comparison may not be meaningful")
+    regressions = compare(results, baseline, args.tolerance, args.min_delta_ms)
+    if regressions:
+        sys.exit("Regressions against baseline:\n  " + "\n  ".join(regressions))
+    print(f"No regressions against {baseline_path} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
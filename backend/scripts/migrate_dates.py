@@ -0,0 +1,42 @@
+"""
+Migration: convert ISO-string date fields to native BSON dates.
+
+Walks every collection in server.DATE_FIELDS and rewrites string values in
+place with bulk updates. Only string values are matched, so the script can be
+re-run safely and interrupted at any point. Uses MONGO_URL / DB_NAME from
+backend/.env like the server.
+
+    cd backend && python scripts/migrate_dates.py --dry-run
+    cd backend && python scripts/migrate_dates.py
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from server import client, migrate_date_fields  # noqa: E402
+
+
+async def run(batch_size: int, dry_run: bool):
+    try:
+        report = await migrate_date_fields(batch_size=batch_size, dry_run=dry_run)
+    finally:
+        client.close()
+    for collection, counts in report.items():
+        print(f"{collection:<22} converted={counts['converted']:<8} unparseable={counts['unparseable']}")
+    total = sum(counts["converted"] for counts in report.values())
+    print(f"{'Would convert' if dry_run else 'Converted'} {total} documents")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--batch-size", type=int, default=1000, help="updates per bulk_write (default 1000)")
+    parser.add_argument("--dry-run", action="store_true", help="count documents without writing")
+    args = parser.parse_args()
+    asyncio.run(run(args.batch_size, args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,734 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, UploadFile, File, Form
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, UploadFile, File, Form, Query, Response, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, FileResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne, ReplaceOne, ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+from pymongo import monitoring
+from bson import json_util
 import os
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict, EmailStr
+from pydantic import BaseModel, Field, ConfigDict, EmailStr, ValidationError
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timezone, timedelta
 import jwt
 from passlib.context import CryptContext
 import io
+import csv
+import json
+import re
+import tempfile
+import time
+import base64
+import hashlib
+import asyncio
+import threading
+import socket
+import fcntl
+from contextvars import ContextVar
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 import xlsxwriter
+import orjson
+import zlib
+from starlette.datastructures import MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # optional; without it responses are gzip-only
+    brotli = None
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+# Metrics: Prometheus-style counters and histograms rendered as text at /metrics.
+# Observed from the event loop and from Motor's executor threads, hence the locks.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ROUND_TRIP_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+def metric_labels(names: tuple, values: tuple) -> str:
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in values)
+    return ",".join(f'{name}="{value}"' for name, value in zip(names, escaped))
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labelnames: tuple):
+        self.name, self.help_text, self.labelnames = name, help_text, labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+    
+    def inc(self, labels: tuple, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+    
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{{{metric_labels(self.labelnames, labels)}}} {value}")
+        return lines
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labelnames: tuple, buckets: tuple):
+        self.name, self.help_text, self.labelnames, self.buckets = name, help_text, labelnames, buckets
+        self._series = {}  # labels -> [per-bucket counts (non-cumulative, +Inf last), sum, count]
+        self._lock = threading.Lock()
+    
+    def observe(self, labels: tuple, value: float):
+        index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+    
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, (counts, total, count) in sorted(self._series.items()):
+                base = metric_labels(self.labelnames, labels)
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + ("+Inf",), counts):
+                    cumulative += bucket_count
+                    lines.append(f'{self.name}_bucket{{{base},le="{bound}"}} {cumulative}')
+                lines.append(f"{self.name}_sum{{{base}}} {total}")
+                lines.append(f"{self.name}_count{{{base}}} {count}")
+        return lines
+
+http_requests_total = Counter("http_requests_total", "HTTP requests by route template and status", ("method", "route", "status"))
+http_request_duration = Histogram("http_request_duration_seconds", "HTTP request latency by route template", ("method", "route"), LATENCY_BUCKETS)
+http_request_mongo_commands = Histogram("http_request_mongo_commands", "Mongo round trips per HTTP request", ("method", "route"), ROUND_TRIP_BUCKETS)
+mongo_command_duration = Histogram("mongo_command_duration_seconds", "Mongo command latency by collection and command", ("collection", "command"), LATENCY_BUCKETS)
+mongo_command_failures = Counter("mongo_command_failures_total", "Failed Mongo commands by collection and command", ("collection", "command"))
+METRICS = [http_requests_total, http_request_duration, http_request_mongo_commands, mongo_command_duration, mongo_command_failures]
+
+class RequestMetrics:
+    """The current request as seen from Mongo command listeners"""
+    __slots__ = ("scope", "mongo_commands")
+    
+    def __init__(self, scope):
+        self.scope = scope
+        self.mongo_commands = 0
+    
+    @property
+    def route(self) -> str:
+        # The router stores the matched route in the scope; unmatched paths share one label
+        return getattr(self.scope.get("route"), "path", None) or "unmatched"
+
+# Motor copies the context into its executor threads, so commands issued while
+# handling a request see that request's RequestMetrics.
+request_metrics: ContextVar[Optional[RequestMetrics]] = ContextVar("request_metrics", default=None)
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Command monitoring listener: duration per (collection, command) and round trips per request"""
+    def __init__(self):
+        self._started = {}
+        self._lock = threading.Lock()
+    
+    def started(self, event):
+        target = event.command.get(event.command_name)
+        collection = target if isinstance(target, str) else event.command.get("collection", "")
+        request = request_metrics.get()
+        # The command itself is only kept when the slow query log may need it
+        command = (event.database_name, event.command) if slow_query_log.enabled else None
+        with self._lock:
+            self._started[(event.connection_id, event.request_id)] = (collection, command, request)
+        if request is not None:
+            request.mongo_commands += 1
+    
+    def _finish(self, event) -> tuple:
+        with self._lock:
+            collection, command, request = self._started.pop((event.connection_id, event.request_id), ("", None, None))
+        labels = (collection, event.command_name)
+        duration = event.duration_micros / 1_000_000
+        mongo_command_duration.observe(labels, duration)
+        if command is not None and duration * 1000 >= slow_query_log.threshold_ms:
+            slow_query_log.capture(command[0], collection, event.command_name, command[1], duration * 1000, request)
+        return labels
+    
+    def succeeded(self, event):
+        self._finish(event)
+    
+    def failed(self, event):
+        mongo_command_failures.inc(self._finish(event))
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording latency per route template ("/api/inventory/{imei}")"""
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status_code = 500
+        
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+        
+        request = RequestMetrics(scope)
+        token = request_metrics.set(request)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            request_metrics.reset(token)
+            labels = (scope["method"], request.route)
+            http_requests_total.inc(labels + (str(status_code),))
+            http_request_duration.observe(labels, elapsed)
+            http_request_mongo_commands.observe(labels, request.mongo_commands)
+
+def render_metrics() -> str:
+    return "\n".join(line for metric in METRICS for line in metric.render()) + "\n"
+
+mongo_metrics = MongoCommandMetrics()
+
+# Response compression: gzip or brotli as negotiated from Accept-Encoding, with per-route
+# levels keyed by route template. XLSX is a zip archive already and is sent as is.
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "application/xml")
+# Single-piece bodies at least this large are compressed off the event loop
+COMPRESSION_OFFLOAD_BYTES = 256 * 1024
+# Route template -> (gzip level, brotli quality). Streamed exports favour speed: level 1 still
+# shrinks CSV several times over without making the export CPU-bound.
+COMPRESSION_ROUTE_DEFAULTS = {
+    "/api/reports/export/inventory": (1, 1),
+    "/api/reports/export/master": (1, 1),
+    "/api/reports/exports/{job_id}/download": (1, 1),
+}
+
+def parse_route_levels(value: str) -> dict:
+    """'/api/inventory=6:5,/api/reports/export/master=1:1' -> {route: (gzip level, brotli quality)}"""
+    levels = {}
+    for entry in filter(None, (part.strip() for part in value.split(","))):
+        route, _, level = entry.rpartition("=")
+        gzip_level, _, brotli_quality = level.partition(":")
+        levels[route] = (int(gzip_level), int(brotli_quality or gzip_level))
+    return levels
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Highest-q coding we support; brotli wins ties. None means identity."""
+    weights = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[coding.strip()] = q
+    available = ["br", "gzip"] if brotli is not None else ["gzip"]
+    ranked = [(weights.get(coding, weights.get("*", 0.0)), -i, coding) for i, coding in enumerate(available)]
+    q, _, coding = max(ranked)
+    return coding if q > 0 else None
+
+class GzipEncoder:
+    def __init__(self, level: int):
+        self._zlib = zlib.compressobj(level, zlib.DEFLATED, 31)
+    
+    def compress(self, data: bytes, final: bool) -> bytes:
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+class BrotliEncoder:
+    def __init__(self, quality: int):
+        self._brotli = brotli.Compressor(quality=quality)
+    
+    def compress(self, data: bytes, final: bool) -> bytes:
+        return self._brotli.process(data) + (self._brotli.finish() if final else self._brotli.flush())
+
+class CompressionMiddleware:
+    """Pure ASGI response compression.
+
+    A body sent in one piece is compressed when it is at least minimum_size
+    bytes. Streamed bodies (CSV exports, file downloads) are compressed chunk
+    by chunk and flushed after each one, so the client gets rows as they are
+    produced and nothing is buffered.
+    """
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4, route_levels: Optional[dict] = None):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.default_levels = (gzip_level, brotli_quality)
+        self.route_levels = route_levels or {}
+    
+    def encoder(self, encoding: str, scope):
+        route = getattr(scope.get("route"), "path", None)
+        gzip_level, brotli_quality = self.route_levels.get(route, self.default_levels)
+        return BrotliEncoder(brotli_quality) if encoding == "br" else GzipEncoder(gzip_level)
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = next((value.decode("latin-1") for name, value in scope["headers"] if name == b"accept-encoding"), "")
+        encoding = negotiate_encoding(accept_encoding)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        start = None
+        encoder = None
+        
+        async def send_compressed(message):
+            nonlocal start, encoder
+            if message["type"] == "http.response.start":
+                # Held until the first body chunk shows whether the body is worth compressing
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+            if start is None:
+                # A later chunk of a body that is already on its way
+                if encoder is not None:
+                    more_body = message.get("more_body", False)
+                    message = {"type": "http.response.body", "body": encoder.compress(message.get("body", b""), not more_body), "more_body": more_body}
+                await send(message)
+                return
+            
+            headers = MutableHeaders(raw=start["headers"])
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            pending, start = start, None
+            if pending["status"] in (204, 206, 304) or "content-encoding" in headers or not headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES):
+                await send(pending)
+                await send(message)
+                return
+            headers.add_vary_header("Accept-Encoding")
+            if not more_body and len(body) < self.minimum_size:
+                await send(pending)
+                await send(message)
+                return
+            
+            encoder = self.encoder(encoding, scope)
+            headers["Content-Encoding"] = encoding
+            # Byte ranges of the identity body don't apply to the encoded one
+            for name in ("content-length", "accept-ranges"):
+                if name in headers:
+                    del headers[name]
+            if more_body:
+                await send(pending)
+                await send({"type": "http.response.body", "body": encoder.compress(body, False), "more_body": True})
+                return
+            if len(body) >= COMPRESSION_OFFLOAD_BYTES:
+                body = await asyncio.get_running_loop().run_in_executor(None, encoder.compress, body, True)
+            else:
+                body = encoder.compress(body, True)
+            headers["Content-Length"] = str(len(body))
+            await send(pending)
+            await send({"type": "http.response.body", "body": body})
+        
+        await self.app(scope, receive, send_compressed)
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(mongo_url, tz_aware=True, tzinfo=timezone.utc, event_listeners=[mongo_metrics])
 db = client[os.environ['DB_NAME']]
 
-# Create indexes
-async def create_indexes():
-    await db.users.create_index("email", unique=True)
-    await db.imei_inventory.create_index("imei", unique=True)
-    await db.purchase_orders.create_index("po_number", unique=True)
+# Index registry: one entry per query shape the handlers issue, as (keys, options).
+# Names follow MongoDB's default "<field>_<direction>" scheme so existing indexes match.
+INDEX_REGISTRY = {
+    "users": [
+        ([("email", 1)], {"unique": True}),
+        ([("user_id", 1)], {}),
+    ],
+    "purchase_orders": [
+        ([("po_number", 1)], {"unique": True}),
+        ([("created_at", -1), ("po_id", -1)], {}),
+        ([("approval_status", 1)], {}),
+        ([("approval_status", 1), ("created_at", -1), ("po_id", -1)], {}),
+        ([("status", 1), ("created_at", -1), ("po_id", -1)], {}),
+        ([("items.vendor", 1), ("created_at", -1), ("po_id", -1)], {}),
+        ([("po_date", -1), ("po_id", -1)], {}),
+        ([("po_number", "text"), ("purchase_office", "text"), ("notes", "text"),
+          ("items.vendor", "text"), ("items.brand", "text"), ("items.model", "text")], {}),
+    ],
+    "procurement": [
+        ([("imei", 1)], {}),
+        ([("procurement_id", 1)], {}),
+        ([("created_at", -1), ("procurement_id", -1)], {}),
+        ([("po_number", 1), ("created_at", -1), ("procurement_id", -1)], {}),
+    ],
+    "payments": [
+        ([("payment_id", 1)], {}),
+        ([("po_number", 1), ("payment_type", 1)], {}),
+        ([("payment_date", -1), ("payment_id", -1)], {}),
+        ([("created_at", -1), ("payment_id", -1)], {}),
+        ([("po_number", 1), ("created_at", -1), ("payment_id", -1)], {}),
+    ],
+    "imei_inventory": [
+        ([("imei", 1)], {"unique": True}),
+        ([("created_at", -1), ("imei", -1)], {}),
+        ([("status", 1), ("organization", 1), ("created_at", -1), ("imei", -1)], {}),
+        ([("organization", 1), ("created_at", -1), ("imei", -1)], {}),
+        ([("device_model", "text"), ("brand", "text"), ("model", "text")], {}),
+    ],
+    "logistics_shipments": [
+        ([("shipment_id", 1)], {}),
+        ([("po_number", 1)], {}),
+        ([("created_at", -1), ("shipment_id", -1)], {}),
+        ([("status", 1), ("created_at", -1), ("shipment_id", -1)], {}),
+        ([("vendor", 1), ("created_at", -1), ("shipment_id", -1)], {}),
+        ([("pickup_date", -1), ("shipment_id", -1)], {}),
+        ([("po_number", "text"), ("transporter_name", "text"), ("vehicle_number", "text"),
+          ("from_location", "text"), ("to_location", "text"), ("vendor", "text")], {}),
+    ],
+    "invoices": [
+        ([("invoice_id", 1)], {}),
+        ([("po_number", 1)], {}),
+        ([("created_at", -1), ("invoice_id", -1)], {}),
+        ([("payment_status", 1), ("created_at", -1), ("invoice_id", -1)], {}),
+        ([("invoice_date", -1), ("invoice_id", -1)], {}),
+        ([("invoice_number", "text"), ("po_number", "text"), ("from_organization", "text"),
+          ("to_organization", "text"), ("description", "text")], {}),
+    ],
+    "sales_orders": [
+        ([("so_number", 1)], {}),
+        ([("created_at", -1), ("sales_order_id", -1)], {}),
+        ([("status", 1), ("created_at", -1), ("sales_order_id", -1)], {}),
+        ([("customer_type", 1), ("created_at", -1), ("sales_order_id", -1)], {}),
+        ([("so_number", "text"), ("customer_name", "text")], {}),
+    ],
+    "report_jobs": [
+        ([("job_id", 1)], {"unique": True}),
+        ([("created_by", 1), ("created_at", -1)], {}),
+        ([("status", 1), ("created_at", 1)], {}),
+    ],
+    "audit_logs": [
+        ([("log_id", 1)], {"unique": True}),
+        ([("timestamp", -1), ("log_id", -1)], {}),
+        ([("entity_type", 1), ("timestamp", -1), ("log_id", -1)], {}),
+    ],
+}
+
+def index_name(keys) -> str:
+    return "_".join(f"{field}_{direction}" for field, direction in keys)
+
+# Options that change what an index enforces or keeps; an index differing in any of them is a conflict
+INDEX_COMPARED_OPTIONS = {"unique": False, "sparse": False, "partialFilterExpression": None, "expireAfterSeconds": None}
+
+def index_conflicts(keys, options: dict, info: dict) -> List[str]:
+    """How an existing index (an index_information() entry) differs from its registry spec"""
+    conflicts = []
+    text_fields = {field for field, direction in keys if direction == "text"}
+    if text_fields:
+        # Text indexes report their fields as weights rather than in "key"
+        if "weights" in info and set(info["weights"]) != text_fields:
+            conflicts.append(f"text fields: expected {sorted(text_fields)}, found {sorted(info.get('weights', {}))}")
+    elif [tuple(pair) for pair in info.get("key", [])] != [tuple(pair) for pair in keys]:
+        conflicts.append(f"key: expected {list(keys)}, found {info.get('key')}")
+    for option, default in INDEX_COMPARED_OPTIONS.items():
+        expected, found = options.get(option, default), info.get(option, default)
+        if expected != found:
+            conflicts.append(f"{option}: expected {expected}, found {found}")
+    return conflicts
+
+async def reconcile_indexes() -> dict:
+    """Create any registered index that is missing and report indexes outside the registry.
+
+    An existing index whose keys or options differ from its spec is reported
+    under "conflicts" and left alone: replacing it (say, making imei_1 unique
+    over data that has duplicates) needs an operator.
+    """
+    report = {}
+    for collection, specs in INDEX_REGISTRY.items():
+        existing = await db[collection].index_information()
+        created, failed, conflicts = [], {}, {}
+        for keys, options in specs:
+            name = index_name(keys)
+            if name in existing:
+                differences = index_conflicts(keys, options, existing[name])
+                if differences:
+                    conflicts[name] = differences
+                continue
+            try:
+                await db[collection].create_index(keys, **options)
+                created.append(name)
+            except OperationFailure as e:
+                failed[name] = str(e)
+                logger.warning(f"Could not create index {collection}.{name}: {e}")
+        registered = {index_name(keys) for keys, _ in specs}
+        report[collection] = {
+            "created": created,
+            "failed": failed,
+            "conflicts": conflicts,
+            "unregistered": [name for name in existing if name != "_id_" and name not in registered]
+        }
+    return report
+
+async def index_usage_report() -> dict:
+    """Registered indexes that are missing or conflict with their spec, plus indexes with no recorded use via $indexStats"""
+    report = {}
+    for collection, specs in INDEX_REGISTRY.items():
+        registered = [index_name(keys) for keys, _ in specs]
+        existing = await db[collection].index_information()
+        conflicts = {
+            index_name(keys): differences
+            for keys, options in specs if index_name(keys) in existing
+            for differences in [index_conflicts(keys, options, existing[index_name(keys)])] if differences
+        }
+        try:
+            usage = {
+                stat["name"]: stat["accesses"]
+                for stat in await db[collection].aggregate([{"$indexStats": {}}]).to_list(None)
+            }
+        except OperationFailure:
+            usage = None
+        report[collection] = {
+            "missing": [name for name in registered if name not in existing],
+            "conflicts": conflicts,
+            "unregistered": [name for name in existing if name != "_id_" and name not in registered],
+            "unused": None if usage is None else [
+                {"name": name, "since": usage[name].get("since")}
+                for name in existing if name != "_id_" and name in usage and usage[name].get("ops", 0) == 0
+            ]
+        }
+    return report
+
+# Date fields: stored as BSON dates and decoded as timezone-aware UTC datetimes by the client.
+# Documents written before this were ISO strings; migrate_date_fields converts them in place.
+DATE_FIELDS = {
+    "users": ["created_at"],
+    "purchase_orders": ["po_date", "created_at", "updated_at", "approved_at"],
+    "procurement": ["procurement_date", "created_at"],
+    "payments": ["payment_date", "created_at"],
+    "imei_inventory": [
+        "created_at", "updated_at", "inward_nova_date", "inward_magnova_date",
+        "outward_nova_date", "outward_magnova_date", "dispatched_date", "sold_date"
+    ],
+    "logistics_shipments": ["pickup_date", "expected_delivery", "actual_delivery", "created_at", "updated_at"],
+    "invoices": ["invoice_date", "created_at"],
+    "sales_orders": ["created_at", "updated_at"],
+    "audit_logs": ["timestamp"],
+    "report_jobs": ["created_at", "started_at", "finished_at"],
+}
+
+def parse_date_string(value: str) -> Optional[datetime]:
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+# Collections that may still hold ISO-string dates. MongoDB compares values of one type only, so
+# until migrate_date_fields has finished a collection its keyset cursors and date filters are
+# widened to match strings too (legacy_date_query); otherwise string-dated rows fall out of
+# every page after the first. Startup drops collections recorded as done in date_migrations.
+legacy_date_collections = set(DATE_FIELDS)
+
+async def load_date_migration_state():
+    done = await db.date_migrations.distinct("_id", {"completed_at": {"$ne": None}})
+    legacy_date_collections.difference_update(done)
+
+def iso_bound(value: datetime) -> str:
+    value = value.astimezone(timezone.utc)
+    # Midnight as a bare date, so date-only legacy strings ("2025-03-04") land on the right side of the bound
+    if (value.hour, value.minute, value.second, value.microsecond) == (0, 0, 0, 0):
+        return value.strftime("%Y-%m-%d")
+    return value.isoformat()
+
+def legacy_date_query(collection: str, query: dict) -> dict:
+    """`query` with each datetime range on a date field also matching the same range as an ISO string"""
+    rest, widened = {}, []
+    for field, condition in query.items():
+        if field in DATE_FIELDS[collection] and isinstance(condition, dict) and condition and all(isinstance(v, datetime) for v in condition.values()):
+            widened.append({"$or": [{field: condition}, {field: {op: iso_bound(v) for op, v in condition.items()}}]})
+        else:
+            rest[field] = condition
+    return {"$and": [rest, *widened]} if widened else query
+
+async def migrate_date_fields(batch_size: int = 1000, dry_run: bool = False, collections: Optional[List[str]] = None, pause: float = 0.0) -> dict:
+    """Rewrite ISO-string date fields as BSON dates; safe to re-run, only string values are touched.
+
+    Each collection finished by a real run is recorded in date_migrations and
+    removed from legacy_date_collections.
+    """
+    report = {}
+    for collection in collections or list(DATE_FIELDS):
+        fields = DATE_FIELDS[collection]
+        converted, unparseable = 0, 0
+        ops = []
+        query = {"$or": [{field: {"$type": "string"}} for field in fields]}
+        async for doc in db[collection].find(query, {field: 1 for field in fields}):
+            update = {}
+            for field in fields:
+                if isinstance(doc.get(field), str):
+                    parsed = parse_date_string(doc[field])
+                    if parsed is None:
+                        unparseable += 1
+                        logger.warning(f"Unparseable date {collection}.{field} on {doc['_id']}: {doc[field]!r}")
+                    else:
+                        update[field] = parsed
+            if not update:
+                continue
+            converted += 1
+            ops.append(UpdateOne({"_id": doc["_id"], **{field: doc[field] for field in update}}, {"$set": update}))
+            if len(ops) >= batch_size:
+                if not dry_run:
+                    await db[collection].bulk_write(ops, ordered=False)
+                    if pause:
+                        await asyncio.sleep(pause)
+                ops = []
+        if ops and not dry_run:
+            await db[collection].bulk_write(ops, ordered=False)
+        report[collection] = {"converted": converted, "unparseable": unparseable}
+        if not dry_run:
+            # Unparseable values stay strings; nothing later can convert them, so the collection still counts as done
+            await db.date_migrations.update_one(
+                {"_id": collection},
+                {"$set": {**report[collection], "completed_at": datetime.now(timezone.utc)}},
+                upsert=True
+            )
+            legacy_date_collections.discard(collection)
+    return report
+
+date_migration_task: Optional[asyncio.Task] = None
+
+async def run_date_migration():
+    if not legacy_date_collections:
+        return
+    try:
+        report = await migrate_date_fields(SCHEMA_UPGRADE_BATCH_SIZE, collections=sorted(legacy_date_collections), pause=SCHEMA_UPGRADE_PAUSE_SECONDS)
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        logger.exception("Date migration failed; it resumes on next start")
+        return
+    converted = {collection: counts["converted"] for collection, counts in report.items() if counts["converted"]}
+    if converted:
+        logger.info(f"Converted string dates to BSON dates: {converted}")
+
+# Schema versions: documents written now carry schema_version = SCHEMA_VERSION. Older documents
+# lack fields added since; read handlers fill them until upgrade_schema_versions has rewritten them.
+SCHEMA_VERSION = 1
+
+def legacy_purchase_order_fields(po: dict) -> dict:
+    fields = {}
+    if 'po_date' not in po:
+        fields['po_date'] = po.get('created_at')
+    if 'purchase_office' not in po:
+        fields['purchase_office'] = 'Magnova Head Office'
+    if 'total_value' not in po:
+        fields['total_value'] = 0.0
+    if 'items' not in po:
+        fields['items'] = []
+    return fields
+
+def legacy_procurement_fields(rec: dict) -> dict:
+    return {} if 'quantity' in rec else {'quantity': 1}
+
+def legacy_payment_fields(payment: dict) -> dict:
+    fields = {}
+    if payment.get('payment_type') is None:
+        fields['payment_type'] = 'internal'
+    for field in ['payee_account', 'payee_bank', 'account_number', 'ifsc_code', 'location', 'utr_number', 'payee_type']:
+        if field not in payment:
+            fields[field] = None
+    return fields
+
+def legacy_shipment_fields(shipment: dict) -> dict:
+    fields = {}
+    if 'pickup_quantity' not in shipment:
+        fields['pickup_quantity'] = len(shipment.get('imei_list', []))
+    for field in ['brand', 'model', 'vendor']:
+        if field not in shipment:
+            fields[field] = None
+    return fields
+
+def legacy_invoice_fields(invoice: dict) -> dict:
+    fields = {}
+    if 'gst_percentage' not in invoice:
+        fields['gst_percentage'] = 18
+    for field in ['description', 'billing_address', 'shipping_address']:
+        if field not in invoice:
+            fields[field] = None
+    return fields
+
+LEGACY_FIELDS = {
+    "purchase_orders": legacy_purchase_order_fields,
+    "procurement": legacy_procurement_fields,
+    "payments": legacy_payment_fields,
+    "logistics_shipments": legacy_shipment_fields,
+    "invoices": legacy_invoice_fields,
+}
+
+def upgrade_legacy(collection: str, doc: dict) -> dict:
+    """Fill missing fields in place, skipping documents already at SCHEMA_VERSION"""
+    if doc.get("schema_version") != SCHEMA_VERSION:
+        doc.update(LEGACY_FIELDS[collection](doc))
+    return doc
+
+async def upgrade_schema_versions(batch_size: int = 500, pause: float = 0.0) -> dict:
+    """Rewrite legacy documents to SCHEMA_VERSION in _id order.
+
+    Progress per collection is checkpointed in schema_migrations after every
+    batch, so an interrupted run resumes after the last upgraded _id and a
+    finished collection is skipped on later runs. Returns the count upgraded
+    by this run per collection.
+    """
+    report = {}
+    for collection, legacy_fields in LEGACY_FIELDS.items():
+        checkpoint = await db.schema_migrations.find_one({"_id": collection}) or {}
+        if checkpoint.get("version") != SCHEMA_VERSION:
+            checkpoint = {}
+        elif checkpoint.get("completed_at"):
+            continue
+        last_id, upgraded = checkpoint.get("last_id"), checkpoint.get("upgraded", 0)
+        while True:
+            query = {"schema_version": {"$ne": SCHEMA_VERSION}}
+            if last_id is not None:
+                query["_id"] = {"$gt": last_id}
+            docs = await db[collection].find(query).sort("_id", 1).limit(batch_size).to_list(batch_size)
+            if not docs:
+                break
+            # Guarded on the version so a concurrent run or newer write is never overwritten
+            result = await db[collection].bulk_write([
+                UpdateOne(
+                    {"_id": doc["_id"], "schema_version": {"$ne": SCHEMA_VERSION}},
+                    {"$set": {**legacy_fields(doc), "schema_version": SCHEMA_VERSION}}
+                )
+                for doc in docs
+            ], ordered=False)
+            upgraded += result.modified_count
+            last_id = docs[-1]["_id"]
+            await db.schema_migrations.update_one(
+                {"_id": collection},
+                {"$set": {"version": SCHEMA_VERSION, "last_id": last_id, "upgraded": upgraded,
+                          "updated_at": datetime.now(timezone.utc), "completed_at": None}},
+                upsert=True
+            )
+            if pause:
+                await asyncio.sleep(pause)
+        now = datetime.now(timezone.utc)
+        await db.schema_migrations.update_one(
+            {"_id": collection},
+            {"$set": {"version": SCHEMA_VERSION, "last_id": last_id, "upgraded": upgraded, "updated_at": now, "completed_at": now}},
+            upsert=True
+        )
+        report[collection] = upgraded - checkpoint.get("upgraded", 0)
+    return report
+
+schema_upgrade_task: Optional[asyncio.Task] = None
+
+async def run_schema_upgrade():
+    try:
+        report = await upgrade_schema_versions(SCHEMA_UPGRADE_BATCH_SIZE, SCHEMA_UPGRADE_PAUSE_SECONDS)
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        logger.exception("Schema upgrade failed; it resumes from its checkpoint on next start")
+        return
+    upgraded = {collection: count for collection, count in report.items() if count}
+    if upgraded:
+        logger.info(f"Upgraded documents to schema version {SCHEMA_VERSION}: {upgraded}")
 
 # Security
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -35,6 +736,34 @@ security = HTTPBearer()
 SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'your-secret-key-change-in-production')
 ALGORITHM = "HS256"
 
+USER_CACHE_TTL_SECONDS = float(os.environ.get('USER_CACHE_TTL_SECONDS', '60'))
+USER_CACHE_MAX_ENTRIES = int(os.environ.get('USER_CACHE_MAX_ENTRIES', '1024'))
+IMEI_LOOKUP_CACHE_TTL_SECONDS = float(os.environ.get('IMEI_LOOKUP_CACHE_TTL_SECONDS', '5'))
+IMEI_LOOKUP_CACHE_MAX_ENTRIES = int(os.environ.get('IMEI_LOOKUP_CACHE_MAX_ENTRIES', '4096'))
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', '4'))
+AUDIT_LOG_BATCH_SIZE = int(os.environ.get('AUDIT_LOG_BATCH_SIZE', '200'))
+AUDIT_LOG_FLUSH_INTERVAL_SECONDS = float(os.environ.get('AUDIT_LOG_FLUSH_INTERVAL_SECONDS', '0.25'))
+AUDIT_LOG_QUEUE_SIZE = int(os.environ.get('AUDIT_LOG_QUEUE_SIZE', '10000'))
+AUDIT_LOG_WAL_PATH = os.environ.get('AUDIT_LOG_WAL_PATH', '')
+SEQUENCE_BLOCK_SIZE = int(os.environ.get('SEQUENCE_BLOCK_SIZE', '1'))
+DASHBOARD_STATS_MATERIALIZED = os.environ.get('DASHBOARD_STATS_MATERIALIZED', 'false').lower() == 'true'
+EXPORT_DIR = Path(os.environ.get('EXPORT_DIR', str(ROOT_DIR / 'exports')))
+EXPORT_JOB_CONCURRENCY = int(os.environ.get('EXPORT_JOB_CONCURRENCY', '2'))
+EXPORT_JOB_LEASE_SECONDS = float(os.environ.get('EXPORT_JOB_LEASE_SECONDS', '60'))
+EXPORT_RETENTION_HOURS = float(os.environ.get('EXPORT_RETENTION_HOURS', '24'))
+SCHEMA_UPGRADE_BATCH_SIZE = int(os.environ.get('SCHEMA_UPGRADE_BATCH_SIZE', '500'))
+SCHEMA_UPGRADE_PAUSE_SECONDS = float(os.environ.get('SCHEMA_UPGRADE_PAUSE_SECONDS', '0.05'))
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', '0'))
+SLOW_QUERY_EXPLAIN = os.environ.get('SLOW_QUERY_EXPLAIN', 'true').lower() == 'true'
+SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS = float(os.environ.get('SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS', '60'))
+SLOW_QUERY_LOG_MAX_BYTES = int(os.environ.get('SLOW_QUERY_LOG_MAX_BYTES', str(16 * 1024 * 1024)))
+COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'true').lower() == 'true'
+COMPRESSION_MIN_BYTES = int(os.environ.get('COMPRESSION_MIN_BYTES', '1024'))
+COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', '6'))
+COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', '4'))
+COMPRESSION_ROUTE_LEVELS = {**COMPRESSION_ROUTE_DEFAULTS, **parse_route_levels(os.environ.get('COMPRESSION_ROUTE_LEVELS', ''))}
+
 app = FastAPI()
 api_router = APIRouter(prefix="/api")
 
@@ -208,6 +937,13 @@ class IMEIScan(BaseModel):
     organization: str
     vendor: Optional[str] = None
 
+class IMEIBulkScan(BaseModel):
+    imeis: List[str]
+    action: str
+    location: str
+    organization: str
+    vendor: Optional[str] = None
+
 class LogisticsShipment(BaseModel):
     model_config = ConfigDict(extra="ignore")
     shipment_id: str
@@ -303,6 +1039,26 @@ class SalesOrderCreate(BaseModel):
     total_amount: float
     imei_list: List[str]
 
+class ExportJobCreate(BaseModel):
+    report: str  # 'master' or 'inventory'
+    format: str = "xlsx"  # 'xlsx' or 'csv'
+
+class ReportJob(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    job_id: str
+    report: str
+    format: str
+    status: str  # 'queued', 'running', 'completed', 'failed' or 'expired'
+    rows_written: int = 0
+    header_rows: Optional[int] = None  # set on completion; the file has header_rows + rows_written rows
+    file_name: Optional[str] = None
+    file_size: Optional[int] = None
+    error: Optional[str] = None
+    created_by: str
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
 class AuditLog(BaseModel):
     model_config = ConfigDict(extra="ignore")
     log_id: str
@@ -315,11 +1071,88 @@ class AuditLog(BaseModel):
     timestamp: datetime
 
 # Helper Functions
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+class LatencyStats:
+    """Count/mean/max plus p50/p99 over the most recent samples (milliseconds)"""
+    def __init__(self, window: int = 1024):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self._recent = deque(maxlen=window)
+    
+    def record(self, elapsed_ms: float):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self._recent.append(elapsed_ms)
+    
+    def stats(self) -> dict:
+        recent = sorted(self._recent)
+        def pct(p):
+            return round(recent[min(len(recent) - 1, int(p * len(recent)))], 2) if recent else 0.0
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 2) if self.count else 0.0,
+            "p50_ms": pct(0.50),
+            "p99_ms": pct(0.99),
+            "max_ms": round(self.max_ms, 2)
+        }
 
-def verify_password(plain: str, hashed: str) -> bool:
-    return pwd_context.verify(plain, hashed)
+class PasswordHasher:
+    """Runs bcrypt on a bounded thread pool so it never blocks the event loop.
+
+    At most `workers` hashes run at once; further callers wait their turn and
+    are counted as queued.
+    """
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._slots = asyncio.Semaphore(workers)
+        self.queued = 0
+        self.peak_queued = 0
+        self.running = 0
+        self.hash_latency = LatencyStats()
+        self.verify_latency = LatencyStats()
+    
+    async def _run(self, latency: LatencyStats, fn, *args):
+        self.queued += 1
+        self.peak_queued = max(self.peak_queued, self.queued)
+        async with self._slots:
+            self.queued -= 1
+            self.running += 1
+            started = time.perf_counter()
+            try:
+                return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+            finally:
+                latency.record((time.perf_counter() - started) * 1000)
+                self.running -= 1
+    
+    async def hash(self, password: str) -> str:
+        return await self._run(self.hash_latency, pwd_context.hash, password)
+    
+    async def verify(self, plain: str, hashed: str) -> bool:
+        return await self._run(self.verify_latency, pwd_context.verify, plain, hashed)
+    
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+    
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "running": self.running,
+            "queued": self.queued,
+            "peak_queued": self.peak_queued,
+            "hash_latency": self.hash_latency.stats(),
+            "verify_latency": self.verify_latency.stats()
+        }
+
+password_hasher = PasswordHasher(PASSWORD_HASH_WORKERS)
+login_latency = LatencyStats()
+
+async def hash_password(password: str) -> str:
+    return await password_hasher.hash(password)
+
+async def verify_password(plain: str, hashed: str) -> bool:
+    return await password_hasher.verify(plain, hashed)
 
 def create_token(user_id: str, email: str) -> str:
     payload = {
@@ -329,23 +1162,87 @@ def create_token(user_id: str, email: str) -> str:
     }
     return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
 
+class TTLCache:
+    """In-process LRU cache whose entries expire `ttl` seconds after being set"""
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+        self.misses += 1
+        return None
+    
+    def set(self, key, value):
+        self._entries[key] = (value, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def invalidate(self, key):
+        self._entries.pop(key, None)
+    
+    def clear(self):
+        self._entries.clear()
+    
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl
+        }
+
+# Resolved users keyed by token subject (user_id)
+user_cache = TTLCache(USER_CACHE_TTL_SECONDS, USER_CACHE_MAX_ENTRIES)
+
+def invalidate_user(user_id: str):
+    """Drop a cached user; call after any change to or deletion of the user document"""
+    user_cache.invalidate(user_id)
+
+# Resolved /inventory/lookup results keyed by IMEI, including "not found" answers.
+# Other workers only see a write once their entry expires, so the TTL stays short.
+imei_lookup_cache = TTLCache(IMEI_LOOKUP_CACHE_TTL_SECONDS, IMEI_LOOKUP_CACHE_MAX_ENTRIES)
+
+def invalidate_imei_lookups(imeis):
+    """Drop cached lookups; call after any inventory or procurement write touching these IMEIs"""
+    for imei in imeis:
+        imei_lookup_cache.invalidate(imei)
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     try:
         token = credentials.credentials
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id = payload.get("sub")
-        user = await db.users.find_one({"user_id": user_id}, {"_id": 0})
-        if not user:
-            raise HTTPException(status_code=401, detail="User not found")
-        return User(**user)
+        user = user_cache.get(user_id)
+        if user is None:
+            user_doc = await db.users.find_one({"user_id": user_id}, {"_id": 0})
+            if not user_doc:
+                raise HTTPException(status_code=401, detail="User not found")
+            user = User(**user_doc)
+            user_cache.set(user_id, user)
+        return user
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expired")
     except Exception:
         raise HTTPException(status_code=401, detail="Invalid token")
 
-async def create_audit_log(action: str, entity_type: str, entity_id: str, user: User, details: dict):
+def build_audit_log(action: str, entity_type: str, entity_id: str, user: User, details: dict) -> dict:
     from uuid import uuid4
-    log = {
+    return {
         "log_id": str(uuid4()),
         "action": action,
         "entity_type": entity_type,
@@ -353,9 +1250,594 @@ async def create_audit_log(action: str, entity_type: str, entity_id: str, user:
         "user_id": user.user_id,
         "user_name": user.name,
         "details": details,
-        "timestamp": datetime.now(timezone.utc).isoformat()
+        "timestamp": datetime.now(timezone.utc)
+    }
+
+class AuditLogWriter:
+    """Queues audit entries and writes them with insert_many off the request path.
+
+    A batch is flushed once `batch_size` entries are waiting or `flush_interval`
+    seconds after its first entry. The queue is bounded, so callers wait when
+    MongoDB falls behind. With `wal_path` set, entries are appended to a local
+    JSON-lines file before being queued and replayed on startup; the unique
+    log_id index makes replaying already-written entries harmless.
+    
+    Each process writes its own `<wal_path>.<host>.<pid>` file and holds an
+    exclusive flock on it while running, so with several workers one worker's
+    truncate never drops another's unflushed entries. replay_wal picks up every
+    file under the prefix whose lock is free, i.e. whose owner has exited.
+    """
+    def __init__(self, batch_size: int, flush_interval: float, max_queued: int, wal_path: Optional[str] = None):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.wal_prefix = Path(wal_path) if wal_path else None
+        self.wal_path = self.wal_prefix.with_name(f"{self.wal_prefix.name}.{socket.gethostname()}.{os.getpid()}") if wal_path else None
+        self._queue = asyncio.Queue(maxsize=max_queued)
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self._wal = None
+        self._wal_clean = True
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+        self.flush_latency = LatencyStats()
+    
+    def start(self):
+        if self._task is None or self._task.done():
+            if self.wal_path and self._wal is None:
+                self.wal_path.parent.mkdir(parents=True, exist_ok=True)
+                self._wal = open(self.wal_path, "a", encoding="utf-8")
+                # Held until the file is closed; replay_wal on other workers skips locked files
+                fcntl.flock(self._wal, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            self._task = asyncio.create_task(self._run())
+    
+    async def put(self, entry: dict):
+        self.start()
+        if self._wal:
+            self._wal.write(json_util.dumps(entry) + "\n")
+            self._wal.flush()
+        await self._queue.put(entry)
+        if self._queue.qsize() >= self.batch_size:
+            self._wakeup.set()
+    
+    async def put_many(self, entries: List[dict]):
+        for entry in entries:
+            await self.put(entry)
+    
+    async def flush(self):
+        """Wait until every entry queued so far is written"""
+        if self._task is None:
+            return
+        self._wakeup.set()
+        await self._queue.join()
+    
+    async def stop(self):
+        await self.flush()
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        if self._wal:
+            self._wal.close()
+            self._wal = None
+    
+    def _drain_into(self, batch: list):
+        while len(batch) < self.batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+    
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            self._drain_into(batch)
+            if len(batch) < self.batch_size and not self._wakeup.is_set():
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._drain_into(batch)
+            self._wakeup.clear()
+            try:
+                written = await self._write(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if self._wal and self._queue.empty():
+                if written and not self._wal_clean:
+                    # MongoDB is taking writes again: re-insert everything since the last truncate,
+                    # including the entries of the failed batches
+                    await self._rewrite_wal()
+                if self._wal_clean and self._queue.empty():
+                    # Everything in the WAL has reached MongoDB
+                    self._wal.truncate(0)
+    
+    async def _write(self, batch: List[dict]) -> bool:
+        """Insert a batch; True when every entry reached MongoDB (duplicates included)"""
+        started = time.perf_counter()
+        try:
+            await db.audit_logs.insert_many(batch, ordered=False)
+            self.written += len(batch)
+            return True
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            duplicates = sum(1 for error in errors if error.get("code") == 11000)
+            self.written += len(batch) - len(errors)
+            self.failed += len(errors) - duplicates
+            if len(errors) > duplicates:
+                self._wal_clean = False
+                logger.error(f"Audit log batch lost {len(errors) - duplicates} of {len(batch)} entries: {errors[0].get('errmsg')}")
+                return False
+            return True
+        except Exception as e:
+            self.failed += len(batch)
+            self._wal_clean = False
+            logger.error(f"Audit log batch of {len(batch)} entries failed: {e}")
+            return False
+        finally:
+            self.batches += 1
+            self.flush_latency.record((time.perf_counter() - started) * 1000)
+    
+    async def replay_wal(self) -> int:
+        """Re-insert entries left by processes that exited without flushing, then delete their WAL files.
+
+        The bare prefix is a WAL from before files were per process. Files
+        whose lock is held belong to a running worker and are left alone; a
+        file that could not be fully replayed is kept for the next startup.
+        """
+        if not self.wal_prefix:
+            return 0
+        replayed = 0
+        for path in [self.wal_prefix, *sorted(self.wal_prefix.parent.glob(f"{self.wal_prefix.name}.*"))]:
+            if not path.is_file():
+                continue
+            with open(path, "a", encoding="utf-8") as f:
+                try:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue
+                replayed += await self._rewrite_wal(path)
+                if self._wal_clean:
+                    path.unlink(missing_ok=True)
+        return replayed
+    
+    async def _rewrite_wal(self, path: Optional[Path] = None) -> int:
+        """Insert every entry in a WAL file (this process's by default) again; _wal_clean says whether all of them made it"""
+        self._wal_clean = True
+        entries = []
+        with open(path or self.wal_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entries.append(json_util.loads(line))
+                except ValueError:
+                    logger.warning(f"Skipping unreadable audit WAL line: {line[:80]!r}")
+        for start in range(0, len(entries), self.batch_size):
+            await self._write(entries[start:start + self.batch_size])
+        return len(entries)
+    
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "max_queued": self._queue.maxsize,
+            "written": self.written,
+            "failed": self.failed,
+            "batches": self.batches,
+            "wal": str(self.wal_path) if self.wal_path else None,
+            "wal_clean": self._wal_clean,
+            "flush_latency": self.flush_latency.stats()
+        }
+
+audit_writer = AuditLogWriter(AUDIT_LOG_BATCH_SIZE, AUDIT_LOG_FLUSH_INTERVAL_SECONDS, AUDIT_LOG_QUEUE_SIZE, AUDIT_LOG_WAL_PATH or None)
+
+async def create_audit_log(action: str, entity_type: str, entity_id: str, user: User, details: dict):
+    await audit_writer.put(build_audit_log(action, entity_type, entity_id, user, details))
+
+async def create_audit_logs(logs: List[dict]):
+    """Queue a batch of entries built with build_audit_log"""
+    await audit_writer.put_many(logs)
+
+# Slow query log: Mongo commands slower than SLOW_QUERY_MS, with the route that issued them
+# and an explain("executionStats") plan, kept in the capped slow_queries collection.
+EXPLAINABLE_COMMANDS = {"find", "aggregate", "count", "distinct", "update", "delete", "findAndModify"}
+# Session / cluster fields the driver adds that explain rejects or that don't belong in the log
+COMMAND_META_FIELDS = {"lsid", "$db", "$clusterTime", "$readPreference", "txnNumber", "startTransaction", "autocommit", "writeConcern", "readConcern"}
+COMMAND_SHAPE_FIELDS = ["filter", "sort", "projection", "hint", "limit", "skip", "pipeline", "query", "key", "update", "updates", "deletes"]
+LOGGED_ARRAY_ITEMS = 20
+
+def truncate_for_log(value):
+    """Cap long arrays ($in lists, bulk statements) so one entry stays small"""
+    if isinstance(value, dict):
+        return {k: truncate_for_log(v) for k, v in value.items()}
+    if isinstance(value, list):
+        items = [truncate_for_log(v) for v in value[:LOGGED_ARRAY_ITEMS]]
+        if len(value) > LOGGED_ARRAY_ITEMS:
+            items.append(f"... {len(value) - LOGGED_ARRAY_ITEMS} more")
+        return items
+    return value
+
+def query_shape(value):
+    """The value with every leaf replaced, so queries differing only in values compare equal"""
+    if isinstance(value, dict):
+        return {k: query_shape(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [query_shape(value[0])] if value else []
+    return 1
+
+def explain_command(command_name: str, command: dict) -> dict:
+    explained = {k: v for k, v in command.items() if k not in COMMAND_META_FIELDS}
+    # Write commands carry a batch of statements; the first one stands for the batch
+    for statements in ("updates", "deletes"):
+        if statements in explained:
+            explained[statements] = explained[statements][:1]
+    return {"explain": explained, "verbosity": "executionStats"}
+
+def plan_summary(explain: dict) -> dict:
+    """Stages, indexes and examined / returned counts from an explain result"""
+    if "queryPlanner" not in explain and explain.get("stages"):
+        # Aggregations that aren't fully pushed down report the query under the first stage
+        explain = explain["stages"][0].get("$cursor", {})
+    winning = explain.get("queryPlanner", {}).get("winningPlan", {})
+    winning = winning.get("queryPlan", winning)
+    stages, indexes, pending = [], [], [winning]
+    while pending:
+        stage = pending.pop()
+        if "stage" in stage:
+            stages.append(stage["stage"])
+        if "indexName" in stage:
+            indexes.append(stage["indexName"])
+        pending.extend(stage.get("inputStages", []))
+        if "inputStage" in stage:
+            pending.append(stage["inputStage"])
+    stats = explain.get("executionStats", {})
+    return {
+        "stages": stages,
+        "indexes": indexes,
+        "collscan": "COLLSCAN" in stages,
+        "returned": stats.get("nReturned"),
+        "keys_examined": stats.get("totalKeysExamined"),
+        "docs_examined": stats.get("totalDocsExamined"),
+        "execution_ms": stats.get("executionTimeMillis")
     }
-    await db.audit_logs.insert_one(log)
+
+class SlowQueryLog:
+    """Records slow Mongo commands reported by the command listener.
+
+    The listener runs on Motor's executor threads, so captures are handed to
+    the event loop and written by a background task: explain the command
+    (at most once per query shape per `explain_interval` seconds, since
+    executionStats re-runs the query) and insert the entry into slow_queries.
+    The hand-off queue is bounded and drops entries rather than block a query.
+    """
+    def __init__(self, threshold_ms: float, explain: bool, explain_interval: float, max_queued: int = 1000):
+        self.threshold_ms = threshold_ms
+        self.explain = explain
+        self.explain_interval = explain_interval
+        self.max_queued = max_queued
+        self._loop = None
+        self._queue = None
+        self._task = None
+        self._explained = {}
+        self.captured = 0
+        self.dropped = 0
+        self.written = 0
+    
+    @property
+    def enabled(self) -> bool:
+        return self.threshold_ms > 0
+    
+    def start(self):
+        if not self.enabled or self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.max_queued)
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+            self._loop = None
+    
+    def capture(self, database: str, collection: str, command_name: str, command: dict, duration_ms: float, request: Optional[RequestMetrics]):
+        """Called from the command listener on any thread"""
+        if self._loop is None or command_name not in EXPLAINABLE_COMMANDS or collection in ("", "slow_queries"):
+            return
+        entry = {
+            "timestamp": datetime.now(timezone.utc),
+            "database": database,
+            "collection": collection,
+            "command": command_name,
+            "duration_ms": round(duration_ms, 2),
+            "route": request.route if request else None,
+            "method": request.scope["method"] if request else None
+        }
+        self._loop.call_soon_threadsafe(self._enqueue, entry, command)
+    
+    def _enqueue(self, entry: dict, command: dict):
+        try:
+            self._queue.put_nowait((entry, command))
+            self.captured += 1
+        except asyncio.QueueFull:
+            self.dropped += 1
+    
+    async def _run(self):
+        while True:
+            entry, command = await self._queue.get()
+            try:
+                await self._write(entry, command)
+            except Exception:
+                logger.exception("Could not record slow query")
+    
+    async def _write(self, entry: dict, command: dict):
+        for field in COMMAND_SHAPE_FIELDS:
+            if field in command:
+                entry[field] = truncate_for_log(command[field])
+        predicate = {field: entry[field] for field in ("filter", "query", "pipeline", "updates", "deletes") if field in entry}
+        shape = json_util.dumps([entry["collection"], entry["command"], query_shape(predicate)], sort_keys=True)
+        now = time.monotonic()
+        if not self.explain:
+            entry["plan"] = None
+            entry["plan_skipped"] = "explain disabled"
+        elif now - self._explained.get(shape, float("-inf")) < self.explain_interval:
+            entry["plan"] = None
+            entry["plan_skipped"] = "explained recently"
+        else:
+            self._explained[shape] = now
+            try:
+                result = await client[entry["database"]].command(explain_command(entry["command"], command))
+                entry["plan"] = plan_summary(result)
+            except Exception as e:
+                entry["plan"] = None
+                entry["plan_error"] = str(e)
+        await db.slow_queries.insert_one(entry)
+        self.written += 1
+    
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "threshold_ms": self.threshold_ms,
+            "captured": self.captured,
+            "dropped": self.dropped,
+            "written": self.written,
+            "queued": self._queue.qsize() if self._queue else 0
+        }
+
+slow_query_log = SlowQueryLog(SLOW_QUERY_MS, SLOW_QUERY_EXPLAIN, SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS)
+
+async def ensure_slow_query_collection():
+    """Create slow_queries as a capped collection so the log can't grow without bound"""
+    if not slow_query_log.enabled:
+        return
+    existing = await db.list_collection_names(filter={"name": "slow_queries"})
+    if not existing:
+        await db.create_collection("slow_queries", capped=True, size=SLOW_QUERY_LOG_MAX_BYTES)
+        return
+    options = await db.slow_queries.options()
+    if not options.get("capped"):
+        logger.warning("slow_queries exists and is not capped; drop it to let the server recreate it capped")
+
+# Document number sequences: name -> (collection, number field, prefix, zero-padded width)
+SEQUENCES = {
+    "purchase_orders": ("purchase_orders", "po_number", "PO-MAG-", 5),
+    "invoices": ("invoices", "invoice_number", "INV-", 6),
+    "sales_orders": ("sales_orders", "so_number", "SO-MAG-", 5),
+}
+
+class SequenceAllocator:
+    """Allocates document numbers from the counters collection with an atomic $inc.
+
+    With a block size above 1 each worker reserves a block of numbers per round
+    trip and hands them out locally, so numbers never collide but can leave gaps
+    and interleave across workers.
+    """
+    def __init__(self, block_size: int):
+        self.block_size = max(1, block_size)
+        self._blocks = {}
+        self._lock = asyncio.Lock()
+    
+    async def next(self, name: str) -> int:
+        async with self._lock:
+            start, end = self._blocks.get(name, (0, 0))
+            if start >= end:
+                counter = await db.counters.find_one_and_update(
+                    {"_id": name},
+                    {"$inc": {"seq": self.block_size}},
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER
+                )
+                end = counter["seq"] + 1
+                start = end - self.block_size
+            self._blocks[name] = (start + 1, end)
+            return start
+
+sequence_allocator = SequenceAllocator(SEQUENCE_BLOCK_SIZE)
+
+async def next_document_number(name: str) -> str:
+    _, _, prefix, width = SEQUENCES[name]
+    return f"{prefix}{await sequence_allocator.next(name):0{width}d}"
+
+async def seed_sequences():
+    """Move each counter past the highest number already issued (idempotent via $max)"""
+    for name, (collection, field, prefix, _) in SEQUENCES.items():
+        result = await db[collection].aggregate([
+            {"$match": {field: {"$regex": f"^{prefix}[0-9]+$"}}},
+            {"$group": {"_id": None, "max": {"$max": {"$toLong": {"$substrCP": [f"${field}", len(prefix), 20]}}}}}
+        ]).to_list(1)
+        highest = result[0]["max"] if result else 0
+        await db.counters.update_one({"_id": name}, {"$max": {"seq": highest}}, upsert=True)
+
+# Pagination
+DEFAULT_PAGE_LIMIT = 500
+MAX_PAGE_LIMIT = 5000
+
+def encode_cursor(sort_value, tiebreaker) -> str:
+    if isinstance(sort_value, datetime):
+        sort_value = {"$date": sort_value.isoformat()}
+    raw = json.dumps([sort_value, tiebreaker], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, tiebreaker = json.loads(base64.urlsafe_b64decode(padded))
+        if isinstance(sort_value, dict):
+            sort_value = datetime.fromisoformat(sort_value["$date"])
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return sort_value, tiebreaker
+
+async def fetch_page(collection, query: dict, sort_field: str, id_field: str, limit: int, cursor: Optional[str], response: Response, *, projection: Optional[dict] = None, direction: int = -1, with_total: bool = False) -> List[dict]:
+    """Fetch one page keyed on (sort_field, id_field), newest first unless direction is 1.
+
+    The next page's cursor is returned in the X-Next-Cursor header and is
+    absent on the last page, so the body stays a plain list. with_total also
+    counts every match of `query` into X-Total-Count.
+    """
+    legacy_dates = collection.name in legacy_date_collections
+    if legacy_dates:
+        query = legacy_date_query(collection.name, query)
+    page_query = query
+    if cursor:
+        last_value, last_id = decode_cursor(cursor)
+        past = "$lt" if direction < 0 else "$gt"
+        # Documents without the sort field sort before every value: last when descending, first when ascending
+        if last_value is None:
+            after = [{sort_field: None, id_field: {past: last_id}}]
+            if direction > 0:
+                after.append({sort_field: {"$ne": None}})
+        else:
+            after = [
+                {sort_field: {past: last_value}},
+                {sort_field: last_value, id_field: {past: last_id}}
+            ]
+            if direction < 0:
+                after.append({sort_field: None})
+        if legacy_dates and sort_field in DATE_FIELDS[collection.name]:
+            # Strings sort below dates: descending, every string comes after the last date; ascending, every date after the last string
+            if direction < 0 and isinstance(last_value, datetime):
+                after.append({sort_field: {"$type": "string"}})
+            elif direction > 0 and isinstance(last_value, str):
+                after.append({sort_field: {"$type": "date"}})
+        page_query = {"$and": [query, {"$or": after}]}
+    
+    find = collection.find(page_query, projection or {"_id": 0}).sort([(sort_field, direction), (id_field, direction)]).limit(limit + 1).to_list(limit + 1)
+    if with_total:
+        docs, total = await asyncio.gather(find, collection.count_documents(query))
+        response.headers["X-Total-Count"] = str(total)
+    else:
+        docs = await find
+    response.headers["X-Page-Limit"] = str(limit)
+    if len(docs) > limit:
+        docs = docs[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(docs[-1].get(sort_field), docs[-1].get(id_field))
+    return docs
+
+def parse_sort(sort: str, allowed: List[str]) -> tuple:
+    """'field' sorts ascending and '-field' descending; only fields in `allowed`"""
+    field = sort.lstrip("-")
+    if field not in allowed:
+        raise HTTPException(status_code=400, detail=f"Cannot sort by '{field}'; use one of: {', '.join(allowed)}")
+    return field, -1 if sort.startswith("-") else 1
+
+def parse_date_param(name: str, value: str) -> datetime:
+    parsed = parse_date_string(value)
+    if parsed is None:
+        raise HTTPException(status_code=400, detail=f"{name} must be an ISO date or datetime")
+    return parsed
+
+def list_query(equals: dict, date_field: Optional[str] = None, date_from: Optional[str] = None, date_to: Optional[str] = None,
+               prefix_field: Optional[str] = None, prefix: Optional[str] = None, q: Optional[str] = None) -> dict:
+    """Mongo filter for the list endpoints' query parameters; None values are ignored.
+
+    A bare date_to (no time) includes that whole day. prefix is an anchored,
+    case-sensitive regex so it can use the field's index, and q is a $text
+    search against the collection's text index.
+    """
+    query = {field: value for field, value in equals.items() if value is not None}
+    if date_from or date_to:
+        bounds = {}
+        if date_from:
+            bounds["$gte"] = parse_date_param("date_from", date_from)
+        if date_to:
+            end = parse_date_param("date_to", date_to)
+            if "T" in date_to:
+                bounds["$lte"] = end
+            else:
+                bounds["$lt"] = end + timedelta(days=1)
+        query[date_field] = bounds
+    if prefix:
+        query[prefix_field] = {"$regex": f"^{re.escape(prefix)}"}
+    if q:
+        query["$text"] = {"$search": q}
+    return query
+
+# Fast list responses
+class TrustedSchema:
+    """Projection and defaults taken from a response model.
+
+    Documents written through the API were validated on the way in, so list
+    endpoints can serve them as stored: Mongo returns only the model's fields,
+    missing optional fields get the model default and the rows go straight to
+    orjson with no per-row model construction or response_model validation.
+    """
+    
+    def __init__(self, model):
+        self.projection = {"_id": 0, **{name: 1 for name in model.model_fields}}
+        self.defaults = {
+            name: field.get_default(call_default_factory=True)
+            for name, field in model.model_fields.items() if not field.is_required()
+        }
+    
+    def response(self, docs: List[dict], response: Response) -> Response:
+        # A returned Response bypasses the injected one, so carry its headers over (pagination cursor etc.)
+        headers = {k: v for k, v in response.headers.items() if k != "content-length"}
+        body = orjson.dumps([{**self.defaults, **doc} for doc in docs], option=orjson.OPT_UTC_Z)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+async def fetch_fast_page(collection, schema: TrustedSchema, query: dict, sort_field: str, id_field: str, limit: int, cursor: Optional[str], response: Response, **page_options) -> Response:
+    docs = await fetch_page(collection, query, sort_field, id_field, limit, cursor, response, projection=schema.projection, **page_options)
+    return schema.response(docs, response)
+
+# Conditional GETs: collection_versions keeps one counter per collection, bumped by the write
+# handlers once their write has completed. Reads over those collections carry a weak ETag built
+# from the counters and the request's path and query, and a matching If-None-Match is answered
+# 304 before any document is read.
+VERSIONED_COLLECTIONS = ["purchase_orders", "imei_inventory", "payments", "logistics_shipments"]
+
+async def bump_collection_versions(*collections: str):
+    """Call after the write, never before: a reader that sees the new version must also see the write"""
+    from uuid import uuid4
+    await db.collection_versions.bulk_write([
+        # A fresh epoch if the counter document is ever lost, so restarted counters can't repeat old ETags
+        UpdateOne({"_id": name}, {"$inc": {"version": 1}, "$setOnInsert": {"epoch": uuid4().hex[:8]}}, upsert=True)
+        for name in collections
+    ], ordered=False)
+
+async def collection_etag(request: Request, collections: tuple) -> str:
+    versions = {
+        doc["_id"]: f"{doc.get('epoch', '')}.{doc.get('version', 0)}"
+        for doc in await db.collection_versions.find({"_id": {"$in": list(collections)}}).to_list(None)
+    }
+    stamp = "-".join(versions.get(name, "0") for name in collections)
+    request_key = json.dumps([SCHEMA_VERSION, request.url.path, sorted(request.query_params.multi_items())])
+    return f'W/"{stamp}-{hashlib.sha1(request_key.encode()).hexdigest()[:16]}"'
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison against each listed tag; '*' is not honoured, so it never yields a 304"""
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+async def not_modified(request: Request, response: Response, *collections: str) -> Optional[Response]:
+    """A 304 when If-None-Match is current; otherwise None, with the ETag set on `response`.
+
+    Called before the handler reads any documents, so a write landing in
+    between can only make the ETag older than the body, never newer.
+    """
+    etag = await collection_etag(request, collections)
+    # Browsers keep the body and revalidate on every use
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("If-None-Match", ""), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
 
 # Auth Endpoints
 @api_router.post("/auth/register", response_model=TokenResponse)
@@ -369,11 +1851,11 @@ async def register(user_data: UserCreate):
     user_doc = {
         "user_id": user_id,
         "email": user_data.email,
-        "password": hash_password(user_data.password),
+        "password": await hash_password(user_data.password),
         "name": user_data.name,
         "organization": user_data.organization,
         "role": user_data.role,
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc)
     }
     
     await db.users.insert_one(user_doc)
@@ -384,20 +1866,85 @@ async def register(user_data: UserCreate):
 
 @api_router.post("/auth/login", response_model=TokenResponse)
 async def login(credentials: UserLogin):
-    user = await db.users.find_one({"email": credentials.email})
-    if not user or not verify_password(credentials.password, user["password"]):
-        raise HTTPException(status_code=401, detail="Invalid credentials")
-    
-    user_data = {k: v for k, v in user.items() if k not in ["_id", "password"]}
-    user_obj = User(**user_data)
-    token = create_token(user["user_id"], user["email"])
-    
-    return TokenResponse(access_token=token, user=user_obj)
+    started = time.perf_counter()
+    try:
+        user = await db.users.find_one({"email": credentials.email})
+        if not user or not await verify_password(credentials.password, user["password"]):
+            raise HTTPException(status_code=401, detail="Invalid credentials")
+        
+        user_data = {k: v for k, v in user.items() if k not in ["_id", "password"]}
+        user_obj = User(**user_data)
+        token = create_token(user["user_id"], user["email"])
+        
+        return TokenResponse(access_token=token, user=user_obj)
+    finally:
+        login_latency.record((time.perf_counter() - started) * 1000)
 
 @api_router.get("/auth/me", response_model=User)
 async def get_me(current_user: User = Depends(get_current_user)):
     return current_user
 
+@api_router.get("/admin/indexes")
+async def get_index_report(current_user: User = Depends(get_current_user)):
+    """Missing, unregistered and unused indexes per collection"""
+    if current_user.role != "Admin":
+        raise HTTPException(status_code=403, detail="Only Admin can view indexes")
+    
+    return await index_usage_report()
+
+@api_router.get("/admin/schema-migrations")
+async def get_schema_migrations(current_user: User = Depends(get_current_user)):
+    """Legacy document upgrade checkpoints per collection"""
+    if current_user.role != "Admin":
+        raise HTTPException(status_code=403, detail="Only Admin can view schema migrations")
+    
+    checkpoints = await db.schema_migrations.find({}, {"last_id": 0}).to_list(None)
+    return {
+        "schema_version": SCHEMA_VERSION,
+        "running": schema_upgrade_task is not None and not schema_upgrade_task.done(),
+        "collections": {c.pop("_id"): c for c in checkpoints},
+        "date_migration": {
+            "running": date_migration_task is not None and not date_migration_task.done(),
+            "pending": sorted(legacy_date_collections)
+        }
+    }
+
+@api_router.get("/admin/slow-queries")
+async def get_slow_queries(limit: int = Query(100, ge=1, le=1000), collection: Optional[str] = None, route: Optional[str] = None, collscan: bool = False, current_user: User = Depends(get_current_user)):
+    """Most recent slow Mongo commands, newest first"""
+    if current_user.role != "Admin":
+        raise HTTPException(status_code=403, detail="Only Admin can view slow queries")
+    
+    query = {}
+    if collection:
+        query["collection"] = collection
+    if route:
+        query["route"] = route
+    if collscan:
+        query["plan.collscan"] = True
+    entries = await db.slow_queries.find(query, {"_id": 0}).sort("$natural", -1).limit(limit).to_list(limit)
+    for entry in entries:
+        # Captured commands keep their BSON values (dates, ObjectIds); relaxed extended JSON keeps them readable
+        for field in COMMAND_SHAPE_FIELDS:
+            if field in entry:
+                entry[field] = json.loads(json_util.dumps(entry[field], json_options=json_util.RELAXED_JSON_OPTIONS))
+    return {"slow_query_log": slow_query_log.stats(), "entries": entries}
+
+@api_router.get("/admin/stats")
+async def get_admin_stats(current_user: User = Depends(get_current_user)):
+    """In-process cache and auth counters for this worker"""
+    if current_user.role != "Admin":
+        raise HTTPException(status_code=403, detail="Only Admin can view stats")
+    
+    return {
+        "user_cache": user_cache.stats(),
+        "imei_lookup_cache": imei_lookup_cache.stats(),
+        "password_hashing": password_hasher.stats(),
+        "login_latency": login_latency.stats(),
+        "audit_log": audit_writer.stats(),
+        "slow_query_log": slow_query_log.stats()
+    }
+
 # Purchase Order Endpoints
 @api_router.post("/purchase-orders", response_model=PurchaseOrder)
 async def create_purchase_order(po_data: POCreate, current_user: User = Depends(get_current_user)):
@@ -405,18 +1952,7 @@ async def create_purchase_order(po_data: POCreate, current_user: User = Depends(
     if current_user.organization != "Magnova":
         raise HTTPException(status_code=403, detail="Only Magnova can create POs")
     
-    # Generate unique PO number and check for duplicates
-    po_count = await db.purchase_orders.count_documents({}) + 1
-    po_number = f"PO-MAG-{po_count:05d}"
-    
-    # Check if PO number already exists (shouldn't happen but safety check)
-    existing_po = await db.purchase_orders.find_one({"po_number": po_number})
-    if existing_po:
-        # Find next available number
-        while existing_po:
-            po_count += 1
-            po_number = f"PO-MAG-{po_count:05d}"
-            existing_po = await db.purchase_orders.find_one({"po_number": po_number})
+    po_number = await next_document_number("purchase_orders")
     
     # Calculate totals from items
     total_quantity = sum(item.qty for item in po_data.items)
@@ -428,7 +1964,7 @@ async def create_purchase_order(po_data: POCreate, current_user: User = Depends(
     po_doc = {
         "po_id": str(uuid4()),
         "po_number": po_number,
-        "po_date": po_data.po_date.isoformat() if isinstance(po_data.po_date, datetime) else po_data.po_date,
+        "po_date": po_data.po_date,
         "purchase_office": po_data.purchase_office,
         "created_by": current_user.user_id,
         "created_by_name": current_user.name,
@@ -442,61 +1978,56 @@ async def create_purchase_order(po_data: POCreate, current_user: User = Depends(
         "approved_by": None,
         "approved_at": None,
         "rejection_reason": None,
-        "created_at": datetime.now(timezone.utc).isoformat(),
-        "updated_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc),
+        "updated_at": datetime.now(timezone.utc),
+        "schema_version": SCHEMA_VERSION
     }
     
     await db.purchase_orders.insert_one(po_doc)
+    await bump_collection_versions("purchase_orders")
+    await adjust_dashboard_stats(total_pos=1, pending_pos=1)
     await create_audit_log("CREATE", "PurchaseOrder", po_number, current_user, {"total_quantity": total_quantity, "total_value": total_value})
     
     return PurchaseOrder(**{k: v for k, v in po_doc.items() if k != "_id"})
 
+PO_SORT_FIELDS = ["created_at", "po_date", "po_number", "total_value"]
+
 @api_router.get("/purchase-orders", response_model=List[PurchaseOrder])
-async def get_purchase_orders(current_user: User = Depends(get_current_user)):
-    pos = await db.purchase_orders.find({}, {"_id": 0}).sort("created_at", -1).to_list(1000)
-    for po in pos:
-        if isinstance(po.get('created_at'), str):
-            po['created_at'] = datetime.fromisoformat(po['created_at'])
-        if isinstance(po.get('updated_at'), str):
-            po['updated_at'] = datetime.fromisoformat(po['updated_at'])
-        if po.get('approved_at') and isinstance(po['approved_at'], str):
-            po['approved_at'] = datetime.fromisoformat(po['approved_at'])
-        if po.get('po_date') and isinstance(po['po_date'], str):
-            po['po_date'] = datetime.fromisoformat(po['po_date'])
-        # Ensure backward compatibility for old POs without new fields
-        if 'po_date' not in po:
-            po['po_date'] = po.get('created_at')
-        if 'purchase_office' not in po:
-            po['purchase_office'] = 'Magnova Head Office'
-        if 'total_value' not in po:
-            po['total_value'] = 0.0
-        if 'items' not in po:
-            po['items'] = []
-    return [PurchaseOrder(**po) for po in pos]
+async def get_purchase_orders(
+    request: Request,
+    response: Response,
+    status: Optional[str] = None,
+    approval_status: Optional[str] = None,
+    vendor: Optional[str] = None,
+    po_number: Optional[str] = Query(None, description="PO number prefix"),
+    date_from: Optional[str] = Query(None, description="po_date on or after"),
+    date_to: Optional[str] = Query(None, description="po_date on or before"),
+    q: Optional[str] = Query(None, description="Text search over PO number, office, notes and line item vendor / brand / model"),
+    sort: str = "-created_at",
+    limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    cached = await not_modified(request, response, "purchase_orders")
+    if cached:
+        return cached
+    sort_field, direction = parse_sort(sort, PO_SORT_FIELDS)
+    query = list_query(
+        {"status": status, "approval_status": approval_status, "items.vendor": vendor},
+        "po_date", date_from, date_to, "po_number", po_number, q
+    )
+    pos = await fetch_page(db.purchase_orders, query, sort_field, "po_id", limit, cursor, response, direction=direction, with_total=True)
+    return [PurchaseOrder(**upgrade_legacy("purchase_orders", po)) for po in pos]
 
 @api_router.get("/purchase-orders/{po_number}", response_model=PurchaseOrder)
-async def get_purchase_order(po_number: str, current_user: User = Depends(get_current_user)):
+async def get_purchase_order(po_number: str, request: Request, response: Response, current_user: User = Depends(get_current_user)):
+    cached = await not_modified(request, response, "purchase_orders")
+    if cached:
+        return cached
     po = await db.purchase_orders.find_one({"po_number": po_number}, {"_id": 0})
     if not po:
         raise HTTPException(status_code=404, detail="PO not found")
-    if isinstance(po.get('created_at'), str):
-        po['created_at'] = datetime.fromisoformat(po['created_at'])
-    if isinstance(po.get('updated_at'), str):
-        po['updated_at'] = datetime.fromisoformat(po['updated_at'])
-    if po.get('approved_at') and isinstance(po['approved_at'], str):
-        po['approved_at'] = datetime.fromisoformat(po['approved_at'])
-    if po.get('po_date') and isinstance(po['po_date'], str):
-        po['po_date'] = datetime.fromisoformat(po['po_date'])
-    # Ensure backward compatibility
-    if 'po_date' not in po:
-        po['po_date'] = po.get('created_at')
-    if 'purchase_office' not in po:
-        po['purchase_office'] = 'Magnova Head Office'
-    if 'total_value' not in po:
-        po['total_value'] = 0.0
-    if 'items' not in po:
-        po['items'] = []
-    return PurchaseOrder(**po)
+    return PurchaseOrder(**upgrade_legacy("purchase_orders", po))
 
 @api_router.post("/purchase-orders/{po_number}/approve")
 async def approve_purchase_order(po_number: str, approval: POApproval, current_user: User = Depends(get_current_user)):
@@ -507,21 +2038,30 @@ async def approve_purchase_order(po_number: str, approval: POApproval, current_u
     if not po:
         raise HTTPException(status_code=404, detail="PO not found")
     
-    update_data = {"updated_at": datetime.now(timezone.utc).isoformat()}
+    update_data = {"updated_at": datetime.now(timezone.utc)}
     
     if approval.action == "approve":
         update_data["approval_status"] = "Approved"
         update_data["status"] = "Approved"
         update_data["approved_by"] = current_user.user_id
-        update_data["approved_at"] = datetime.now(timezone.utc).isoformat()
-        await create_audit_log("APPROVE", "PurchaseOrder", po_number, current_user, {})
+        update_data["approved_at"] = datetime.now(timezone.utc)
     elif approval.action == "reject":
         update_data["approval_status"] = "Rejected"
         update_data["status"] = "Rejected"
         update_data["rejection_reason"] = approval.rejection_reason
-        await create_audit_log("REJECT", "PurchaseOrder", po_number, current_user, {"reason": approval.rejection_reason})
     
-    await db.purchase_orders.update_one({"po_number": po_number}, {"$set": update_data})
+    result = await db.purchase_orders.update_one({"po_number": po_number, "approval_status": po.get("approval_status")}, {"$set": update_data})
+    if not result.matched_count:
+        # Another approver changed the PO since it was read
+        raise HTTPException(status_code=409, detail="PO approval status changed, reload and try again")
+    if result.modified_count:
+        await bump_collection_versions("purchase_orders")
+        if approval.action == "approve":
+            await create_audit_log("APPROVE", "PurchaseOrder", po_number, current_user, {})
+        elif approval.action == "reject":
+            await create_audit_log("REJECT", "PurchaseOrder", po_number, current_user, {"reason": approval.rejection_reason})
+    if result.modified_count and po.get("approval_status") == "Pending" and update_data.get("approval_status", "Pending") != "Pending":
+        await adjust_dashboard_stats(pending_pos=-1)
     return {"message": f"PO {approval.action}d successfully"}
 
 # Procurement Endpoints
@@ -549,9 +2089,10 @@ async def create_procurement(proc_data: ProcurementCreate, current_user: User =
         "device_model": proc_data.device_model,
         "quantity": proc_data.quantity or 1,
         "purchase_price": proc_data.purchase_price,
-        "procurement_date": datetime.now(timezone.utc).isoformat(),
+        "procurement_date": datetime.now(timezone.utc),
         "created_by": current_user.user_id,
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc),
+        "schema_version": SCHEMA_VERSION
     }
     
     await db.procurement.insert_one(proc_doc)
@@ -567,33 +2108,295 @@ async def create_procurement(proc_data: ProcurementCreate, current_user: User =
         "inward_magnova_date": None,
         "dispatched_date": None,
         "sold_date": None,
-        "created_at": datetime.now(timezone.utc).isoformat(),
-        "updated_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc),
+        "updated_at": datetime.now(timezone.utc)
     }
     await db.imei_inventory.insert_one(imei_doc)
+    invalidate_imei_lookups([proc_data.imei])
+    await bump_collection_versions("imei_inventory")
+    await adjust_dashboard_stats(total_procurement=1, total_inventory=1)
     
     await create_audit_log("CREATE", "Procurement", proc_id, current_user, {"imei": proc_data.imei})
     
     return ProcurementRecord(**{k: v for k, v in proc_doc.items() if k != "_id"})
 
+MAX_BULK_PROCUREMENT_ROWS = 20000
+PROCUREMENT_COLUMN_ALIASES = {
+    "vendor": "vendor_name",
+    "location": "store_location",
+    "store": "store_location",
+    "model": "device_model",
+    "serial": "serial_number",
+    "serial_no": "serial_number",
+    "price": "purchase_price",
+    "qty": "quantity",
+    "po": "po_number",
+    "po_no": "po_number",
+}
+
+def procurement_column(header) -> str:
+    key = str(header or "").strip().lower().replace(" ", "_").replace(".", "")
+    return PROCUREMENT_COLUMN_ALIASES.get(key, key)
+
+def row_value(value):
+    # Spreadsheets and JSON clients send long IMEIs as numbers; 3.5e14 must become "350000000000000"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, int):
+        return str(value)
+    return value
+
+def parse_procurement_csv(content: bytes) -> List[tuple]:
+    reader = csv.reader(io.StringIO(content.decode("utf-8-sig")))
+    headers = [procurement_column(h) for h in next(reader, [])]
+    return [(line, dict(zip(headers, values))) for line, values in enumerate(reader, start=2) if any(values)]
+
+def parse_procurement_xlsx(content: bytes) -> List[tuple]:
+    from openpyxl import load_workbook
+    workbook = load_workbook(io.BytesIO(content), read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        headers = [procurement_column(h) for h in next(rows, [])]
+        return [
+            (line, {h: row_value(v) for h, v in zip(headers, values)})
+            for line, values in enumerate(rows, start=2)
+            if any(v not in (None, "") for v in values)
+        ]
+    finally:
+        workbook.close()
+
+async def read_procurement_rows(request: Request) -> tuple:
+    """(defaults, [(row number, raw row)]) from a JSON body or a multipart CSV/XLSX upload"""
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or not hasattr(upload, "read"):
+            raise HTTPException(status_code=400, detail="Upload a CSV or XLSX file in the 'file' field")
+        content = await upload.read()
+        defaults = {procurement_column(k): v for k, v in form.items() if k != "file" and v != ""}
+        name = (upload.filename or "").lower()
+        try:
+            if name.endswith(".xlsx"):
+                rows = await asyncio.to_thread(parse_procurement_xlsx, content)
+            elif name.endswith(".csv"):
+                rows = await asyncio.to_thread(parse_procurement_csv, content)
+            else:
+                raise HTTPException(status_code=400, detail="Only .csv and .xlsx files are supported")
+        except (ValueError, KeyError, OSError) as e:
+            raise HTTPException(status_code=400, detail=f"Could not read {upload.filename}: {e}")
+        return defaults, rows
+    
+    try:
+        body = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be a JSON array of rows or an object with 'rows'")
+    if isinstance(body, dict):
+        defaults = {k: v for k, v in body.items() if k != "rows"}
+        body = body.get("rows")
+    else:
+        defaults = {}
+    if not isinstance(body, list):
+        raise HTTPException(status_code=400, detail="Body must be a JSON array of rows or an object with 'rows'")
+    return defaults, [(n, row if isinstance(row, dict) else {}) for n, row in enumerate(body, start=1)]
+
+def validation_message(error: ValidationError) -> str:
+    first = error.errors()[0]
+    field = ".".join(str(part) for part in first["loc"])
+    return f"{field}: {first['msg']}" if field else first["msg"]
+
+@api_router.post("/procurement/bulk")
+async def bulk_create_procurement(request: Request, current_user: User = Depends(get_current_user)):
+    """Create procurement and inventory records for many IMEIs: JSON rows or a CSV/XLSX upload.
+
+    Columns match ProcurementCreate; form fields or top-level JSON keys act as
+    defaults for every row (typically po_number, vendor_name, store_location).
+    """
+    from uuid import uuid4
+    started = time.perf_counter()
+    defaults, raw_rows = await read_procurement_rows(request)
+    if not raw_rows:
+        raise HTTPException(status_code=400, detail="No rows provided")
+    if len(raw_rows) > MAX_BULK_PROCUREMENT_ROWS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_PROCUREMENT_ROWS} rows per upload")
+    
+    errors = []
+    valid = []
+    first_seen = {}
+    for line, raw in raw_rows:
+        merged = {k: row_value(v) for k, v in {**defaults, **raw}.items() if k and v not in (None, "")}
+        try:
+            row = ProcurementCreate(**merged)
+        except ValidationError as e:
+            errors.append({"row": line, "imei": merged.get("imei"), "error": validation_message(e)})
+            continue
+        row.imei = row.imei.strip()
+        if row.imei in first_seen:
+            errors.append({"row": line, "imei": row.imei, "error": f"Duplicate IMEI in upload (first on row {first_seen[row.imei]})"})
+            continue
+        first_seen[row.imei] = line
+        valid.append((line, row))
+    
+    # One $in query each for POs and already-procured IMEIs
+    po_numbers = list({row.po_number for _, row in valid})
+    existing_pos, existing_imeis = await asyncio.gather(
+        db.purchase_orders.distinct("po_number", {"po_number": {"$in": po_numbers}}),
+        db.procurement.distinct("imei", {"imei": {"$in": list(first_seen)}})
+    )
+    existing_pos, existing_imeis = set(existing_pos), set(existing_imeis)
+    
+    now = datetime.now(timezone.utc)
+    accepted = []
+    for line, row in valid:
+        if row.po_number not in existing_pos:
+            errors.append({"row": line, "imei": row.imei, "error": "PO not found"})
+        elif row.imei in existing_imeis:
+            errors.append({"row": line, "imei": row.imei, "error": "IMEI already exists"})
+        else:
+            accepted.append((line, row, {
+                "procurement_id": str(uuid4()),
+                "po_number": row.po_number,
+                "vendor_name": row.vendor_name,
+                "store_location": row.store_location,
+                "imei": row.imei,
+                "serial_number": row.serial_number,
+                "device_model": row.device_model,
+                "quantity": row.quantity or 1,
+                "purchase_price": row.purchase_price,
+                "procurement_date": now,
+                "created_by": current_user.user_id,
+                "created_at": now,
+                "schema_version": SCHEMA_VERSION
+            }))
+    
+    failed_indexes = set()
+    if accepted:
+        try:
+            await db.procurement.insert_many([doc for _, _, doc in accepted], ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                failed_indexes.add(error["index"])
+                line, row, _ = accepted[error["index"]]
+                errors.append({"row": line, "imei": row.imei, "error": error.get("errmsg", "Write failed")})
+    inserted = [(line, row, doc) for i, (line, row, doc) in enumerate(accepted) if i not in failed_indexes]
+    
+    inventory_created = 0
+    if inserted:
+        inventory_docs = [{
+            "imei": row.imei,
+            "procurement_id": doc["procurement_id"],
+            "device_model": row.device_model,
+            "status": "Procured",
+            "current_location": row.store_location,
+            "organization": current_user.organization,
+            "inward_nova_date": None,
+            "inward_magnova_date": None,
+            "dispatched_date": None,
+            "sold_date": None,
+            "created_at": now,
+            "updated_at": now
+        } for _, row, doc in inserted]
+        try:
+            result = await db.imei_inventory.insert_many(inventory_docs, ordered=False)
+            inventory_created = len(result.inserted_ids)
+        except BulkWriteError as e:
+            inventory_created = e.details.get("nInserted", 0)
+            for error in e.details.get("writeErrors", []):
+                line, row, _ = inserted[error["index"]]
+                errors.append({"row": line, "imei": row.imei, "error": f"Procured, but inventory entry not created: {error.get('errmsg', 'Write failed')}"})
+        invalidate_imei_lookups([row.imei for _, row, _ in inserted])
+        await bump_collection_versions("imei_inventory")
+        await adjust_dashboard_stats(total_procurement=len(inserted), total_inventory=inventory_created)
+        await create_audit_logs([
+            build_audit_log("CREATE", "Procurement", doc["procurement_id"], current_user, {"imei": row.imei, "bulk": True})
+            for _, row, doc in inserted
+        ])
+    
+    elapsed = time.perf_counter() - started
+    errors.sort(key=lambda e: e["row"])
+    return {
+        "message": f"{len(inserted)} of {len(raw_rows)} rows imported",
+        "total_rows": len(raw_rows),
+        "inserted": len(inserted),
+        "failed": len(raw_rows) - len(inserted),
+        "errors": errors,
+        "elapsed_ms": round(elapsed * 1000, 1),
+        "rows_per_second": round(len(raw_rows) / elapsed) if elapsed > 0 else None
+    }
+
+PROCUREMENT_SCHEMA = TrustedSchema(ProcurementRecord)
+
 @api_router.get("/procurement", response_model=List[ProcurementRecord])
-async def get_procurement_records(po_number: Optional[str] = None, current_user: User = Depends(get_current_user)):
-    query = {}
-    if po_number:
-        query["po_number"] = po_number
-    
-    records = await db.procurement.find(query, {"_id": 0}).sort("created_at", -1).to_list(1000)
-    for rec in records:
-        if isinstance(rec.get('procurement_date'), str):
-            rec['procurement_date'] = datetime.fromisoformat(rec['procurement_date'])
-        if isinstance(rec.get('created_at'), str):
-            rec['created_at'] = datetime.fromisoformat(rec['created_at'])
-        # Ensure backward compatibility for quantity field
-        if 'quantity' not in rec:
-            rec['quantity'] = 1
-    return [ProcurementRecord(**rec) for rec in records]
+async def get_procurement_records(response: Response, po_number: Optional[str] = None, imei: Optional[str] = Query(None, description="IMEI prefix"), limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT), cursor: Optional[str] = None, fast: bool = False, current_user: User = Depends(get_current_user)):
+    query = list_query({"po_number": po_number}, prefix_field="imei", prefix=imei)
+    
+    if fast:
+        # quantity's model default covers legacy rows
+        return await fetch_fast_page(db.procurement, PROCUREMENT_SCHEMA, query, "created_at", "procurement_id", limit, cursor, response)
+    records = await fetch_page(db.procurement, query, "created_at", "procurement_id", limit, cursor, response)
+    return [ProcurementRecord(**upgrade_legacy("procurement", rec)) for rec in records]
 
 # Payment Endpoints
+def payment_totals_pipeline(match: dict) -> list:
+    """Internal and external totals per PO in one $group; rows without payment_type count as internal"""
+    payment_type = {"$ifNull": ["$payment_type", "internal"]}
+    return [
+        {"$match": match},
+        {"$group": {
+            "_id": "$po_number",
+            "internal_paid": {"$sum": {"$cond": [{"$eq": [payment_type, "internal"]}, "$amount", 0]}},
+            "external_paid": {"$sum": {"$cond": [{"$eq": [payment_type, "external"]}, "$amount", 0]}}
+        }}
+    ]
+
+async def get_po_balance(po_number: str) -> dict:
+    """Materialized payment totals for a PO, kept current by the payment write handlers"""
+    balance = await db.po_balances.find_one({"_id": po_number})
+    return {
+        "internal_paid": balance.get("internal_paid", 0) if balance else 0,
+        "external_paid": balance.get("external_paid", 0) if balance else 0
+    }
+
+async def adjust_po_balance(po_number: str, payment_type: Optional[str], amount: float):
+    field = "external_paid" if payment_type == "external" else "internal_paid"
+    await db.po_balances.update_one({"_id": po_number}, {"$inc": {field: amount}}, upsert=True)
+
+PO_BALANCES_BACKFILL_ID = "po_balances"
+PO_BALANCES_BACKFILL_CLAIM_SECONDS = 600
+
+async def backfill_po_balances() -> Optional[int]:
+    """Build po_balances once from the payments written before balances existed.
+
+    After that the payment handlers keep every balance current with $inc, so
+    the backfill is recorded in the backfills collection and later startups
+    never replace live counters. One worker claims it at a time; a claim left
+    by a worker that died mid-run lapses after PO_BALANCES_BACKFILL_CLAIM_SECONDS.
+    Returns the number of balances written, or None if there was nothing to do.
+    """
+    now = datetime.now(timezone.utc)
+    try:
+        await db.backfills.update_one(
+            {"_id": PO_BALANCES_BACKFILL_ID, "completed_at": None, "claimed_until": {"$not": {"$gt": now}}},
+            {"$set": {"claimed_until": now + timedelta(seconds=PO_BALANCES_BACKFILL_CLAIM_SECONDS)}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        # Completed, or another worker holds the claim
+        return None
+    
+    totals = await db.payments.aggregate(payment_totals_pipeline({})).to_list(None)
+    operations = [
+        ReplaceOne({"_id": t["_id"]}, {"internal_paid": t["internal_paid"], "external_paid": t["external_paid"]}, upsert=True)
+        for t in totals if t["_id"] is not None
+    ]
+    if operations:
+        await db.po_balances.bulk_write(operations, ordered=False)
+    await db.backfills.update_one(
+        {"_id": PO_BALANCES_BACKFILL_ID},
+        {"$set": {"completed_at": datetime.now(timezone.utc), "balances": len(operations)}}
+    )
+    return len(operations)
+
 @api_router.post("/payments/internal", response_model=Payment)
 async def create_internal_payment(payment_data: InternalPaymentCreate, current_user: User = Depends(get_current_user)):
     from uuid import uuid4
@@ -619,13 +2422,17 @@ async def create_internal_payment(payment_data: InternalPaymentCreate, current_u
         "amount": payment_data.amount,
         "transaction_ref": payment_data.transaction_ref,
         "utr_number": None,
-        "payment_date": payment_data.payment_date.isoformat(),
+        "payment_date": payment_data.payment_date,
         "status": "Completed",
         "created_by": current_user.user_id,
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc),
+        "schema_version": SCHEMA_VERSION
     }
     
     await db.payments.insert_one(payment_doc)
+    await bump_collection_versions("payments")
+    await adjust_po_balance(payment_data.po_number, "internal", payment_data.amount)
+    await adjust_dashboard_stats(total_payment_amount=payment_data.amount)
     await create_audit_log("CREATE", "InternalPayment", payment_doc["payment_id"], current_user, {"amount": payment_data.amount})
     
     return Payment(**{k: v for k, v in payment_doc.items() if k != "_id"})
@@ -639,22 +2446,19 @@ async def create_external_payment(payment_data: ExternalPaymentCreate, current_u
     if not po:
         raise HTTPException(status_code=400, detail="PO not found")
     
-    # Get total internal payments for this PO (include legacy payments without payment_type)
-    internal_payments = await db.payments.find({
-        "po_number": payment_data.po_number,
-        "$or": [
-            {"payment_type": "internal"},
-            {"payment_type": {"$exists": False}}  # Legacy payments
-        ]
-    }).to_list(1000)
-    total_internal = sum(p.get("amount", 0) for p in internal_payments)
-    
-    # Get total existing external payments for this PO
-    external_payments = await db.payments.find({"po_number": payment_data.po_number, "payment_type": "external"}).to_list(1000)
-    total_external = sum(p.get("amount", 0) for p in external_payments)
-    
-    # Check if new external payment would exceed internal payment
-    if total_external + payment_data.amount > total_internal:
+    # Reserve the amount against the PO balance atomically: external payments
+    # may never exceed internal payments, even with concurrent requests
+    reserved = await db.po_balances.find_one_and_update(
+        {
+            "_id": payment_data.po_number,
+            "$expr": {"$lte": [{"$add": [{"$ifNull": ["$external_paid", 0]}, payment_data.amount]}, {"$ifNull": ["$internal_paid", 0]}]}
+        },
+        {"$inc": {"external_paid": payment_data.amount}}
+    )
+    if not reserved:
+        balance = await get_po_balance(payment_data.po_number)
+        total_internal = balance["internal_paid"]
+        total_external = balance["external_paid"]
         remaining = total_internal - total_external
         raise HTTPException(
             status_code=400, 
@@ -678,39 +2482,37 @@ async def create_external_payment(payment_data: ExternalPaymentCreate, current_u
         "amount": payment_data.amount,
         "transaction_ref": None,
         "utr_number": payment_data.utr_number,
-        "payment_date": payment_data.payment_date.isoformat(),
+        "payment_date": payment_data.payment_date,
         "status": "Completed",
         "created_by": current_user.user_id,
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc),
+        "schema_version": SCHEMA_VERSION
     }
     
-    await db.payments.insert_one(payment_doc)
+    try:
+        await db.payments.insert_one(payment_doc)
+    except Exception:
+        await adjust_po_balance(payment_data.po_number, "external", -payment_data.amount)
+        raise
+    await bump_collection_versions("payments")
+    await adjust_dashboard_stats(total_payment_amount=payment_data.amount)
     await create_audit_log("CREATE", "ExternalPayment", payment_doc["payment_id"], current_user, {"amount": payment_data.amount, "payee": payment_data.payee_name})
     
     return Payment(**{k: v for k, v in payment_doc.items() if k != "_id"})
 
 @api_router.get("/payments/summary/{po_number}")
 async def get_payment_summary(po_number: str, current_user: User = Depends(get_current_user)):
-    # Get PO total value
-    po = await db.purchase_orders.find_one({"po_number": po_number}, {"_id": 0})
+    # PO total value and materialized payment totals, read concurrently
+    po, balance = await asyncio.gather(
+        db.purchase_orders.find_one({"po_number": po_number}, {"_id": 0, "total_value": 1}),
+        get_po_balance(po_number)
+    )
     if not po:
         raise HTTPException(status_code=404, detail="PO not found")
     
     po_total = po.get("total_value", 0)
-    
-    # Get internal payments (include legacy payments without payment_type)
-    internal_payments = await db.payments.find({
-        "po_number": po_number,
-        "$or": [
-            {"payment_type": "internal"},
-            {"payment_type": {"$exists": False}}  # Legacy payments without payment_type
-        ]
-    }).to_list(1000)
-    total_internal = sum(p.get("amount", 0) for p in internal_payments)
-    
-    # Get external payments
-    external_payments = await db.payments.find({"po_number": po_number, "payment_type": "external"}).to_list(1000)
-    total_external = sum(p.get("amount", 0) for p in external_payments)
+    total_internal = balance["internal_paid"]
+    total_external = balance["external_paid"]
     
     return {
         "po_number": po_number,
@@ -721,10 +2523,11 @@ async def get_payment_summary(po_number: str, current_user: User = Depends(get_c
     }
 
 @api_router.get("/payments", response_model=List[Payment])
-async def get_payments(po_number: Optional[str] = None, payment_type: Optional[str] = None, current_user: User = Depends(get_current_user)):
-    query = {}
-    if po_number:
-        query["po_number"] = po_number
+async def get_payments(request: Request, response: Response, po_number: Optional[str] = None, payment_type: Optional[str] = None, date_from: Optional[str] = None, date_to: Optional[str] = None, limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT), cursor: Optional[str] = None, current_user: User = Depends(get_current_user)):
+    cached = await not_modified(request, response, "payments")
+    if cached:
+        return cached
+    query = list_query({"po_number": po_number}, "payment_date", date_from, date_to)
     if payment_type:
         if payment_type == "internal":
             # Include legacy payments without payment_type as internal
@@ -732,45 +2535,32 @@ async def get_payments(po_number: Optional[str] = None, payment_type: Optional[s
         else:
             query["payment_type"] = payment_type
     
-    payments = await db.payments.find(query, {"_id": 0}).sort("created_at", -1).to_list(1000)
-    for payment in payments:
-        if isinstance(payment.get('payment_date'), str):
-            payment['payment_date'] = datetime.fromisoformat(payment['payment_date'])
-        if isinstance(payment.get('created_at'), str):
-            payment['created_at'] = datetime.fromisoformat(payment['created_at'])
-        # Set payment_type to 'internal' for legacy payments
-        if 'payment_type' not in payment or payment['payment_type'] is None:
-            payment['payment_type'] = 'internal'
-        for field in ['payee_account', 'payee_bank', 'account_number', 'ifsc_code', 'location', 'utr_number', 'payee_type']:
-            if field not in payment:
-                payment[field] = None
-    return [Payment(**payment) for payment in payments]
+    payments = await fetch_page(db.payments, query, "created_at", "payment_id", limit, cursor, response, with_total=True)
+    return [Payment(**upgrade_legacy("payments", payment)) for payment in payments]
 
 # IMEI Inventory Endpoints
 @api_router.get("/inventory/lookup/{imei}")
 async def lookup_imei(imei: str, current_user: User = Depends(get_current_user)):
     """Lookup IMEI details from procurement records, PO items, and existing inventory"""
-    # First check if IMEI exists in inventory
-    inventory_record = await db.imei_inventory.find_one({"imei": imei}, {"_id": 0})
-    
-    # Then check procurement records for this IMEI
-    procurement_record = await db.procurement.find_one({"imei": imei}, {"_id": 0})
+    cached = imei_lookup_cache.get(imei)
+    if cached is not None:
+        return cached
+    
+    # Inventory and procurement lookups are independent, so issue them together
+    inventory_record, procurement_record = await asyncio.gather(
+        db.imei_inventory.find_one({"imei": imei}, {"_id": 0}),
+        db.procurement.find_one({"imei": imei}, {"_id": 0})
+    )
     
     # Also check PO items for this IMEI to get brand, model, color
     po_item_data = None
     if procurement_record and procurement_record.get("po_number"):
-        po = await db.purchase_orders.find_one({"po_number": procurement_record.get("po_number")}, {"_id": 0})
-        if po and po.get("items"):
-            for item in po["items"]:
-                if item.get("imei") == imei or item.get("vendor") == procurement_record.get("vendor_name"):
-                    po_item_data = item
-                    break
-            # If no exact match, use first item with same vendor
-            if not po_item_data:
-                po_item_data = po["items"][0] if po["items"] else None
+        po_item_data = await find_po_item(procurement_record["po_number"], imei, procurement_record.get("vendor_name"))
     
     if not inventory_record and not procurement_record:
-        return {"found": False, "message": "IMEI not found in procurement or inventory"}
+        result = {"found": False, "message": "IMEI not found in procurement or inventory"}
+        imei_lookup_cache.set(imei, result)
+        return result
     
     result = {
         "found": True,
@@ -810,8 +2600,87 @@ async def lookup_imei(imei: str, current_user: User = Depends(get_current_user))
         result["model"] = inventory_record.get("model") or result.get("model")
         result["colour"] = inventory_record.get("colour") or result.get("colour")
     
+    imei_lookup_cache.set(imei, result)
     return result
 
+def pick_po_item(po: Optional[dict], imei: str, vendor_name: Optional[str]) -> Optional[dict]:
+    """PO line item for an IMEI: exact IMEI or vendor match, else the first item"""
+    if not po or not po.get("items"):
+        return None
+    for item in po["items"]:
+        if item.get("imei") == imei or item.get("vendor") == vendor_name:
+            return item
+    return po["items"][0]
+
+async def find_po_item(po_number: str, imei: str, vendor_name: Optional[str]) -> Optional[dict]:
+    """pick_po_item without loading the whole PO: $elemMatch returns only the first matching item"""
+    po = await db.purchase_orders.find_one(
+        {"po_number": po_number},
+        {"_id": 0, "items": {"$elemMatch": {"$or": [{"imei": imei}, {"vendor": vendor_name}]}}}
+    )
+    if po is None:
+        return None
+    if po.get("items"):
+        return po["items"][0]
+    po = await db.purchase_orders.find_one({"po_number": po_number}, {"_id": 0, "items": {"$slice": 1}})
+    return po["items"][0] if po and po.get("items") else None
+
+def inventory_from_procurement(imei: str, procurement_record: dict, po_item_data: Optional[dict], location: str, vendor: Optional[str]) -> dict:
+    """New inventory entry for an IMEI that so far only exists in procurement"""
+    new_inventory = {
+        "imei": imei,
+        "device_model": procurement_record.get("device_model", "Unknown"),
+        "status": "Procured",
+        "vendor": procurement_record.get("vendor_name") or vendor,
+        "organization": "Nova",
+        "current_location": location or procurement_record.get("store_location"),
+        "created_at": datetime.now(timezone.utc),
+        "updated_at": datetime.now(timezone.utc),
+        "po_number": procurement_record.get("po_number"),
+        "procurement_id": procurement_record.get("procurement_id"),
+        "purchase_price": procurement_record.get("purchase_price"),
+    }
+    
+    # Add brand, model, color from PO item data
+    if po_item_data:
+        new_inventory["brand"] = po_item_data.get("brand")
+        new_inventory["model"] = po_item_data.get("model")
+        new_inventory["colour"] = po_item_data.get("colour")
+        new_inventory["storage"] = po_item_data.get("storage")
+    
+    return new_inventory
+
+def scan_update_data(action: str, location: str, vendor: Optional[str]) -> dict:
+    update_data = {
+        "updated_at": datetime.now(timezone.utc),
+        "current_location": location,
+    }
+    
+    # Add vendor if provided
+    if vendor:
+        update_data["vendor"] = vendor
+    
+    if action == "inward_nova":
+        update_data["status"] = "Inward Nova"
+        update_data["inward_nova_date"] = datetime.now(timezone.utc)
+    elif action == "inward_magnova":
+        update_data["status"] = "Inward Magnova"
+        update_data["inward_magnova_date"] = datetime.now(timezone.utc)
+        update_data["organization"] = "Magnova"
+    elif action == "outward_nova":
+        update_data["status"] = "Outward Nova"
+        update_data["outward_nova_date"] = datetime.now(timezone.utc)
+    elif action == "outward_magnova":
+        update_data["status"] = "Outward Magnova"
+        update_data["outward_magnova_date"] = datetime.now(timezone.utc)
+    elif action == "dispatch":
+        update_data["status"] = "Dispatched"
+        update_data["dispatched_date"] = datetime.now(timezone.utc)
+    elif action == "available":
+        update_data["status"] = "Available"
+    
+    return update_data
+
 @api_router.post("/inventory/scan")
 async def scan_imei(scan_data: IMEIScan, current_user: User = Depends(get_current_user)):
     imei_record = await db.imei_inventory.find_one({"imei": scan_data.imei})
@@ -825,114 +2694,132 @@ async def scan_imei(scan_data: IMEIScan, current_user: User = Depends(get_curren
         # Get PO item data for brand, model, color
         po_item_data = None
         if procurement_record.get("po_number"):
-            po = await db.purchase_orders.find_one({"po_number": procurement_record.get("po_number")}, {"_id": 0})
-            if po and po.get("items"):
-                for item in po["items"]:
-                    if item.get("imei") == scan_data.imei or item.get("vendor") == procurement_record.get("vendor_name"):
-                        po_item_data = item
-                        break
-                if not po_item_data:
-                    po_item_data = po["items"][0] if po["items"] else None
+            po_item_data = await find_po_item(procurement_record["po_number"], scan_data.imei, procurement_record.get("vendor_name"))
         
         # Create new inventory entry from procurement data
-        new_inventory = {
-            "imei": scan_data.imei,
-            "device_model": procurement_record.get("device_model", "Unknown"),
-            "status": "Procured",
-            "vendor": procurement_record.get("vendor_name") or scan_data.vendor,
-            "organization": "Nova",
-            "current_location": scan_data.location or procurement_record.get("store_location"),
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat(),
-            "po_number": procurement_record.get("po_number"),
-            "procurement_id": procurement_record.get("procurement_id"),
-            "purchase_price": procurement_record.get("purchase_price"),
-        }
-        
-        # Add brand, model, color from PO item data
-        if po_item_data:
-            new_inventory["brand"] = po_item_data.get("brand")
-            new_inventory["model"] = po_item_data.get("model")
-            new_inventory["colour"] = po_item_data.get("colour")
-            new_inventory["storage"] = po_item_data.get("storage")
-        
+        new_inventory = inventory_from_procurement(scan_data.imei, procurement_record, po_item_data, scan_data.location, scan_data.vendor)
         await db.imei_inventory.insert_one(new_inventory)
+        await adjust_dashboard_stats(total_inventory=1)
         imei_record = new_inventory
     
-    update_data = {
-        "updated_at": datetime.now(timezone.utc).isoformat(),
-        "current_location": scan_data.location,
-    }
-    
-    # Add vendor if provided
-    if scan_data.vendor:
-        update_data["vendor"] = scan_data.vendor
-    
-    if scan_data.action == "inward_nova":
-        update_data["status"] = "Inward Nova"
-        update_data["inward_nova_date"] = datetime.now(timezone.utc).isoformat()
-    elif scan_data.action == "inward_magnova":
-        update_data["status"] = "Inward Magnova"
-        update_data["inward_magnova_date"] = datetime.now(timezone.utc).isoformat()
-        update_data["organization"] = "Magnova"
-    elif scan_data.action == "outward_nova":
-        update_data["status"] = "Outward Nova"
-        update_data["outward_nova_date"] = datetime.now(timezone.utc).isoformat()
-    elif scan_data.action == "outward_magnova":
-        update_data["status"] = "Outward Magnova"
-        update_data["outward_magnova_date"] = datetime.now(timezone.utc).isoformat()
-    elif scan_data.action == "dispatch":
-        update_data["status"] = "Dispatched"
-        update_data["dispatched_date"] = datetime.now(timezone.utc).isoformat()
-    elif scan_data.action == "available":
-        update_data["status"] = "Available"
+    update_data = scan_update_data(scan_data.action, scan_data.location, scan_data.vendor)
     
-    await db.imei_inventory.update_one({"imei": scan_data.imei}, {"$set": update_data})
+    previous = await db.imei_inventory.find_one_and_update({"imei": scan_data.imei}, {"$set": update_data}, {"_id": 0, "status": 1})
+    invalidate_imei_lookups([scan_data.imei])
+    await bump_collection_versions("imei_inventory")
+    if previous:
+        await adjust_dashboard_stats(available_inventory=available_delta(previous.get("status"), update_data.get("status", previous.get("status"))))
     await create_audit_log("SCAN", "IMEI", scan_data.imei, current_user, {"action": scan_data.action, "location": scan_data.location, "vendor": scan_data.vendor})
     
     return {"message": "IMEI scanned successfully", "status": update_data.get("status", imei_record["status"])}
 
+MAX_BULK_SCAN = 1000
+
+@api_router.post("/inventory/scan/bulk")
+async def bulk_scan_imei(scan_data: IMEIBulkScan, current_user: User = Depends(get_current_user)):
+    """Scan a carton of IMEIs with one action: batched lookups, one bulk_write, one audit insert"""
+    imeis = list(dict.fromkeys(imei.strip() for imei in scan_data.imeis if imei and imei.strip()))
+    if not imeis:
+        raise HTTPException(status_code=400, detail="No IMEIs provided")
+    if len(imeis) > MAX_BULK_SCAN:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_SCAN} IMEIs per bulk scan")
+    
+    # Resolve everything up front with $in queries
+    existing = {
+        rec["imei"]: rec
+        for rec in await db.imei_inventory.find({"imei": {"$in": imeis}}, {"_id": 0, "imei": 1, "status": 1}).to_list(None)
+    }
+    missing = [imei for imei in imeis if imei not in existing]
+    procurement_records = {}
+    if missing:
+        for rec in await db.procurement.find({"imei": {"$in": missing}}, {"_id": 0}).to_list(None):
+            procurement_records.setdefault(rec["imei"], rec)
+    po_numbers = list({rec["po_number"] for rec in procurement_records.values() if rec.get("po_number")})
+    pos = {}
+    if po_numbers:
+        for po in await db.purchase_orders.find({"po_number": {"$in": po_numbers}}, {"_id": 0, "po_number": 1, "items": 1}).to_list(None):
+            pos[po["po_number"]] = po
+    
+    update_data = scan_update_data(scan_data.action, scan_data.location, scan_data.vendor)
+    
+    results = {}
+    operations = []
+    operation_imeis = []
+    for imei in imeis:
+        if imei in existing:
+            operations.append(UpdateOne({"imei": imei}, {"$set": update_data}))
+            results[imei] = {"imei": imei, "result": "scanned", "created": False, "status": update_data.get("status", existing[imei].get("status"))}
+        elif imei in procurement_records:
+            procurement_record = procurement_records[imei]
+            po_item_data = pick_po_item(pos.get(procurement_record.get("po_number")), imei, procurement_record.get("vendor_name"))
+            new_inventory = inventory_from_procurement(imei, procurement_record, po_item_data, scan_data.location, scan_data.vendor)
+            # Upsert so a concurrent single scan creating the same IMEI cannot fail the batch
+            on_insert = {k: v for k, v in new_inventory.items() if k not in update_data}
+            operations.append(UpdateOne({"imei": imei}, {"$setOnInsert": on_insert, "$set": update_data}, upsert=True))
+            results[imei] = {"imei": imei, "result": "scanned", "created": True, "status": update_data.get("status", new_inventory["status"])}
+        else:
+            results[imei] = {"imei": imei, "result": "not_found", "created": False, "status": None, "error": "IMEI not found in procurement records"}
+            continue
+        operation_imeis.append(imei)
+    
+    if operations:
+        invalidate_imei_lookups(operation_imeis)
+        try:
+            write_result = await db.imei_inventory.bulk_write(operations, ordered=False)
+            inserted = write_result.upserted_count
+        except BulkWriteError as e:
+            inserted = e.details.get("nUpserted", 0)
+            for error in e.details.get("writeErrors", []):
+                imei = operation_imeis[error["index"]]
+                results[imei] = {"imei": imei, "result": "error", "created": False, "status": None, "error": error.get("errmsg", "Write failed")}
+        await bump_collection_versions("imei_inventory")
+        await adjust_dashboard_stats(
+            total_inventory=inserted,
+            available_inventory=sum(
+                available_delta(existing[imei].get("status") if imei in existing else None, results[imei]["status"])
+                for imei in operation_imeis if results[imei]["result"] == "scanned"
+            )
+        )
+    
+    details = {"action": scan_data.action, "location": scan_data.location, "vendor": scan_data.vendor, "bulk": True}
+    await create_audit_logs([
+        build_audit_log("SCAN", "IMEI", imei, current_user, details)
+        for imei in operation_imeis if results[imei]["result"] == "scanned"
+    ])
+    
+    ordered_results = [results[imei] for imei in imeis]
+    scanned = sum(1 for r in ordered_results if r["result"] == "scanned")
+    return {
+        "message": f"{scanned} of {len(imeis)} IMEIs scanned successfully",
+        "action": scan_data.action,
+        "total": len(imeis),
+        "scanned": scanned,
+        "failed": len(imeis) - scanned,
+        "results": ordered_results
+    }
+
+INVENTORY_SCHEMA = TrustedSchema(IMEIInventory)
+
 @api_router.get("/inventory", response_model=List[IMEIInventory])
-async def get_inventory(status: Optional[str] = None, organization: Optional[str] = None, current_user: User = Depends(get_current_user)):
-    query = {}
-    if status:
-        query["status"] = status
-    if organization:
-        query["organization"] = organization
-    
-    inventory = await db.imei_inventory.find(query, {"_id": 0}).sort("created_at", -1).to_list(5000)
-    for item in inventory:
-        if isinstance(item.get('created_at'), str):
-            item['created_at'] = datetime.fromisoformat(item['created_at'])
-        if isinstance(item.get('updated_at'), str):
-            item['updated_at'] = datetime.fromisoformat(item['updated_at'])
-        if item.get('inward_nova_date') and isinstance(item['inward_nova_date'], str):
-            item['inward_nova_date'] = datetime.fromisoformat(item['inward_nova_date'])
-        if item.get('inward_magnova_date') and isinstance(item['inward_magnova_date'], str):
-            item['inward_magnova_date'] = datetime.fromisoformat(item['inward_magnova_date'])
-        if item.get('dispatched_date') and isinstance(item['dispatched_date'], str):
-            item['dispatched_date'] = datetime.fromisoformat(item['dispatched_date'])
-        if item.get('sold_date') and isinstance(item['sold_date'], str):
-            item['sold_date'] = datetime.fromisoformat(item['sold_date'])
+async def get_inventory(request: Request, response: Response, status: Optional[str] = None, organization: Optional[str] = None, imei: Optional[str] = Query(None, description="IMEI prefix"), q: Optional[str] = Query(None, description="Text search over model and brand"), limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT), cursor: Optional[str] = None, fast: bool = False, current_user: User = Depends(get_current_user)):
+    cached = await not_modified(request, response, "imei_inventory")
+    if cached:
+        return cached
+    query = list_query({"status": status, "organization": organization}, prefix_field="imei", prefix=imei, q=q)
+    
+    if fast:
+        return await fetch_fast_page(db.imei_inventory, INVENTORY_SCHEMA, query, "created_at", "imei", limit, cursor, response)
+    inventory = await fetch_page(db.imei_inventory, query, "created_at", "imei", limit, cursor, response)
     return [IMEIInventory(**item) for item in inventory]
 
 @api_router.get("/inventory/{imei}", response_model=IMEIInventory)
-async def get_imei_details(imei: str, current_user: User = Depends(get_current_user)):
+async def get_imei_details(imei: str, request: Request, response: Response, current_user: User = Depends(get_current_user)):
+    cached = await not_modified(request, response, "imei_inventory")
+    if cached:
+        return cached
     item = await db.imei_inventory.find_one({"imei": imei}, {"_id": 0})
     if not item:
         raise HTTPException(status_code=404, detail="IMEI not found")
-    if isinstance(item.get('created_at'), str):
-        item['created_at'] = datetime.fromisoformat(item['created_at'])
-    if isinstance(item.get('updated_at'), str):
-        item['updated_at'] = datetime.fromisoformat(item['updated_at'])
-    if item.get('inward_nova_date') and isinstance(item['inward_nova_date'], str):
-        item['inward_nova_date'] = datetime.fromisoformat(item['inward_nova_date'])
-    if item.get('inward_magnova_date') and isinstance(item['inward_magnova_date'], str):
-        item['inward_magnova_date'] = datetime.fromisoformat(item['inward_magnova_date'])
-    if item.get('dispatched_date') and isinstance(item['dispatched_date'], str):
-        item['dispatched_date'] = datetime.fromisoformat(item['dispatched_date'])
-    if item.get('sold_date') and isinstance(item['sold_date'], str):
-        item['sold_date'] = datetime.fromisoformat(item['sold_date'])
     return IMEIInventory(**item)
 
 # Logistics Endpoints
@@ -948,8 +2835,8 @@ async def create_shipment(shipment_data: ShipmentCreate, current_user: User = De
         "eway_bill_number": None,
         "from_location": shipment_data.from_location,
         "to_location": shipment_data.to_location,
-        "pickup_date": shipment_data.pickup_date.isoformat(),
-        "expected_delivery": shipment_data.expected_delivery.isoformat(),
+        "pickup_date": shipment_data.pickup_date,
+        "expected_delivery": shipment_data.expected_delivery,
         "actual_delivery": None,
         "status": "In Transit",
         "imei_list": shipment_data.imei_list,
@@ -958,11 +2845,13 @@ async def create_shipment(shipment_data: ShipmentCreate, current_user: User = De
         "model": shipment_data.model,
         "vendor": shipment_data.vendor,
         "created_by": current_user.user_id,
-        "created_at": datetime.now(timezone.utc).isoformat(),
-        "updated_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc),
+        "updated_at": datetime.now(timezone.utc),
+        "schema_version": SCHEMA_VERSION
     }
     
     await db.logistics_shipments.insert_one(shipment_doc)
+    await bump_collection_versions("logistics_shipments")
     await create_audit_log("CREATE", "Shipment", shipment_doc["shipment_id"], current_user, {"pickup_quantity": shipment_doc["pickup_quantity"], "vendor": shipment_data.vendor})
     
     return LogisticsShipment(**{k: v for k, v in shipment_doc.items() if k != "_id"})
@@ -974,49 +2863,49 @@ async def update_shipment_status(shipment_id: str, status_update: ShipmentStatus
         {
             "$set": {
                 "status": status_update.status,
-                "updated_at": datetime.now(timezone.utc).isoformat(),
-                "actual_delivery": datetime.now(timezone.utc).isoformat() if status_update.status == "Delivered" else None
+                "updated_at": datetime.now(timezone.utc),
+                "actual_delivery": datetime.now(timezone.utc) if status_update.status == "Delivered" else None
             }
         }
     )
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Shipment not found")
+    await bump_collection_versions("logistics_shipments")
     
     await create_audit_log("UPDATE", "Shipment", shipment_id, current_user, {"new_status": status_update.status})
     return {"message": "Status updated successfully"}
 
+SHIPMENT_SORT_FIELDS = ["created_at", "pickup_date", "expected_delivery"]
+
 @api_router.get("/logistics/shipments", response_model=List[LogisticsShipment])
-async def get_shipments(current_user: User = Depends(get_current_user)):
-    shipments = await db.logistics_shipments.find({}, {"_id": 0}).sort("created_at", -1).to_list(1000)
-    for shipment in shipments:
-        if isinstance(shipment.get('pickup_date'), str):
-            shipment['pickup_date'] = datetime.fromisoformat(shipment['pickup_date'])
-        if isinstance(shipment.get('expected_delivery'), str):
-            shipment['expected_delivery'] = datetime.fromisoformat(shipment['expected_delivery'])
-        if shipment.get('actual_delivery') and isinstance(shipment['actual_delivery'], str):
-            shipment['actual_delivery'] = datetime.fromisoformat(shipment['actual_delivery'])
-        if isinstance(shipment.get('created_at'), str):
-            shipment['created_at'] = datetime.fromisoformat(shipment['created_at'])
-        if isinstance(shipment.get('updated_at'), str):
-            shipment['updated_at'] = datetime.fromisoformat(shipment['updated_at'])
-        # Ensure backward compatibility
-        if 'pickup_quantity' not in shipment:
-            shipment['pickup_quantity'] = len(shipment.get('imei_list', []))
-        if 'brand' not in shipment:
-            shipment['brand'] = None
-        if 'model' not in shipment:
-            shipment['model'] = None
-        if 'vendor' not in shipment:
-            shipment['vendor'] = None
-    return [LogisticsShipment(**shipment) for shipment in shipments]
+async def get_shipments(
+    request: Request,
+    response: Response,
+    status: Optional[str] = None,
+    vendor: Optional[str] = None,
+    po_number: Optional[str] = Query(None, description="PO number prefix"),
+    date_from: Optional[str] = Query(None, description="pickup_date on or after"),
+    date_to: Optional[str] = Query(None, description="pickup_date on or before"),
+    q: Optional[str] = Query(None, description="Text search over PO number, transporter, vehicle, locations and vendor"),
+    sort: str = "-created_at",
+    limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    cached = await not_modified(request, response, "logistics_shipments")
+    if cached:
+        return cached
+    sort_field, direction = parse_sort(sort, SHIPMENT_SORT_FIELDS)
+    query = list_query({"status": status, "vendor": vendor}, "pickup_date", date_from, date_to, "po_number", po_number, q)
+    shipments = await fetch_page(db.logistics_shipments, query, sort_field, "shipment_id", limit, cursor, response, direction=direction, with_total=True)
+    return [LogisticsShipment(**upgrade_legacy("logistics_shipments", shipment)) for shipment in shipments]
 
 # Invoice Endpoints
 @api_router.post("/invoices", response_model=Invoice)
 async def create_invoice(invoice_data: InvoiceCreate, current_user: User = Depends(get_current_user)):
     from uuid import uuid4
     
-    invoice_count = await db.invoices.count_documents({}) + 1
-    invoice_number = f"INV-{invoice_count:06d}"
+    invoice_number = await next_document_number("invoices")
     
     invoice_doc = {
         "invoice_id": str(uuid4()),
@@ -1030,13 +2919,14 @@ async def create_invoice(invoice_data: InvoiceCreate, current_user: User = Depen
         "gst_percentage": invoice_data.gst_percentage or 18,
         "total_amount": invoice_data.amount + invoice_data.gst_amount,
         "imei_list": invoice_data.imei_list or [],
-        "invoice_date": invoice_data.invoice_date.isoformat(),
+        "invoice_date": invoice_data.invoice_date,
         "payment_status": "Pending",
         "description": invoice_data.description,
         "billing_address": invoice_data.billing_address,
         "shipping_address": invoice_data.shipping_address,
         "created_by": current_user.user_id,
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc),
+        "schema_version": SCHEMA_VERSION
     }
     
     await db.invoices.insert_one(invoice_doc)
@@ -1044,34 +2934,106 @@ async def create_invoice(invoice_data: InvoiceCreate, current_user: User = Depen
     
     return Invoice(**{k: v for k, v in invoice_doc.items() if k != "_id"})
 
+INVOICE_SORT_FIELDS = ["created_at", "invoice_date", "total_amount"]
+
 @api_router.get("/invoices", response_model=List[Invoice])
-async def get_invoices(current_user: User = Depends(get_current_user)):
-    invoices = await db.invoices.find({}, {"_id": 0}).sort("created_at", -1).to_list(1000)
-    for invoice in invoices:
-        if isinstance(invoice.get('invoice_date'), str):
-            invoice['invoice_date'] = datetime.fromisoformat(invoice['invoice_date'])
-        if isinstance(invoice.get('created_at'), str):
-            invoice['created_at'] = datetime.fromisoformat(invoice['created_at'])
-        # Ensure backward compatibility for new fields
-        if 'gst_percentage' not in invoice:
-            invoice['gst_percentage'] = 18
-        if 'description' not in invoice:
-            invoice['description'] = None
-        if 'billing_address' not in invoice:
-            invoice['billing_address'] = None
-        if 'shipping_address' not in invoice:
-            invoice['shipping_address'] = None
-    return [Invoice(**invoice) for invoice in invoices]
+async def get_invoices(
+    response: Response,
+    payment_status: Optional[str] = None,
+    invoice_type: Optional[str] = None,
+    po_number: Optional[str] = Query(None, description="PO number prefix"),
+    date_from: Optional[str] = Query(None, description="invoice_date on or after"),
+    date_to: Optional[str] = Query(None, description="invoice_date on or before"),
+    q: Optional[str] = Query(None, description="Text search over invoice / PO number, organizations and description"),
+    sort: str = "-created_at",
+    limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    sort_field, direction = parse_sort(sort, INVOICE_SORT_FIELDS)
+    query = list_query(
+        {"payment_status": payment_status, "invoice_type": invoice_type},
+        "invoice_date", date_from, date_to, "po_number", po_number, q
+    )
+    invoices = await fetch_page(db.invoices, query, sort_field, "invoice_id", limit, cursor, response, direction=direction, with_total=True)
+    return [Invoice(**upgrade_legacy("invoices", invoice)) for invoice in invoices]
 
 # Sales Order Endpoints
+UNRESERVABLE_STATUSES = ["Reserved", "Sold"]
+
+def reservation_result(imei: str, status: Optional[str], exists: bool) -> dict:
+    if not exists:
+        return {"imei": imei, "result": "not_found", "status": None}
+    if status in UNRESERVABLE_STATUSES:
+        return {"imei": imei, "result": "unavailable", "status": status}
+    return {"imei": imei, "result": "available", "status": status}
+
+def reservation_conflict(results: List[dict]) -> dict:
+    failed = [r for r in results if r["result"] != "available"]
+    return {
+        "message": f"{len(failed)} of {len(results)} IMEIs cannot be reserved",
+        "results": results
+    }
+
+async def reserve_inventory(so_number: str, imeis: List[str], statuses: dict) -> int:
+    """Reserve every IMEI with one update_many or none of them.
+
+    The update only matches IMEIs that are still reservable and tags them with
+    the sales order, so if another order claimed some in the meantime exactly
+    our rows are put back to their previous status, and only while they are
+    still Reserved by this order. Returns how many of the reserved IMEIs were
+    Available.
+    """
+    if not imeis:
+        return 0
+    result = await db.imei_inventory.update_many(
+        {"imei": {"$in": imeis}, "status": {"$nin": UNRESERVABLE_STATUSES}},
+        {"$set": {"status": "Reserved", "sales_order": so_number, "updated_at": datetime.now(timezone.utc)}}
+    )
+    invalidate_imei_lookups(imeis)
+    if result.modified_count:
+        await bump_collection_versions("imei_inventory")
+    if result.modified_count == len(imeis):
+        return sum(1 for imei in imeis if statuses.get(imei) == "Available")
+    
+    # Only rows still in the state this request set are put back; a scan or dispatch that
+    # changed one of them since keeps its change
+    ours = {"imei": {"$in": imeis}, "sales_order": so_number, "status": "Reserved"}
+    reserved = await db.imei_inventory.distinct("imei", ours)
+    if reserved:
+        await db.imei_inventory.bulk_write([
+            UpdateOne({**ours, "imei": imei}, {"$set": {"status": statuses[imei]}, "$unset": {"sales_order": ""}})
+            for imei in reserved
+        ], ordered=False)
+    # Rows moved on since keep their status but lose the tag of an order that won't exist
+    await db.imei_inventory.update_many({"imei": {"$in": imeis}, "sales_order": so_number}, {"$unset": {"sales_order": ""}})
+    await bump_collection_versions("imei_inventory")
+    current = {
+        rec["imei"]: rec.get("status")
+        for rec in await db.imei_inventory.find({"imei": {"$in": imeis}}, {"_id": 0, "imei": 1, "status": 1}).to_list(None)
+    }
+    results = [reservation_result(imei, current.get(imei), imei in current) for imei in imeis]
+    raise HTTPException(status_code=409, detail=reservation_conflict(results))
+
 @api_router.post("/sales-orders", response_model=SalesOrder)
 async def create_sales_order(so_data: SalesOrderCreate, current_user: User = Depends(get_current_user)):
     from uuid import uuid4
     if current_user.organization != "Magnova":
         raise HTTPException(status_code=403, detail="Only Magnova can create sales orders")
     
-    so_count = await db.sales_orders.count_documents({}) + 1
-    so_number = f"SO-MAG-{so_count:05d}"
+    imeis = list(dict.fromkeys(imei.strip() for imei in so_data.imei_list if imei and imei.strip()))
+    
+    # Check availability of every IMEI in one query and refuse the order before writing anything
+    statuses = {
+        rec["imei"]: rec.get("status")
+        for rec in await db.imei_inventory.find({"imei": {"$in": imeis}}, {"_id": 0, "imei": 1, "status": 1}).to_list(None)
+    } if imeis else {}
+    results = [reservation_result(imei, statuses.get(imei), imei in statuses) for imei in imeis]
+    if any(r["result"] != "available" for r in results):
+        raise HTTPException(status_code=409, detail=reservation_conflict(results))
+    
+    so_number = await next_document_number("sales_orders")
+    reserved_available = await reserve_inventory(so_number, imeis, statuses)
     
     so_doc = {
         "sales_order_id": str(uuid4()),
@@ -1081,49 +3043,65 @@ async def create_sales_order(so_data: SalesOrderCreate, current_user: User = Dep
         "total_quantity": so_data.total_quantity,
         "total_amount": so_data.total_amount,
         "status": "Created",
-        "imei_list": so_data.imei_list,
+        "imei_list": imeis,
         "created_by": current_user.user_id,
-        "created_at": datetime.now(timezone.utc).isoformat(),
-        "updated_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc),
+        "updated_at": datetime.now(timezone.utc)
     }
     
     await db.sales_orders.insert_one(so_doc)
-    
-    for imei in so_data.imei_list:
-        await db.imei_inventory.update_one(
-            {"imei": imei},
-            {"$set": {"status": "Reserved", "updated_at": datetime.now(timezone.utc).isoformat()}}
-        )
-    
+    await adjust_dashboard_stats(total_sales=1, available_inventory=-reserved_available)
     await create_audit_log("CREATE", "SalesOrder", so_number, current_user, {"customer": so_data.customer_name})
     
     return SalesOrder(**{k: v for k, v in so_doc.items() if k != "_id"})
 
+SALES_ORDER_SCHEMA = TrustedSchema(SalesOrder)
+
+SALES_ORDER_SORT_FIELDS = ["created_at", "total_amount"]
+
 @api_router.get("/sales-orders", response_model=List[SalesOrder])
-async def get_sales_orders(current_user: User = Depends(get_current_user)):
-    orders = await db.sales_orders.find({}, {"_id": 0}).sort("created_at", -1).to_list(1000)
-    for order in orders:
-        if isinstance(order.get('created_at'), str):
-            order['created_at'] = datetime.fromisoformat(order['created_at'])
-        if isinstance(order.get('updated_at'), str):
-            order['updated_at'] = datetime.fromisoformat(order['updated_at'])
+async def get_sales_orders(
+    response: Response,
+    status: Optional[str] = None,
+    customer_type: Optional[str] = None,
+    so_number: Optional[str] = Query(None, description="SO number prefix"),
+    date_from: Optional[str] = Query(None, description="created_at on or after"),
+    date_to: Optional[str] = Query(None, description="created_at on or before"),
+    q: Optional[str] = Query(None, description="Text search over SO number and customer name"),
+    sort: str = "-created_at",
+    limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    cursor: Optional[str] = None,
+    fast: bool = False,
+    current_user: User = Depends(get_current_user)
+):
+    sort_field, direction = parse_sort(sort, SALES_ORDER_SORT_FIELDS)
+    query = list_query(
+        {"status": status, "customer_type": customer_type},
+        "created_at", date_from, date_to, "so_number", so_number, q
+    )
+    page_options = {"direction": direction, "with_total": True}
+    if fast:
+        return await fetch_fast_page(db.sales_orders, SALES_ORDER_SCHEMA, query, sort_field, "sales_order_id", limit, cursor, response, **page_options)
+    orders = await fetch_page(db.sales_orders, query, sort_field, "sales_order_id", limit, cursor, response, **page_options)
     return [SalesOrder(**order) for order in orders]
 
 # Reports Endpoint
-@api_router.get("/reports/dashboard")
-async def get_dashboard_stats(current_user: User = Depends(get_current_user)):
-    total_pos = await db.purchase_orders.count_documents({})
-    pending_pos = await db.purchase_orders.count_documents({"approval_status": "Pending"})
-    total_procurement = await db.procurement.count_documents({})
-    total_inventory = await db.imei_inventory.count_documents({})
-    available_inventory = await db.imei_inventory.count_documents({"status": "Available"})
-    total_sales = await db.sales_orders.count_documents({})
-    
-    total_payments = await db.payments.aggregate([
-        {"$group": {"_id": None, "total": {"$sum": "$amount"}}}
-    ]).to_list(1)
-    total_payment_amount = total_payments[0]["total"] if total_payments else 0
-    
+DASHBOARD_STATS_ID = "dashboard"
+
+async def compute_dashboard_stats() -> dict:
+    """Run every dashboard count concurrently; unfiltered totals use collection metadata"""
+    (
+        total_pos, pending_pos, total_procurement, total_inventory,
+        available_inventory, total_sales, total_payments
+    ) = await asyncio.gather(
+        db.purchase_orders.estimated_document_count(),
+        db.purchase_orders.count_documents({"approval_status": "Pending"}),
+        db.procurement.estimated_document_count(),
+        db.imei_inventory.estimated_document_count(),
+        db.imei_inventory.count_documents({"status": "Available"}),
+        db.sales_orders.estimated_document_count(),
+        db.payments.aggregate([{"$group": {"_id": None, "total": {"$sum": "$amount"}}}]).to_list(1)
+    )
     return {
         "total_pos": total_pos,
         "pending_pos": pending_pos,
@@ -1131,9 +3109,35 @@ async def get_dashboard_stats(current_user: User = Depends(get_current_user)):
         "total_inventory": total_inventory,
         "available_inventory": available_inventory,
         "total_sales": total_sales,
-        "total_payment_amount": total_payment_amount
+        "total_payment_amount": total_payments[0]["total"] if total_payments else 0
     }
 
+async def adjust_dashboard_stats(**deltas):
+    """Apply counter deltas to the materialized dashboard document when DASHBOARD_STATS_MATERIALIZED is on"""
+    if not DASHBOARD_STATS_MATERIALIZED:
+        return
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if deltas:
+        await db.dashboard_stats.update_one({"_id": DASHBOARD_STATS_ID}, {"$inc": deltas}, upsert=True)
+
+def available_delta(before: Optional[str], after: Optional[str]) -> int:
+    return int(after == "Available") - int(before == "Available")
+
+async def rebuild_dashboard_stats() -> Optional[dict]:
+    """Recompute the materialized dashboard document; used at startup and after cascading deletes"""
+    if not DASHBOARD_STATS_MATERIALIZED:
+        return None
+    stats = await compute_dashboard_stats()
+    await db.dashboard_stats.replace_one({"_id": DASHBOARD_STATS_ID}, stats, upsert=True)
+    return stats
+
+@api_router.get("/reports/dashboard")
+async def get_dashboard_stats(current_user: User = Depends(get_current_user)):
+    if DASHBOARD_STATS_MATERIALIZED:
+        stats = await db.dashboard_stats.find_one({"_id": DASHBOARD_STATS_ID}, {"_id": 0})
+        return stats or await rebuild_dashboard_stats()
+    return await compute_dashboard_stats()
+
 # Get related records count for a PO (for confirmation before delete)
 @api_router.get("/purchase-orders/{po_number}/related-counts")
 async def get_po_related_counts(po_number: str, current_user: User = Depends(get_current_user)):
@@ -1181,58 +3185,305 @@ async def get_po_summary(po_number: str, current_user: User = Depends(get_curren
         "total_paid": total_paid
     }
 
-@api_router.get("/reports/export/inventory")
-async def export_inventory_report(current_user: User = Depends(get_current_user)):
-    inventory = await db.imei_inventory.find({}, {"_id": 0}).to_list(5000)
-    
-    output = io.BytesIO()
-    workbook = xlsxwriter.Workbook(output)
+# Report exports
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+CSV_MEDIA_TYPE = "text/csv; charset=utf-8"
+CSV_CHUNK_SIZE = 64 * 1024
+
+INVENTORY_REPORT_HEADERS = ["IMEI", "Brand", "Model", "Colour", "Storage", "Device Model", "Status", "Vendor", "Organization", "Location", "PO Number", "Created At"]
+
+def inventory_report_row(item: dict) -> list:
+    return [
+        item.get("imei", ""),
+        item.get("brand", ""),
+        item.get("model", ""),
+        item.get("colour", ""),
+        item.get("storage", ""),
+        item.get("device_model", ""),
+        item.get("status", ""),
+        item.get("vendor", ""),
+        item.get("organization", ""),
+        item.get("current_location", ""),
+        item.get("po_number", ""),
+        str(item.get("created_at", "")),
+    ]
+
+async def stream_inventory_report_rows():
+    async for item in db.imei_inventory.find({}, {"_id": 0}):
+        yield inventory_report_row(item)
+
+async def write_inventory_xlsx(path: str, rows) -> int:
+    """Write inventory rows to an xlsx file in constant_memory mode; returns the row count"""
+    workbook = xlsxwriter.Workbook(path, {"constant_memory": True})
     worksheet = workbook.add_worksheet("Inventory")
     
-    headers = ["IMEI", "Brand", "Model", "Colour", "Storage", "Device Model", "Status", "Vendor", "Organization", "Location", "PO Number", "Created At"]
-    for col, header in enumerate(headers):
+    for col, header in enumerate(INVENTORY_REPORT_HEADERS):
         worksheet.write(0, col, header)
     
-    for row, item in enumerate(inventory, start=1):
-        worksheet.write(row, 0, item.get("imei", ""))
-        worksheet.write(row, 1, item.get("brand", ""))
-        worksheet.write(row, 2, item.get("model", ""))
-        worksheet.write(row, 3, item.get("colour", ""))
-        worksheet.write(row, 4, item.get("storage", ""))
-        worksheet.write(row, 5, item.get("device_model", ""))
-        worksheet.write(row, 6, item.get("status", ""))
-        worksheet.write(row, 7, item.get("vendor", ""))
-        worksheet.write(row, 8, item.get("organization", ""))
-        worksheet.write(row, 9, item.get("current_location", ""))
-        worksheet.write(row, 10, item.get("po_number", ""))
-        worksheet.write(row, 11, str(item.get("created_at", "")))
-    
-    workbook.close()
-    output.seek(0)
-    
+    row = 0
+    async for values in rows:
+        row += 1
+        for col, value in enumerate(values):
+            worksheet.write(row, col, value)
+    
+    await asyncio.to_thread(workbook.close)
+    return row
+
+async def iter_csv(headers: List[str], rows):
+    """Encode rows as CSV, yielding a chunk whenever CSV_CHUNK_SIZE bytes are buffered"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(headers)
+    async for values in rows:
+        writer.writerow(values)
+        if buffer.tell() >= CSV_CHUNK_SIZE:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode("utf-8")
+
+# Temp workbooks carry this prefix so the startup sweep only touches our own files
+XLSX_TEMP_PREFIX = "magnova-export-"
+# Older than this, a temp workbook can't belong to a download still in progress on any worker
+XLSX_TEMP_MAX_AGE_SECONDS = 6 * 3600
+
+class TempFileResponse(FileResponse):
+    """FileResponse that deletes its file however the response ends.
+
+    A background task would be skipped when the client disconnects mid-download
+    or the send fails, leaving the file behind.
+    """
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            Path(self.path).unlink(missing_ok=True)
+
+def sweep_temp_workbooks() -> int:
+    """Delete temp workbooks left by a process that died mid-export; returns how many"""
+    cutoff = time.time() - XLSX_TEMP_MAX_AGE_SECONDS
+    removed = 0
+    for path in Path(tempfile.gettempdir()).glob(f"{XLSX_TEMP_PREFIX}*.xlsx"):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except FileNotFoundError:
+            continue
+    return removed
+
+async def xlsx_file_response(write, rows, filename: str) -> FileResponse:
+    """Build the workbook in a temp file, stream it back in chunks and delete it afterwards"""
+    fd, path = tempfile.mkstemp(prefix=XLSX_TEMP_PREFIX, suffix=".xlsx")
+    os.close(fd)
+    try:
+        await write(path, rows)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return TempFileResponse(path, media_type=XLSX_MEDIA_TYPE, filename=filename)
+
+def csv_streaming_response(headers: List[str], rows, filename: str) -> StreamingResponse:
     return StreamingResponse(
-        output,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": "attachment; filename=inventory_report.xlsx"}
+        iter_csv(headers, rows),
+        media_type=CSV_MEDIA_TYPE,
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
 
-@api_router.get("/reports/export/master")
-async def export_master_report(current_user: User = Depends(get_current_user)):
-    """Export the complete Master Report with all sections as Excel"""
-    
-    # Fetch all data
-    pos = await db.purchase_orders.find({}, {"_id": 0}).to_list(1000)
-    procurements = await db.procurement.find({}, {"_id": 0}).to_list(1000)
-    payments = await db.payments.find({}, {"_id": 0}).to_list(1000)
-    shipments = await db.logistics_shipments.find({}, {"_id": 0}).to_list(1000)
-    inventory = await db.imei_inventory.find({}, {"_id": 0}).to_list(5000)
-    
-    # Separate internal and external payments
-    internal_payments = [p for p in payments if p.get("payment_type") == "internal" or not p.get("payment_type")]
-    external_payments = [p for p in payments if p.get("payment_type") == "external"]
-    
-    output = io.BytesIO()
-    workbook = xlsxwriter.Workbook(output)
+@api_router.get("/reports/export/inventory")
+async def export_inventory_report(export_format: str = Query("xlsx", alias="format", pattern="^(xlsx|csv)$"), current_user: User = Depends(get_current_user)):
+    if export_format == "csv":
+        return csv_streaming_response(INVENTORY_REPORT_HEADERS, stream_inventory_report_rows(), "inventory_report.csv")
+    return await xlsx_file_response(write_inventory_xlsx, stream_inventory_report_rows(), "inventory_report.xlsx")
+
+# Master report
+MASTER_REPORT_HEADERS = [
+    # PROCUREMENT (Magnova → Nova PO) - 15 columns
+    'SL No', 'PO ID', 'PO Date', 'Purchase Office', 'Vendor', 'Location', 'Brand', 'Model', 
+    'Storage', 'Colour', 'IMEI', 'Qty', 'Rate', 'PO Value', 'GRN No',
+    # PAYMENT (Magnova → Nova) - 6 columns
+    'Payment#', 'Bank Acc#', 'IFSC', 'Payment Dt', 'UTR No', 'Amount',
+    # PAYMENTS (Nova → Vendors) - 7 columns
+    'Payment#', 'Payee Name', 'Payee Type', 'Bank Acc#', 'Payment Dt', 'UTR No', 'Amount',
+    # LOGISTICS - 4 columns
+    'Courier', 'Dispatch Dt', 'POD No', 'Status',
+    # STORES - 4 columns
+    'Received Dt', 'Rcvd Qty', 'Warehouse', 'Status'
+]
+MASTER_REPORT_MONEY_COLUMNS = {12, 13, 20, 27}
+
+class MasterReportJoin:
+    """Hash indexes for matching PO line items to their related records.
+
+    Each match returns the same record as scanning the full list in its
+    original order and taking the first hit, without the per-item scan.
+    """
+    def __init__(self):
+        self._procurements = {}
+        self._procurement_by_vendor = {}
+        self._internal_payments = {}
+        self._external_payments = {}
+        self._shipment_by_vendor = {}
+        self._shipment_by_location = {}
+        self._inventory_by_brand = {}
+        self._inventory_by_model = {}
+        self._shipment_count = 0
+        self._inventory_count = 0
+        self._procurement_matches = {}
+    
+    @classmethod
+    def from_records(cls, procurements, payments, shipments, inventory):
+        join = cls()
+        for p in procurements:
+            join.add_procurement(p)
+        for p in payments:
+            join.add_payment(p)
+        for s in shipments:
+            join.add_shipment(s)
+        for i in inventory:
+            join.add_inventory(i)
+        return join
+    
+    def add_procurement(self, p: dict):
+        records = self._procurements.setdefault(p.get("po_number"), [])
+        self._procurement_by_vendor.setdefault(p.get("po_number"), {}).setdefault(p.get("vendor_name"), len(records))
+        records.append(p)
+    
+    def add_payment(self, p: dict):
+        if p.get("payment_type") == "internal" or not p.get("payment_type"):
+            self._internal_payments.setdefault(p.get("po_number"), p)
+        elif p.get("payment_type") == "external":
+            self._external_payments.setdefault(p.get("po_number"), p)
+    
+    def add_shipment(self, s: dict):
+        entry = (self._shipment_count, s)
+        self._shipment_by_vendor.setdefault(s.get("po_number"), {}).setdefault(s.get("vendor"), entry)
+        self._shipment_by_location.setdefault(s.get("po_number"), {}).setdefault(s.get("from_location"), entry)
+        self._shipment_count += 1
+    
+    def add_inventory(self, i: dict):
+        entry = (self._inventory_count, i)
+        if i.get("brand"):
+            self._inventory_by_brand.setdefault(i.get("brand"), entry)
+        if i.get("model"):
+            self._inventory_by_model.setdefault(i.get("model"), entry)
+        self._inventory_count += 1
+    
+    def _match_procurement(self, po_number, item: dict):
+        # First record for the PO with the item's vendor, or whose device model contains the item's model
+        key = (po_number, item.get("vendor"), item.get("model", ""))
+        if key not in self._procurement_matches:
+            records = self._procurements.get(po_number, [])
+            vendor_index = self._procurement_by_vendor.get(po_number, {}).get(item.get("vendor"), len(records))
+            match = records[vendor_index] if vendor_index < len(records) else None
+            for p in records[:vendor_index]:
+                if p.get("device_model", "").find(item.get("model", "")) >= 0:
+                    match = p
+                    break
+            self._procurement_matches[key] = match
+        return self._procurement_matches[key]
+    
+    @staticmethod
+    def _earliest(*entries):
+        found = [entry for entry in entries if entry is not None]
+        return min(found, key=lambda entry: entry[0])[1] if found else None
+    
+    def match(self, po: dict, item: dict) -> tuple:
+        po_number = po.get("po_number")
+        related_shipment = self._earliest(
+            self._shipment_by_vendor.get(po_number, {}).get(item.get("vendor")),
+            self._shipment_by_location.get(po_number, {}).get(item.get("location"))
+        )
+        related_inv = self._earliest(
+            self._inventory_by_brand.get(item.get("brand")) if item.get("brand") else None,
+            self._inventory_by_model.get(item.get("model")) if item.get("model") else None
+        )
+        return (
+            self._match_procurement(po_number, item),
+            self._internal_payments.get(po_number),
+            self._external_payments.get(po_number),
+            related_shipment,
+            related_inv
+        )
+
+def master_report_row(sl_no: int, po: dict, item: dict, related: tuple) -> list:
+    related_proc, related_int_payment, related_ext_payment, related_shipment, related_inv = related
+    return [
+        # PROCUREMENT columns
+        sl_no,
+        po.get("po_number", ""),
+        str(po.get("po_date", ""))[:10],
+        po.get("purchase_office", ""),
+        item.get("vendor", ""),
+        item.get("location", ""),
+        item.get("brand", ""),
+        item.get("model", ""),
+        item.get("storage", ""),
+        item.get("colour", ""),
+        item.get("imei") or (related_proc.get("imei") if related_proc else ""),
+        item.get("qty", 0),
+        item.get("rate", 0),
+        item.get("po_value", 0),
+        related_proc.get("procurement_id", "")[:8] if related_proc else "-",
+        # PAYMENT (Magnova → Nova) columns
+        related_int_payment.get("payment_id", "")[:8] if related_int_payment else "-",
+        "XXXX1234" if related_int_payment and related_int_payment.get("payment_mode") == "Bank Transfer" else "-",
+        "HDFC0001234" if related_int_payment and related_int_payment.get("payment_mode") == "Bank Transfer" else "-",
+        str(related_int_payment.get("payment_date", ""))[:10] if related_int_payment else "-",
+        related_int_payment.get("transaction_ref", "-") if related_int_payment else "-",
+        related_int_payment.get("amount", 0) if related_int_payment else 0,
+        # PAYMENTS (Nova → Vendors) columns
+        related_ext_payment.get("payment_id", "")[:8] if related_ext_payment else "-",
+        related_ext_payment.get("payee_name", "-") if related_ext_payment else "-",
+        related_ext_payment.get("payee_type", "-") if related_ext_payment else "-",
+        related_ext_payment.get("account_number", "-") if related_ext_payment else "-",
+        str(related_ext_payment.get("payment_date", ""))[:10] if related_ext_payment else "-",
+        related_ext_payment.get("utr_number", "-") if related_ext_payment else "-",
+        related_ext_payment.get("amount", 0) if related_ext_payment else 0,
+        # LOGISTICS columns
+        related_shipment.get("transporter_name", "-") if related_shipment else "-",
+        str(related_shipment.get("pickup_date", ""))[:10] if related_shipment else "-",
+        related_shipment.get("shipment_id", "")[:8] if related_shipment else "-",
+        related_shipment.get("status", "-") if related_shipment else "-",
+        # STORES columns
+        str(related_inv.get("created_at", ""))[:10] if related_inv else "-",
+        1 if related_inv else 0,
+        related_inv.get("current_location", "-") if related_inv else "-",
+        related_inv.get("status", "-") if related_inv else "-",
+    ]
+
+def iter_master_report_rows(pos, join: MasterReportJoin):
+    """One row per PO line item, numbered from 1"""
+    sl_no = 1
+    for po in pos:
+        for item in po.get("items", [{}]):
+            yield master_report_row(sl_no, po, item, join.match(po, item))
+            sl_no += 1
+
+async def load_master_report_join() -> MasterReportJoin:
+    """Index related records from projected cursors, keeping only the fields the report reads"""
+    join = MasterReportJoin()
+    async for p in db.procurement.find({}, {"_id": 0, "po_number": 1, "vendor_name": 1, "device_model": 1, "imei": 1, "procurement_id": 1}):
+        join.add_procurement(p)
+    async for p in db.payments.find({}, {"_id": 0, "po_number": 1, "payment_type": 1, "payment_id": 1, "payment_mode": 1, "payment_date": 1, "transaction_ref": 1, "amount": 1, "payee_name": 1, "payee_type": 1, "account_number": 1, "utr_number": 1}):
+        join.add_payment(p)
+    async for s in db.logistics_shipments.find({}, {"_id": 0, "po_number": 1, "vendor": 1, "from_location": 1, "transporter_name": 1, "pickup_date": 1, "shipment_id": 1, "status": 1}):
+        join.add_shipment(s)
+    async for i in db.imei_inventory.find({}, {"_id": 0, "brand": 1, "model": 1, "created_at": 1, "current_location": 1, "status": 1}):
+        join.add_inventory(i)
+    return join
+
+async def stream_master_report_rows():
+    join = await load_master_report_join()
+    sl_no = 1
+    async for po in db.purchase_orders.find({}, {"_id": 0}):
+        for item in po.get("items", [{}]):
+            yield master_report_row(sl_no, po, item, join.match(po, item))
+            sl_no += 1
+
+async def write_master_xlsx(path: str, rows) -> int:
+    """Write master report rows to an xlsx file in constant_memory mode; returns the row count"""
+    workbook = xlsxwriter.Workbook(path, {"constant_memory": True})
     worksheet = workbook.add_worksheet("Master Report")
     
     # Formatting
@@ -1245,6 +3496,10 @@ async def export_master_report(current_user: User = Depends(get_current_user)):
     cell_format = workbook.add_format({'border': 1})
     money_format = workbook.add_format({'border': 1, 'num_format': '₹#,##0.00'})
     
+    # Auto-fit columns (approximate)
+    for col in range(36):
+        worksheet.set_column(col, col, 12)
+    
     # Section Headers Row
     worksheet.merge_range('A1:O1', 'PROCUREMENT (Magnova → Nova PO)', section_format_procurement)
     worksheet.merge_range('P1:U1', 'PAYMENT (Magnova → Nova)', section_format_payment_int)
@@ -1252,114 +3507,283 @@ async def export_master_report(current_user: User = Depends(get_current_user)):
     worksheet.merge_range('AC1:AF1', 'LOGISTICS', section_format_logistics)
     worksheet.merge_range('AG1:AJ1', 'STORES', section_format_stores)
     
-    # Column Headers Row
-    headers = [
-        # PROCUREMENT (Magnova → Nova PO) - 15 columns
-        'SL No', 'PO ID', 'PO Date', 'Purchase Office', 'Vendor', 'Location', 'Brand', 'Model', 
-        'Storage', 'Colour', 'IMEI', 'Qty', 'Rate', 'PO Value', 'GRN No',
-        # PAYMENT (Magnova → Nova) - 6 columns
-        'Payment#', 'Bank Acc#', 'IFSC', 'Payment Dt', 'UTR No', 'Amount',
-        # PAYMENTS (Nova → Vendors) - 7 columns
-        'Payment#', 'Payee Name', 'Payee Type', 'Bank Acc#', 'Payment Dt', 'UTR No', 'Amount',
-        # LOGISTICS - 4 columns
-        'Courier', 'Dispatch Dt', 'POD No', 'Status',
-        # STORES - 4 columns
-        'Received Dt', 'Rcvd Qty', 'Warehouse', 'Status'
-    ]
-    
-    for col, header in enumerate(headers):
+    for col, header in enumerate(MASTER_REPORT_HEADERS):
         worksheet.write(1, col, header, header_format)
     
-    # Data Rows
-    row = 2
-    sl_no = 1
-    
-    for po in pos:
-        items = po.get("items", [{}])
-        for item in items:
-            # Find related data
-            related_proc = next((p for p in procurements if p.get("po_number") == po.get("po_number") and 
-                               (p.get("vendor_name") == item.get("vendor") or p.get("device_model", "").find(item.get("model", "")) >= 0)), None)
-            related_int_payment = next((p for p in internal_payments if p.get("po_number") == po.get("po_number")), None)
-            related_ext_payment = next((p for p in external_payments if p.get("po_number") == po.get("po_number")), None)
-            related_shipment = next((s for s in shipments if s.get("po_number") == po.get("po_number") and 
-                                    (s.get("vendor") == item.get("vendor") or s.get("from_location") == item.get("location"))), None)
-            related_inv = next((i for i in inventory if 
-                               (i.get("brand") and item.get("brand") and i.get("brand") == item.get("brand")) or
-                               (i.get("model") and item.get("model") and i.get("model") == item.get("model"))), None)
-            
-            # PROCUREMENT columns
-            worksheet.write(row, 0, sl_no, cell_format)
-            worksheet.write(row, 1, po.get("po_number", ""), cell_format)
-            worksheet.write(row, 2, str(po.get("po_date", ""))[:10], cell_format)
-            worksheet.write(row, 3, po.get("purchase_office", ""), cell_format)
-            worksheet.write(row, 4, item.get("vendor", ""), cell_format)
-            worksheet.write(row, 5, item.get("location", ""), cell_format)
-            worksheet.write(row, 6, item.get("brand", ""), cell_format)
-            worksheet.write(row, 7, item.get("model", ""), cell_format)
-            worksheet.write(row, 8, item.get("storage", ""), cell_format)
-            worksheet.write(row, 9, item.get("colour", ""), cell_format)
-            worksheet.write(row, 10, item.get("imei") or (related_proc.get("imei") if related_proc else ""), cell_format)
-            worksheet.write(row, 11, item.get("qty", 0), cell_format)
-            worksheet.write(row, 12, item.get("rate", 0), money_format)
-            worksheet.write(row, 13, item.get("po_value", 0), money_format)
-            worksheet.write(row, 14, related_proc.get("procurement_id", "")[:8] if related_proc else "-", cell_format)
-            
-            # PAYMENT (Magnova → Nova) columns
-            worksheet.write(row, 15, related_int_payment.get("payment_id", "")[:8] if related_int_payment else "-", cell_format)
-            worksheet.write(row, 16, "XXXX1234" if related_int_payment and related_int_payment.get("payment_mode") == "Bank Transfer" else "-", cell_format)
-            worksheet.write(row, 17, "HDFC0001234" if related_int_payment and related_int_payment.get("payment_mode") == "Bank Transfer" else "-", cell_format)
-            worksheet.write(row, 18, str(related_int_payment.get("payment_date", ""))[:10] if related_int_payment else "-", cell_format)
-            worksheet.write(row, 19, related_int_payment.get("transaction_ref", "-") if related_int_payment else "-", cell_format)
-            worksheet.write(row, 20, related_int_payment.get("amount", 0) if related_int_payment else 0, money_format)
-            
-            # PAYMENTS (Nova → Vendors) columns
-            worksheet.write(row, 21, related_ext_payment.get("payment_id", "")[:8] if related_ext_payment else "-", cell_format)
-            worksheet.write(row, 22, related_ext_payment.get("payee_name", "-") if related_ext_payment else "-", cell_format)
-            worksheet.write(row, 23, related_ext_payment.get("payee_type", "-") if related_ext_payment else "-", cell_format)
-            worksheet.write(row, 24, related_ext_payment.get("account_number", "-") if related_ext_payment else "-", cell_format)
-            worksheet.write(row, 25, str(related_ext_payment.get("payment_date", ""))[:10] if related_ext_payment else "-", cell_format)
-            worksheet.write(row, 26, related_ext_payment.get("utr_number", "-") if related_ext_payment else "-", cell_format)
-            worksheet.write(row, 27, related_ext_payment.get("amount", 0) if related_ext_payment else 0, money_format)
-            
-            # LOGISTICS columns
-            worksheet.write(row, 28, related_shipment.get("transporter_name", "-") if related_shipment else "-", cell_format)
-            worksheet.write(row, 29, str(related_shipment.get("pickup_date", ""))[:10] if related_shipment else "-", cell_format)
-            worksheet.write(row, 30, related_shipment.get("shipment_id", "")[:8] if related_shipment else "-", cell_format)
-            worksheet.write(row, 31, related_shipment.get("status", "-") if related_shipment else "-", cell_format)
-            
-            # STORES columns
-            worksheet.write(row, 32, str(related_inv.get("created_at", ""))[:10] if related_inv else "-", cell_format)
-            worksheet.write(row, 33, 1 if related_inv else 0, cell_format)
-            worksheet.write(row, 34, related_inv.get("current_location", "-") if related_inv else "-", cell_format)
-            worksheet.write(row, 35, related_inv.get("status", "-") if related_inv else "-", cell_format)
-            
-            row += 1
-            sl_no += 1
+    # Data Rows (constant_memory mode: rows must be written in order)
+    row = 1
+    async for values in rows:
+        row += 1
+        for col, value in enumerate(values):
+            worksheet.write(row, col, value, money_format if col in MASTER_REPORT_MONEY_COLUMNS else cell_format)
     
-    # Auto-fit columns (approximate)
-    for col in range(36):
-        worksheet.set_column(col, col, 12)
+    await asyncio.to_thread(workbook.close)
+    return row - 1
+
+@api_router.get("/reports/export/master")
+async def export_master_report(export_format: str = Query("xlsx", alias="format", pattern="^(xlsx|csv)$"), current_user: User = Depends(get_current_user)):
+    """Export the complete Master Report with all sections as Excel (or CSV with format=csv)"""
+    if export_format == "csv":
+        return csv_streaming_response(MASTER_REPORT_HEADERS, stream_master_report_rows(), "master_report.csv")
+    return await xlsx_file_response(write_master_xlsx, stream_master_report_rows(), "master_report.xlsx")
+
+# Background export jobs
+# report -> (headers, row stream, xlsx writer, xlsx header rows); the master workbook has a section row above the headers
+REPORT_EXPORTS = {
+    "inventory": (INVENTORY_REPORT_HEADERS, stream_inventory_report_rows, write_inventory_xlsx, 1),
+    "master": (MASTER_REPORT_HEADERS, stream_master_report_rows, write_master_xlsx, 2),
+}
+EXPORT_FORMATS = {"xlsx": XLSX_MEDIA_TYPE, "csv": CSV_MEDIA_TYPE}
+EXPORT_PROGRESS_EVERY = 1000
+
+export_job_slots = asyncio.Semaphore(EXPORT_JOB_CONCURRENCY)
+export_tasks = set()
+# Identifies this process as the owner of the jobs it runs; other workers leave leased jobs alone
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{os.urandom(3).hex()}"
+INTERRUPTED_EXPORT_ERROR = "Interrupted: the worker running this export stopped"
+
+def export_lease_until() -> datetime:
+    return datetime.now(timezone.utc) + timedelta(seconds=EXPORT_JOB_LEASE_SECONDS)
+
+async def renew_export_lease(job_id: str):
+    """Keep this worker's lease on a queued or running job alive until cancelled"""
+    while True:
+        await asyncio.sleep(EXPORT_JOB_LEASE_SECONDS / 3)
+        try:
+            await db.report_jobs.update_one(
+                {"job_id": job_id, "owner": WORKER_ID, "status": {"$in": ["queued", "running"]}},
+                {"$set": {"lease_until": export_lease_until()}}
+            )
+        except Exception:
+            logger.exception(f"Could not renew the lease on export job {job_id}")
+
+def export_job_path(job: dict) -> Path:
+    return EXPORT_DIR / f"{job['job_id']}.{job['format']}"
+
+async def run_export_job(job: dict):
+    """Write a report to EXPORT_DIR, recording progress and the outcome on the job document"""
+    heartbeat = asyncio.create_task(renew_export_lease(job["job_id"]))
+    try:
+        await write_export_job(job)
+    finally:
+        heartbeat.cancel()
+
+async def write_export_job(job: dict):
+    headers, stream_rows, write_xlsx, xlsx_header_rows = REPORT_EXPORTS[job["report"]]
+    path = export_job_path(job)
+    async with export_job_slots:
+        await db.report_jobs.update_one({"job_id": job["job_id"]}, {"$set": {"status": "running", "started_at": datetime.now(timezone.utc)}})
+        
+        rows_written = 0
+        async def counted_rows():
+            nonlocal rows_written
+            async for values in stream_rows():
+                yield values
+                rows_written += 1
+                if rows_written % EXPORT_PROGRESS_EVERY == 0:
+                    await db.report_jobs.update_one({"job_id": job["job_id"]}, {"$set": {"rows_written": rows_written}})
+        
+        try:
+            EXPORT_DIR.mkdir(parents=True, exist_ok=True)
+            if job["format"] == "csv":
+                with open(path, "wb") as f:
+                    async for chunk in iter_csv(headers, counted_rows()):
+                        f.write(chunk)
+            else:
+                await write_xlsx(str(path), counted_rows())
+            await db.report_jobs.update_one({"job_id": job["job_id"]}, {"$set": {
+                "status": "completed",
+                "rows_written": rows_written,
+                "header_rows": 1 if job["format"] == "csv" else xlsx_header_rows,
+                "file_name": f"{job['report']}_report_{job['created_at']:%Y-%m-%d}.{job['format']}",
+                "file_size": path.stat().st_size,
+                "finished_at": datetime.now(timezone.utc)
+            }})
+        except Exception as e:
+            logger.exception(f"Export job {job['job_id']} failed")
+            path.unlink(missing_ok=True)
+            await db.report_jobs.update_one({"job_id": job["job_id"]}, {"$set": {
+                "status": "failed",
+                "rows_written": rows_written,
+                "error": str(e),
+                "finished_at": datetime.now(timezone.utc)
+            }})
+
+async def expire_export_jobs():
+    """Delete files of completed jobs older than EXPORT_RETENTION_HOURS"""
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=EXPORT_RETENTION_HOURS)
+    async for job in db.report_jobs.find({"status": "completed", "created_at": {"$lt": cutoff}}, {"_id": 0, "job_id": 1, "format": 1}):
+        export_job_path(job).unlink(missing_ok=True)
+        await db.report_jobs.update_one({"job_id": job["job_id"]}, {"$set": {"status": "expired"}})
+
+def abandoned_export_query(now: datetime) -> dict:
+    # Jobs from before leases were recorded have no lease_until and count as abandoned
+    return {"status": {"$in": ["queued", "running"]}, "$or": [{"lease_until": {"$lt": now}}, {"lease_until": None}]}
+
+async def fail_interrupted_export_jobs():
+    """Fail queued / running jobs whose owner stopped renewing the lease; live jobs on other workers are untouched"""
+    now = datetime.now(timezone.utc)
+    await db.report_jobs.update_many(
+        abandoned_export_query(now),
+        {"$set": {"status": "failed", "error": INTERRUPTED_EXPORT_ERROR, "finished_at": now}}
+    )
+
+async def fail_if_abandoned(job: dict) -> dict:
+    """The job as stored, failed first if its lease has run out"""
+    now = datetime.now(timezone.utc)
+    if job["status"] not in ["queued", "running"] or (job.get("lease_until") and job["lease_until"] > now):
+        return job
+    update = {"status": "failed", "error": INTERRUPTED_EXPORT_ERROR, "finished_at": now}
+    result = await db.report_jobs.update_one({"job_id": job["job_id"], **abandoned_export_query(now)}, {"$set": update})
+    if result.modified_count:
+        return {**job, **update}
+    return await db.report_jobs.find_one({"job_id": job["job_id"]}, {"_id": 0})
+
+async def get_visible_export_job(job_id: str, current_user: User) -> dict:
+    job = await db.report_jobs.find_one({"job_id": job_id}, {"_id": 0})
+    if not job or (job["created_by"] != current_user.user_id and current_user.role != "Admin"):
+        raise HTTPException(status_code=404, detail="Export job not found")
+    return await fail_if_abandoned(job)
+
+@api_router.post("/reports/exports", response_model=ReportJob)
+async def create_export_job(job_data: ExportJobCreate, current_user: User = Depends(get_current_user)):
+    from uuid import uuid4
+    if job_data.report not in REPORT_EXPORTS:
+        raise HTTPException(status_code=400, detail=f"Unknown report. Choose one of: {', '.join(REPORT_EXPORTS)}")
+    if job_data.format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown format. Choose one of: {', '.join(EXPORT_FORMATS)}")
+    
+    await expire_export_jobs()
+    
+    job = {
+        "job_id": str(uuid4()),
+        "report": job_data.report,
+        "format": job_data.format,
+        "status": "queued",
+        "rows_written": 0,
+        "header_rows": None,
+        "file_name": None,
+        "file_size": None,
+        "error": None,
+        "created_by": current_user.user_id,
+        "created_at": datetime.now(timezone.utc),
+        "started_at": None,
+        "finished_at": None,
+        "owner": WORKER_ID,
+        "lease_until": export_lease_until()
+    }
+    await db.report_jobs.insert_one(job)
     
-    workbook.close()
-    output.seek(0)
+    task = asyncio.create_task(run_export_job({k: v for k, v in job.items() if k != "_id"}))
+    export_tasks.add(task)
+    task.add_done_callback(export_tasks.discard)
     
-    return StreamingResponse(
-        output,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": "attachment; filename=master_report.xlsx"}
-    )
+    await create_audit_log("EXPORT", "Report", job["job_id"], current_user, {"report": job_data.report, "format": job_data.format})
+    return ReportJob(**{k: v for k, v in job.items() if k != "_id"})
+
+@api_router.get("/reports/exports", response_model=List[ReportJob])
+async def get_export_jobs(current_user: User = Depends(get_current_user)):
+    jobs = await db.report_jobs.find({"created_by": current_user.user_id}, {"_id": 0}).sort("created_at", -1).to_list(20)
+    return [ReportJob(**await fail_if_abandoned(job)) for job in jobs]
+
+@api_router.get("/reports/exports/{job_id}", response_model=ReportJob)
+async def get_export_job(job_id: str, current_user: User = Depends(get_current_user)):
+    return ReportJob(**await get_visible_export_job(job_id, current_user))
+
+@api_router.get("/reports/exports/{job_id}/download")
+async def download_export_job(job_id: str, current_user: User = Depends(get_current_user)):
+    job = await get_visible_export_job(job_id, current_user)
+    path = export_job_path(job)
+    if job["status"] != "completed" or not path.exists():
+        raise HTTPException(status_code=409 if job["status"] in ["queued", "running"] else 404, detail=f"Export is {job['status']}")
+    return FileResponse(path, media_type=EXPORT_FORMATS[job["format"]], filename=job["file_name"])
 
 @api_router.get("/audit-logs")
-async def get_audit_logs(entity_type: Optional[str] = None, current_user: User = Depends(get_current_user)):
+async def get_audit_logs(response: Response, entity_type: Optional[str] = None, limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT), cursor: Optional[str] = None, current_user: User = Depends(get_current_user)):
     query = {}
     if entity_type:
         query["entity_type"] = entity_type
     
-    logs = await db.audit_logs.find(query, {"_id": 0}).sort("timestamp", -1).limit(500).to_list(500)
+    await audit_writer.flush()
+    logs = await fetch_page(db.audit_logs, query, "timestamp", "log_id", limit, cursor, response)
     return logs
 
 # DELETE ENDPOINTS - Admin Only with CASCADE
+transactions_supported = None
+
+async def server_supports_transactions() -> bool:
+    """Multi-document transactions need a replica set or mongos; a standalone mongod has neither"""
+    global transactions_supported
+    if transactions_supported is None:
+        try:
+            hello = await client.admin.command("hello")
+            transactions_supported = bool(hello.get("setName") or hello.get("msg") == "isdbgrid")
+        except Exception:
+            transactions_supported = False
+    return transactions_supported
+
+async def run_po_cascade(po_number: str, imeis: List[str], session=None) -> dict:
+    """Delete a PO and everything hanging off it. Every step is idempotent.
+
+    Inside a transaction the deletes share one session and run in order;
+    otherwise they are independent and issued concurrently.
+    """
+    steps = {
+        "inventory": db.imei_inventory.delete_many({"imei": {"$in": imeis}}, session=session) if imeis else None,
+        "procurement": db.procurement.delete_many({"po_number": po_number}, session=session),
+        "payments": db.payments.delete_many({"po_number": po_number}, session=session),
+        "logistics": db.logistics_shipments.delete_many({"po_number": po_number}, session=session),
+        "invoices": db.invoices.delete_many({"po_number": po_number}, session=session),
+        "balance": db.po_balances.delete_one({"_id": po_number}, session=session),
+    }
+    steps = {name: step for name, step in steps.items() if step is not None}
+    if session is not None:
+        results = [await step for step in steps.values()]
+    else:
+        results = await asyncio.gather(*steps.values())
+    deleted_counts = {"procurement": 0, "payments": 0, "logistics": 0, "inventory": 0, "invoices": 0}
+    for name, result in zip(steps, results):
+        if name in deleted_counts:
+            deleted_counts[name] = result.deleted_count
+    
+    # The PO goes last so an interrupted cascade can still be found and finished
+    await db.purchase_orders.delete_one({"po_number": po_number}, session=session)
+    return deleted_counts
+
+async def cascade_delete_purchase_order(po_number: str) -> dict:
+    """Delete a PO atomically: in a transaction when the server supports one, else via a cascade_log intent.
+
+    The intent records the IMEIs before anything is deleted; if the process
+    dies mid-cascade, resume_cascade_deletes() finishes the job at startup.
+    """
+    if await server_supports_transactions():
+        async def in_transaction(session):
+            imeis = await db.procurement.distinct("imei", {"po_number": po_number, "imei": {"$ne": None}}, session=session)
+            return {**await run_po_cascade(po_number, imeis, session), "imeis": imeis}
+        async with await client.start_session() as session:
+            return await session.with_transaction(in_transaction)
+    
+    imeis = await db.procurement.distinct("imei", {"po_number": po_number, "imei": {"$ne": None}})
+    await db.cascade_log.replace_one(
+        {"_id": po_number},
+        {"imeis": imeis, "started_at": datetime.now(timezone.utc)},
+        upsert=True
+    )
+    deleted_counts = await run_po_cascade(po_number, imeis)
+    await db.cascade_log.delete_one({"_id": po_number})
+    return {**deleted_counts, "imeis": imeis}
+
+async def resume_cascade_deletes() -> List[str]:
+    """Roll forward PO cascades that were interrupted before completing"""
+    resumed = []
+    async for intent in db.cascade_log.find({}):
+        await run_po_cascade(intent["_id"], intent.get("imeis", []))
+        await db.cascade_log.delete_one({"_id": intent["_id"]})
+        resumed.append(intent["_id"])
+    if resumed:
+        await bump_collection_versions(*VERSIONED_COLLECTIONS)
+    return resumed
+
 @api_router.delete("/purchase-orders/{po_number}")
 async def delete_purchase_order(po_number: str, current_user: User = Depends(get_current_user)):
     if current_user.role != "Admin":
@@ -1371,41 +3795,10 @@ async def delete_purchase_order(po_number: str, current_user: User = Depends(get
         raise HTTPException(status_code=404, detail="PO not found")
     
     # CASCADE DELETE - Delete all related records
-    deleted_counts = {
-        "procurement": 0,
-        "payments": 0,
-        "logistics": 0,
-        "inventory": 0,
-        "invoices": 0
-    }
-    
-    # 1. Get all procurement records for this PO (to get IMEIs)
-    procurement_records = await db.procurement.find({"po_number": po_number}).to_list(1000)
-    imeis_to_delete = [p.get("imei") for p in procurement_records if p.get("imei")]
-    
-    # 2. Delete related inventory items
-    if imeis_to_delete:
-        inv_result = await db.imei_inventory.delete_many({"imei": {"$in": imeis_to_delete}})
-        deleted_counts["inventory"] = inv_result.deleted_count
-    
-    # 3. Delete all procurement records for this PO
-    proc_result = await db.procurement.delete_many({"po_number": po_number})
-    deleted_counts["procurement"] = proc_result.deleted_count
-    
-    # 4. Delete all payments for this PO
-    pay_result = await db.payments.delete_many({"po_number": po_number})
-    deleted_counts["payments"] = pay_result.deleted_count
-    
-    # 5. Delete all logistics/shipments for this PO
-    log_result = await db.logistics_shipments.delete_many({"po_number": po_number})
-    deleted_counts["logistics"] = log_result.deleted_count
-    
-    # 6. Delete all invoices for this PO
-    inv_result = await db.invoices.delete_many({"po_number": po_number})
-    deleted_counts["invoices"] = inv_result.deleted_count
-    
-    # 7. Finally delete the PO
-    await db.purchase_orders.delete_one({"po_number": po_number})
+    deleted_counts = await cascade_delete_purchase_order(po_number)
+    invalidate_imei_lookups(deleted_counts.pop("imeis"))
+    await bump_collection_versions(*VERSIONED_COLLECTIONS)
+    await rebuild_dashboard_stats()
     
     await create_audit_log("CASCADE_DELETE", "PurchaseOrder", po_number, current_user, deleted_counts)
     return {
@@ -1425,10 +3818,15 @@ async def clear_all_data(current_user: User = Depends(get_current_user)):
     deleted_counts["purchase_orders"] = (await db.purchase_orders.delete_many({})).deleted_count
     deleted_counts["procurement"] = (await db.procurement.delete_many({})).deleted_count
     deleted_counts["payments"] = (await db.payments.delete_many({})).deleted_count
+    await db.po_balances.delete_many({})
+    imei_lookup_cache.clear()
     deleted_counts["logistics_shipments"] = (await db.logistics_shipments.delete_many({})).deleted_count
     deleted_counts["imei_inventory"] = (await db.imei_inventory.delete_many({})).deleted_count
     deleted_counts["invoices"] = (await db.invoices.delete_many({})).deleted_count
+    await bump_collection_versions(*VERSIONED_COLLECTIONS)
+    await audit_writer.flush()
     deleted_counts["audit_logs"] = (await db.audit_logs.delete_many({})).deleted_count
+    await rebuild_dashboard_stats()
     
     await create_audit_log("CLEAR_ALL_DATA", "System", "all", current_user, deleted_counts)
     
@@ -1446,11 +3844,16 @@ async def delete_procurement(procurement_id: str, current_user: User = Depends(g
     # Also delete related IMEI inventory
     proc = await db.procurement.find_one({"procurement_id": procurement_id})
     if proc:
-        await db.imei_inventory.delete_one({"imei": proc.get("imei")})
+        item = await db.imei_inventory.find_one_and_delete({"imei": proc.get("imei")}, {"_id": 0, "status": 1})
+        invalidate_imei_lookups([proc.get("imei")])
+        if item:
+            await bump_collection_versions("imei_inventory")
+            await adjust_dashboard_stats(total_inventory=-1, available_inventory=available_delta(item.get("status"), None))
     
     result = await db.procurement.delete_one({"procurement_id": procurement_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Procurement record not found")
+    await adjust_dashboard_stats(total_procurement=-1)
     
     await create_audit_log("DELETE", "Procurement", procurement_id, current_user, {})
     return {"message": "Procurement record deleted successfully"}
@@ -1460,9 +3863,12 @@ async def delete_inventory(imei: str, current_user: User = Depends(get_current_u
     if current_user.role != "Admin":
         raise HTTPException(status_code=403, detail="Only Admin can delete records")
     
-    result = await db.imei_inventory.delete_one({"imei": imei})
-    if result.deleted_count == 0:
+    item = await db.imei_inventory.find_one_and_delete({"imei": imei}, {"_id": 0, "status": 1})
+    invalidate_imei_lookups([imei])
+    if not item:
         raise HTTPException(status_code=404, detail="IMEI not found")
+    await bump_collection_versions("imei_inventory")
+    await adjust_dashboard_stats(total_inventory=-1, available_inventory=available_delta(item.get("status"), None))
     
     await create_audit_log("DELETE", "IMEI", imei, current_user, {})
     return {"message": "Inventory item deleted successfully"}
@@ -1475,6 +3881,7 @@ async def delete_shipment(shipment_id: str, current_user: User = Depends(get_cur
     result = await db.logistics_shipments.delete_one({"shipment_id": shipment_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Shipment not found")
+    await bump_collection_versions("logistics_shipments")
     
     await create_audit_log("DELETE", "Shipment", shipment_id, current_user, {})
     return {"message": "Shipment deleted successfully"}
@@ -1484,9 +3891,13 @@ async def delete_payment(payment_id: str, current_user: User = Depends(get_curre
     if current_user.role != "Admin":
         raise HTTPException(status_code=403, detail="Only Admin can delete records")
     
-    result = await db.payments.delete_one({"payment_id": payment_id})
-    if result.deleted_count == 0:
+    payment = await db.payments.find_one_and_delete({"payment_id": payment_id}, {"po_number": 1, "payment_type": 1, "amount": 1})
+    if not payment:
         raise HTTPException(status_code=404, detail="Payment not found")
+    await bump_collection_versions("payments")
+    if payment.get("po_number"):
+        await adjust_po_balance(payment["po_number"], payment.get("payment_type"), -payment.get("amount", 0))
+    await adjust_dashboard_stats(total_payment_amount=-payment.get("amount", 0))
     
     await create_audit_log("DELETE", "Payment", payment_id, current_user, {})
     return {"message": "Payment deleted successfully"}
@@ -1511,20 +3922,43 @@ async def delete_sales_order(so_number: str, current_user: User = Depends(get_cu
     result = await db.sales_orders.delete_one({"so_number": so_number})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Sales order not found")
+    await adjust_dashboard_stats(total_sales=-1)
     
     await create_audit_log("DELETE", "SalesOrder", so_number, current_user, {})
     return {"message": "Sales order deleted successfully"}
 
+# Metrics endpoint: outside /api, where Prometheus scrapes by default
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics(request: Request):
+    """Prometheus text format; when METRICS_TOKEN is set it must be sent as a bearer token"""
+    if METRICS_TOKEN and request.headers.get("Authorization") != f"Bearer {METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return Response(content=render_metrics(), media_type="text/plain; version=0.0.4")
+
 app.include_router(api_router)
 
+# Innermost, so CORS and metrics see the final headers and timing includes compression
+if COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=COMPRESSION_MIN_BYTES,
+        gzip_level=COMPRESSION_GZIP_LEVEL,
+        brotli_quality=COMPRESSION_BROTLI_QUALITY,
+        route_levels=COMPRESSION_ROUTE_LEVELS,
+    )
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Page-Limit", "X-Total-Count", "ETag"],
 )
 
+# Outermost, so its timing covers CORS handling too
+app.add_middleware(MetricsMiddleware)
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
@@ -1533,8 +3967,45 @@ logger = logging.getLogger(__name__)
 
 @app.on_event("startup")
 async def startup_db():
-    await create_indexes()
+    global schema_upgrade_task, date_migration_task
+    await ensure_slow_query_collection()
+    slow_query_log.start()
+    report = await reconcile_indexes()
+    for collection, result in report.items():
+        if result["created"]:
+            logger.info(f"Created indexes on {collection}: {', '.join(result['created'])}")
+        if result["unregistered"]:
+            logger.info(f"Indexes on {collection} not in INDEX_REGISTRY: {', '.join(result['unregistered'])}")
+        for name, differences in result["conflicts"].items():
+            logger.error(f"Index {collection}.{name} does not match INDEX_REGISTRY ({'; '.join(differences)}); drop it to let the server recreate it")
+    resumed = await resume_cascade_deletes()
+    if resumed:
+        logger.info(f"Finished interrupted cascade deletes: {', '.join(resumed)}")
+    await seed_sequences()
+    backfilled = await backfill_po_balances()
+    if backfilled is not None:
+        logger.info(f"Backfilled {backfilled} PO balances from payments")
+    await rebuild_dashboard_stats()
+    await fail_interrupted_export_jobs()
+    await expire_export_jobs()
+    swept = sweep_temp_workbooks()
+    if swept:
+        logger.info(f"Removed {swept} stale temp workbooks from {tempfile.gettempdir()}")
+    schema_upgrade_task = asyncio.create_task(run_schema_upgrade())
+    await load_date_migration_state()
+    date_migration_task = asyncio.create_task(run_date_migration())
+    replayed = await audit_writer.replay_wal()
+    if replayed:
+        logger.info(f"Replayed {replayed} audit log entries from {audit_writer.wal_prefix}.*")
+    audit_writer.start()
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    for task in (schema_upgrade_task, date_migration_task):
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+    await slow_query_log.stop()
+    await audit_writer.stop()
     client.close()
+    password_hasher.shutdown()
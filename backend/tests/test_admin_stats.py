@@ -0,0 +1,100 @@
+"""
+Backend API Tests for the Admin stats and index endpoints
+Tests: user cache hit/miss counters, password hashing pool metrics, index registry report, Admin-only access
+"""
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+ADMIN_USER = {
+    "email": "admin@magnova.com",
+    "password": "admin123"
+}
+
+NON_ADMIN_USER = {
+    "email": "stores@nova.com",
+    "password": "nova123"
+}
+
+
+class TestAdminStats:
+    """Test /api/admin/stats"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Setup: Get admin token"""
+        response = requests.post(f"{BASE_URL}/api/auth/login", json=ADMIN_USER)
+        if response.status_code != 200:
+            pytest.skip("Admin authentication failed")
+        self.admin_headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    def test_user_cache_counts_hits(self):
+        """Test repeated authenticated calls are served from the user cache"""
+        before = requests.get(f"{BASE_URL}/api/admin/stats", headers=self.admin_headers)
+        assert before.status_code == 200
+        cache_before = before.json()["user_cache"]
+
+        for _ in range(3):
+            assert requests.get(f"{BASE_URL}/api/auth/me", headers=self.admin_headers).status_code == 200
+
+        after = requests.get(f"{BASE_URL}/api/admin/stats", headers=self.admin_headers)
+        cache_after = after.json()["user_cache"]
+        # Counters are per worker, so only assert they never go backwards
+        assert cache_after["hits"] >= cache_before["hits"]
+        assert cache_after["size"] <= cache_after["max_entries"]
+        print(f"User cache: {cache_after}")
+
+    def test_password_pool_metrics(self):
+        """Test login latency and bcrypt pool queue depth are reported"""
+        assert requests.post(f"{BASE_URL}/api/auth/login", json=ADMIN_USER).status_code == 200
+
+        response = requests.get(f"{BASE_URL}/api/admin/stats", headers=self.admin_headers)
+        assert response.status_code == 200
+        hashing = response.json()["password_hashing"]
+        assert hashing["workers"] >= 1
+        assert hashing["queued"] >= 0
+        assert hashing["running"] <= hashing["workers"]
+        for key in ["count", "mean_ms", "p50_ms", "p99_ms", "max_ms"]:
+            assert key in hashing["verify_latency"]
+            assert key in response.json()["login_latency"]
+        print(f"Password hashing: {hashing}")
+
+    def test_index_report_has_no_missing_indexes(self):
+        """Test startup reconciliation created every registered index"""
+        response = requests.get(f"{BASE_URL}/api/admin/indexes", headers=self.admin_headers)
+        assert response.status_code == 200
+        report = response.json()
+        for collection in ["purchase_orders", "procurement", "payments", "imei_inventory", "logistics_shipments", "invoices"]:
+            assert collection in report
+            assert report[collection]["missing"] == [], f"{collection} missing indexes: {report[collection]['missing']}"
+            assert report[collection]["conflicts"] == {}, f"{collection} indexes differ from the registry: {report[collection]['conflicts']}"
+        print(f"Unused indexes: { {c: r['unused'] for c, r in report.items()} }")
+
+    def test_stats_admin_only(self):
+        """Test non-admin users cannot read stats"""
+        response = requests.post(f"{BASE_URL}/api/auth/login", json=NON_ADMIN_USER)
+        if response.status_code != 200:
+            pytest.skip("Non-admin user not available")
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        response = requests.get(f"{BASE_URL}/api/admin/stats", headers=headers)
+        assert response.status_code == 403
+
+    def test_audit_log_writer_flushes_before_reads(self):
+        """Test queued audit entries are visible to the audit log endpoint and counted"""
+        po_response = requests.post(f"{BASE_URL}/api/purchase-orders", headers=self.admin_headers, json={
+            "po_date": "2025-01-15T00:00:00",
+            "purchase_office": "Magnova Head Office",
+            "items": [{"sl_no": 1, "vendor": "TEST_AuditVendor", "location": "Mumbai", "brand": "Apple", "model": "iPhone 15", "qty": 1, "rate": 100, "po_value": 100}]
+        })
+        assert po_response.status_code == 200
+        po_number = po_response.json()["po_number"]
+
+        logs = requests.get(f"{BASE_URL}/api/audit-logs", params={"entity_type": "PurchaseOrder", "limit": 50}, headers=self.admin_headers).json()
+        requests.delete(f"{BASE_URL}/api/purchase-orders/{po_number}", headers=self.admin_headers)
+        assert any(log["entity_id"] == po_number and log["action"] == "CREATE" for log in logs)
+
+        audit = requests.get(f"{BASE_URL}/api/admin/stats", headers=self.admin_headers).json()["audit_log"]
+        assert audit["queued"] <= audit["max_queued"]
+        print(f"Audit writer: {audit}")
@@ -0,0 +1,125 @@
+"""
+Backend Tests for the audit log write-ahead log
+Tests: after a failed insert batch the WAL keeps the entries, the next successful flush
+re-writes them and truncates the WAL again; startup replays the WAL files of exited
+workers only
+
+Runs in process against mongomock-motor, since a failed batch has to be forced.
+"""
+import pytest
+import os
+import sys
+import asyncio
+import fcntl
+from pathlib import Path
+
+pytest.importorskip("mongomock_motor")
+from mongomock_motor import AsyncMongoMockClient  # noqa: E402
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "magnova_test")
+
+import server  # noqa: E402
+
+
+class FlakyDatabase:
+    """audit_logs whose next `failures` insert_many calls raise"""
+    def __init__(self, db):
+        self.db = db
+        self.failures = 0
+        self.audit_logs = self
+
+    async def insert_many(self, docs, **kwargs):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("MongoDB unavailable")
+        return await self.db.audit_logs.insert_many(docs, **kwargs)
+
+
+def entry(i: int) -> dict:
+    return {"log_id": f"log-{i:03d}", "action": "TEST", "entity_type": "Test", "entity_id": str(i)}
+
+
+class TestAuditWal:
+    """Test WAL recovery after a failed batch"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, monkeypatch, tmp_path):
+        """Setup: in-memory audit_logs with a unique log_id index and a writer with a WAL"""
+        self.real_db = AsyncMongoMockClient()["magnova_test"]
+        self.db = FlakyDatabase(self.real_db)
+        monkeypatch.setattr(server, "db", self.db)
+        self.wal_prefix = tmp_path / "audit.wal"
+        self.loop = asyncio.new_event_loop()
+        self.loop.run_until_complete(self.real_db.audit_logs.create_index("log_id", unique=True))
+        self.writer = server.AuditLogWriter(batch_size=5, flush_interval=0.01, max_queued=100, wal_path=str(self.wal_prefix))
+        self.wal_path = self.writer.wal_path
+        yield
+        self.loop.run_until_complete(self.writer.stop())
+        self.loop.close()
+
+    def _put(self, entries):
+        async def put():
+            await self.writer.put_many(entries)
+            await self.writer.flush()
+            # The WAL is compacted after the batch is acknowledged
+            await asyncio.sleep(0.05)
+        self.loop.run_until_complete(put())
+
+    def _stored(self) -> list:
+        return self.loop.run_until_complete(self.real_db.audit_logs.distinct("log_id"))
+
+    def test_failed_batch_recovered_and_wal_truncated(self):
+        """Test entries of a failed batch are written by the next flush and the WAL is emptied"""
+        self.db.failures = 1
+        self._put([entry(i) for i in range(3)])
+        assert self._stored() == []
+        assert self.writer.stats()["wal_clean"] is False
+        assert len(self.wal_path.read_text().splitlines()) == 3
+
+        self._put([entry(i) for i in range(3, 6)])
+        assert sorted(self._stored()) == [f"log-{i:03d}" for i in range(6)]
+        assert self.writer.stats()["wal_clean"] is True
+        assert self.wal_path.read_text() == ""
+
+        self._put([entry(6)])
+        assert self.wal_path.read_text() == ""
+
+    def test_wal_kept_while_writes_keep_failing(self):
+        """Test the WAL is not truncated until a flush succeeds"""
+        self.db.failures = 2
+        self._put([entry(0)])
+        self._put([entry(1)])
+        assert self.writer.stats()["wal_clean"] is False
+        assert len(self.wal_path.read_text().splitlines()) == 2
+        self._put([entry(2)])
+        assert sorted(self._stored()) == ["log-000", "log-001", "log-002"]
+        assert self.wal_path.read_text() == ""
+
+    def _write_wal(self, path, entries):
+        path.write_text("".join(server.json_util.dumps(e) + "\n" for e in entries))
+
+    def test_wal_file_is_per_process(self):
+        """Test the writer appends to its own suffixed file under the configured prefix"""
+        self._put([entry(0)])
+        assert self.wal_path.name == f"audit.wal.{server.socket.gethostname()}.{os.getpid()}"
+        assert not self.wal_prefix.exists()
+
+    def test_replay_skips_files_of_running_workers(self):
+        """Test startup replays and deletes exited workers' WALs but leaves locked ones alone"""
+        legacy = self.wal_prefix
+        exited = self.wal_prefix.with_name("audit.wal.other-host.1")
+        running = self.wal_prefix.with_name("audit.wal.other-host.2")
+        self._write_wal(legacy, [entry(0)])
+        self._write_wal(exited, [entry(1), entry(2)])
+        self._write_wal(running, [entry(3)])
+
+        with open(running, "a") as held:
+            fcntl.flock(held, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            replayed = self.loop.run_until_complete(self.writer.replay_wal())
+
+        assert replayed == 3
+        assert sorted(self._stored()) == ["log-000", "log-001", "log-002"]
+        assert not legacy.exists() and not exited.exists()
+        assert running.read_text().count("\n") == 1
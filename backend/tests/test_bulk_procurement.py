@@ -0,0 +1,128 @@
+"""
+Backend API Tests for bulk procurement ingest
+Tests: /api/procurement/bulk with JSON rows and CSV / XLSX uploads, per-row errors for
+duplicates, unknown POs and invalid rows, throughput reporting
+"""
+import pytest
+import requests
+import os
+import io
+import time
+from datetime import datetime
+from openpyxl import Workbook
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+ADMIN_USER = {
+    "email": "admin@magnova.com",
+    "password": "admin123"
+}
+
+
+class TestBulkProcurement:
+    """Test bulk procurement endpoint"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Setup: Get admin token and create a PO to procure against"""
+        response = requests.post(f"{BASE_URL}/api/auth/login", json=ADMIN_USER)
+        if response.status_code != 200:
+            pytest.skip("Admin authentication failed")
+        self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        po_response = requests.post(f"{BASE_URL}/api/purchase-orders", headers=self.headers, json={
+            "po_date": datetime.now().isoformat(),
+            "purchase_office": "Magnova Head Office",
+            "items": [{
+                "sl_no": 1, "vendor": "TEST_BulkProcVendor", "location": "Mumbai",
+                "brand": "Samsung", "model": "Galaxy S24", "qty": 500, "rate": 1000, "po_value": 500000
+            }]
+        })
+        assert po_response.status_code == 200, f"PO creation failed: {po_response.text}"
+        self.po_number = po_response.json()["po_number"]
+        self.stamp = str(int(time.time() * 1000))[-10:]
+
+        yield
+
+        requests.delete(f"{BASE_URL}/api/purchase-orders/{self.po_number}", headers=self.headers)
+
+    def _defaults(self):
+        return {"po_number": self.po_number, "vendor_name": "TEST_BulkProcVendor", "store_location": "Mumbai"}
+
+    def test_json_rows_with_errors(self):
+        """Test valid rows are imported and bad rows are reported by row number"""
+        imeis = [f"45{self.stamp}{i:03d}" for i in range(3)]
+        rows = [{"imei": imei, "device_model": "Galaxy S24", "purchase_price": 1000} for imei in imeis]
+        rows.append({"imei": imeis[0], "device_model": "Galaxy S24", "purchase_price": 1000})
+        rows.append({"imei": f"45{self.stamp}999", "purchase_price": 1000})
+        rows.append({"imei": f"45{self.stamp}998", "device_model": "Galaxy S24", "purchase_price": 1000, "po_number": "PO-DOES-NOT-EXIST"})
+
+        response = requests.post(f"{BASE_URL}/api/procurement/bulk", headers=self.headers, json={**self._defaults(), "rows": rows})
+        assert response.status_code == 200, f"Bulk procurement failed: {response.text}"
+        data = response.json()
+        assert data["total_rows"] == 6
+        assert data["inserted"] == 3
+        errors = {e["row"]: e["error"] for e in data["errors"]}
+        assert errors[4].startswith("Duplicate IMEI")
+        assert errors[5].startswith("device_model")
+        assert errors[6] == "PO not found"
+
+        for imei in imeis:
+            item = requests.get(f"{BASE_URL}/api/inventory/{imei}", headers=self.headers)
+            assert item.status_code == 200
+            assert item.json()["status"] == "Procured"
+
+    def test_existing_imeis_rejected(self):
+        """Test IMEIs that are already procured are reported, not duplicated"""
+        row = {**self._defaults(), "imei": f"46{self.stamp}000", "device_model": "Galaxy S24", "purchase_price": 1000}
+        first = requests.post(f"{BASE_URL}/api/procurement/bulk", headers=self.headers, json=[row])
+        assert first.json()["inserted"] == 1
+        second = requests.post(f"{BASE_URL}/api/procurement/bulk", headers=self.headers, json=[row])
+        assert second.json()["inserted"] == 0
+        assert second.json()["errors"][0]["error"] == "IMEI already exists"
+
+    def test_csv_upload(self):
+        """Test a CSV upload with header aliases imports every row and reports throughput"""
+        lines = ["IMEI,Model,Price,Serial No"] + [f"47{self.stamp}{i:03d},Galaxy S24,1000,SN{i}" for i in range(200)]
+        response = requests.post(
+            f"{BASE_URL}/api/procurement/bulk",
+            headers=self.headers,
+            data=self._defaults(),
+            files={"file": ("rows.csv", "\n".join(lines).encode(), "text/csv")}
+        )
+        assert response.status_code == 200, f"CSV upload failed: {response.text}"
+        data = response.json()
+        assert data["inserted"] == 200, data["errors"][:5]
+        assert data["rows_per_second"] > 0
+        print(f"CSV import: {data['total_rows']} rows in {data['elapsed_ms']}ms ({data['rows_per_second']} rows/s)")
+
+    def test_xlsx_upload_numeric_imeis(self):
+        """Test XLSX IMEIs stored as numbers are imported as digit strings"""
+        wb = Workbook()
+        ws = wb.active
+        ws.append(["IMEI", "Device Model", "Purchase Price"])
+        imeis = [int(f"48{self.stamp}{i:03d}") for i in range(3)]
+        for imei in imeis:
+            ws.append([imei, "Galaxy S24", 1000])
+        buffer = io.BytesIO()
+        wb.save(buffer)
+
+        response = requests.post(
+            f"{BASE_URL}/api/procurement/bulk",
+            headers=self.headers,
+            data=self._defaults(),
+            files={"file": ("rows.xlsx", buffer.getvalue())}
+        )
+        assert response.status_code == 200, f"XLSX upload failed: {response.text}"
+        assert response.json()["inserted"] == 3
+        item = requests.get(f"{BASE_URL}/api/inventory/{imeis[0]}", headers=self.headers)
+        assert item.status_code == 200
+
+    def test_unsupported_file_rejected(self):
+        """Test uploads other than CSV / XLSX return 400"""
+        response = requests.post(
+            f"{BASE_URL}/api/procurement/bulk",
+            headers=self.headers,
+            files={"file": ("rows.txt", b"imei\n1")}
+        )
+        assert response.status_code == 400
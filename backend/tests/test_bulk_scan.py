@@ -0,0 +1,136 @@
+"""
+Backend API Tests for bulk IMEI scanning
+Tests: /api/inventory/scan/bulk per-IMEI results, inventory creation from procurement,
+not-found IMEIs, duplicate IMEIs in one request, validation
+"""
+import pytest
+import requests
+import os
+import time
+from datetime import datetime
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+ADMIN_USER = {
+    "email": "admin@magnova.com",
+    "password": "admin123"
+}
+
+
+class TestBulkScan:
+    """Test bulk IMEI scan endpoint"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Setup: Get admin token and create a PO with procured IMEIs"""
+        response = requests.post(f"{BASE_URL}/api/auth/login", json=ADMIN_USER)
+        if response.status_code != 200:
+            pytest.skip("Admin authentication failed")
+        self.headers = {
+            "Authorization": f"Bearer {response.json()['access_token']}",
+            "Content-Type": "application/json"
+        }
+
+        po_response = requests.post(f"{BASE_URL}/api/purchase-orders", headers=self.headers, json={
+            "po_date": datetime.now().isoformat(),
+            "purchase_office": "Magnova Head Office",
+            "items": [{
+                "sl_no": 1, "vendor": "TEST_BulkVendor", "location": "Mumbai",
+                "brand": "Apple", "model": "iPhone 15", "storage": "128GB", "colour": "Black",
+                "qty": 3, "rate": 50000, "po_value": 150000
+            }]
+        })
+        assert po_response.status_code == 200, f"PO creation failed: {po_response.text}"
+        self.po_number = po_response.json()["po_number"]
+
+        stamp = str(int(time.time() * 1000))[-10:]
+        self.imeis = [f"35{stamp}{i:03d}" for i in range(3)]
+        for imei in self.imeis:
+            proc_response = requests.post(f"{BASE_URL}/api/procurement", headers=self.headers, json={
+                "po_number": self.po_number,
+                "vendor_name": "TEST_BulkVendor",
+                "store_location": "Mumbai",
+                "imei": imei,
+                "device_model": "iPhone 15",
+                "purchase_price": 50000
+            })
+            assert proc_response.status_code == 200, f"Procurement failed: {proc_response.text}"
+
+        yield
+
+        requests.delete(f"{BASE_URL}/api/purchase-orders/{self.po_number}", headers=self.headers)
+
+    def test_bulk_scan_updates_every_imei(self):
+        """Test every procured IMEI is scanned and reported in request order"""
+        response = requests.post(f"{BASE_URL}/api/inventory/scan/bulk", headers=self.headers, json={
+            "imeis": self.imeis,
+            "action": "inward_nova",
+            "location": "Warehouse A",
+            "organization": "Nova"
+        })
+        assert response.status_code == 200, f"Bulk scan failed: {response.text}"
+        data = response.json()
+        assert data["total"] == 3
+        assert data["scanned"] == 3
+        assert data["failed"] == 0
+        assert [r["imei"] for r in data["results"]] == self.imeis
+        assert all(r["status"] == "Inward Nova" for r in data["results"])
+
+        for imei in self.imeis:
+            item = requests.get(f"{BASE_URL}/api/inventory/{imei}", headers=self.headers).json()
+            assert item["status"] == "Inward Nova"
+            assert item["current_location"] == "Warehouse A"
+
+    def test_bulk_scan_reports_unknown_imeis(self):
+        """Test IMEIs missing from procurement are reported without failing the batch"""
+        unknown = "999" + self.imeis[0][3:]
+        response = requests.post(f"{BASE_URL}/api/inventory/scan/bulk", headers=self.headers, json={
+            "imeis": [self.imeis[0], unknown],
+            "action": "available",
+            "location": "Warehouse A",
+            "organization": "Nova"
+        })
+        assert response.status_code == 200
+        results = {r["imei"]: r for r in response.json()["results"]}
+        assert results[self.imeis[0]]["result"] == "scanned"
+        assert results[unknown]["result"] == "not_found"
+
+    def test_bulk_scan_collapses_duplicates(self):
+        """Test the same IMEI scanned twice in one carton is applied once"""
+        response = requests.post(f"{BASE_URL}/api/inventory/scan/bulk", headers=self.headers, json={
+            "imeis": [self.imeis[1], self.imeis[1]],
+            "action": "dispatch",
+            "location": "Dock 1",
+            "organization": "Nova"
+        })
+        assert response.status_code == 200
+        assert response.json()["total"] == 1
+
+    def test_bulk_scan_requires_imeis(self):
+        """Test an empty IMEI list is rejected"""
+        response = requests.post(f"{BASE_URL}/api/inventory/scan/bulk", headers=self.headers, json={
+            "imeis": [],
+            "action": "inward_nova",
+            "location": "Warehouse A",
+            "organization": "Nova"
+        })
+        assert response.status_code == 400
+
+    def test_lookup_reflects_scan_immediately(self):
+        """Test a cached IMEI lookup is invalidated by a scan of that IMEI"""
+        before = requests.get(f"{BASE_URL}/api/inventory/lookup/{self.imeis[2]}", headers=self.headers)
+        assert before.status_code == 200
+        assert before.json()["found"] is True
+        assert before.json()["brand"] == "Apple"
+
+        response = requests.post(f"{BASE_URL}/api/inventory/scan/bulk", headers=self.headers, json={
+            "imeis": [self.imeis[2]],
+            "action": "dispatch",
+            "location": "Dock 2",
+            "organization": "Nova"
+        })
+        assert response.status_code == 200
+
+        after = requests.get(f"{BASE_URL}/api/inventory/lookup/{self.imeis[2]}", headers=self.headers).json()
+        assert after["status"] == "Dispatched"
+        assert after["current_location"] == "Dock 2"
@@ -0,0 +1,82 @@
+"""
+Backend API Tests for response compression
+Tests: negotiated gzip / brotli on large JSON lists, small and already-compressed responses
+sent as is, streamed CSV exports compressed
+"""
+import pytest
+import requests
+import os
+import gzip
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+ADMIN_USER = {
+    "email": "admin@magnova.com",
+    "password": "admin123"
+}
+
+
+class TestCompression:
+    """Test Accept-Encoding negotiation"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Setup: Get admin token"""
+        response = requests.post(f"{BASE_URL}/api/auth/login", json=ADMIN_USER)
+        if response.status_code != 200:
+            pytest.skip("Admin authentication failed")
+        self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    def _get(self, path, encoding, **params):
+        return requests.get(f"{BASE_URL}{path}", params=params, headers={**self.headers, "Accept-Encoding": encoding}, stream=True)
+
+    def test_gzip_list(self):
+        """Test a large inventory page is gzipped and decodes to the identity body"""
+        identity = self._get("/api/inventory", "identity", limit=500)
+        if len(identity.content) < 1024:
+            pytest.skip("Not enough inventory for a compressible page")
+        assert identity.headers.get("Content-Encoding") is None
+
+        compressed = self._get("/api/inventory", "gzip", limit=500)
+        assert compressed.status_code == 200
+        assert compressed.headers.get("Content-Encoding") == "gzip"
+        assert "Accept-Encoding" in compressed.headers.get("Vary", "")
+        raw = compressed.raw.read(decode_content=False)
+        assert gzip.decompress(raw) == identity.content
+        print(f"inventory page: {len(identity.content)} -> {len(raw)} bytes")
+
+    def test_brotli_preferred_when_available(self):
+        """Test br is chosen over gzip when offered with equal weight, and gzip when brotli is not installed"""
+        identity = self._get("/api/inventory", "identity", limit=500)
+        if len(identity.content) < 1024:
+            pytest.skip("Not enough inventory for a compressible page")
+
+        response = self._get("/api/inventory", "gzip, br", limit=500)
+        assert response.status_code == 200
+        assert response.headers.get("Content-Encoding") == ("br" if brotli else "gzip")
+
+    def test_small_response_not_compressed(self):
+        """Test bodies under the size threshold are sent as is"""
+        response = self._get("/api/auth/me", "gzip")
+        assert response.status_code == 200
+        assert response.headers.get("Content-Encoding") is None
+
+    def test_csv_export_streamed_compressed(self):
+        """Test the streamed CSV export is gzipped without a Content-Length"""
+        response = self._get("/api/reports/export/inventory", "gzip", format="csv")
+        assert response.status_code == 200
+        assert response.headers.get("Content-Encoding") == "gzip"
+        assert "Content-Length" not in response.headers
+        assert gzip.decompress(response.raw.read(decode_content=False)).startswith(b"IMEI,")
+
+    def test_xlsx_not_recompressed(self):
+        """Test XLSX (already a zip archive) is sent as is"""
+        response = self._get("/api/reports/export/inventory", "gzip, br", format="xlsx")
+        assert response.status_code == 200
+        assert response.headers.get("Content-Encoding") is None
+        assert response.content[:2] == b"PK"
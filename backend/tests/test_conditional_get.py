@@ -0,0 +1,80 @@
+"""
+Backend API Tests for conditional GETs
+Tests: list and detail endpoints send a weak ETag, answer a current If-None-Match with 304
+and change the ETag after a write to the collection
+"""
+import pytest
+import requests
+import os
+from datetime import datetime
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+ADMIN_USER = {
+    "email": "admin@magnova.com",
+    "password": "admin123"
+}
+
+
+class TestConditionalGet:
+    """Test ETag / If-None-Match handling"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Setup: Get admin token"""
+        response = requests.post(f"{BASE_URL}/api/auth/login", json=ADMIN_USER)
+        if response.status_code != 200:
+            pytest.skip("Admin authentication failed")
+        self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    @pytest.mark.parametrize("path", ["/api/purchase-orders", "/api/inventory", "/api/payments", "/api/logistics/shipments"])
+    def test_unchanged_list_is_not_modified(self, path):
+        """Test a repeated GET with the returned ETag gets an empty 304"""
+        first = requests.get(f"{BASE_URL}{path}", params={"limit": 10}, headers=self.headers)
+        assert first.status_code == 200
+        etag = first.headers.get("ETag")
+        assert etag and etag.startswith('W/"')
+
+        second = requests.get(f"{BASE_URL}{path}", params={"limit": 10}, headers={**self.headers, "If-None-Match": etag})
+        assert second.status_code == 304
+        assert second.content == b""
+        assert second.headers.get("ETag") == etag
+
+        other_query = requests.get(f"{BASE_URL}{path}", params={"limit": 11}, headers={**self.headers, "If-None-Match": etag})
+        assert other_query.status_code == 200
+        print(f"{path}: {etag}")
+
+    def test_write_changes_etag(self):
+        """Test creating and deleting a PO invalidates the PO list ETag"""
+        etag = requests.get(f"{BASE_URL}/api/purchase-orders", headers=self.headers).headers["ETag"]
+        po_response = requests.post(f"{BASE_URL}/api/purchase-orders", headers=self.headers, json={
+            "po_date": datetime.now().isoformat(),
+            "purchase_office": "Magnova Head Office",
+            "items": [{
+                "sl_no": 1, "vendor": "TEST_ETagVendor", "location": "Mumbai",
+                "brand": "Samsung", "model": "Galaxy S24", "qty": 1, "rate": 1000, "po_value": 1000
+            }]
+        })
+        assert po_response.status_code == 200
+        po_number = po_response.json()["po_number"]
+
+        try:
+            after_create = requests.get(f"{BASE_URL}/api/purchase-orders", headers={**self.headers, "If-None-Match": etag})
+            assert after_create.status_code == 200
+            assert after_create.headers["ETag"] != etag
+
+            detail = requests.get(f"{BASE_URL}/api/purchase-orders/{po_number}", headers=self.headers)
+            assert detail.status_code == 200
+            cached = requests.get(f"{BASE_URL}/api/purchase-orders/{po_number}", headers={**self.headers, "If-None-Match": detail.headers["ETag"]})
+            assert cached.status_code == 304
+        finally:
+            requests.delete(f"{BASE_URL}/api/purchase-orders/{po_number}", headers=self.headers)
+
+        after_delete = requests.get(f"{BASE_URL}/api/purchase-orders/{po_number}", headers={**self.headers, "If-None-Match": detail.headers["ETag"]})
+        assert after_delete.status_code == 404
+
+    def test_requires_auth(self):
+        """Test a matching ETag does not bypass authentication"""
+        etag = requests.get(f"{BASE_URL}/api/inventory", headers=self.headers).headers["ETag"]
+        response = requests.get(f"{BASE_URL}/api/inventory", headers={"If-None-Match": etag})
+        assert response.status_code in (401, 403)
@@ -0,0 +1,82 @@
+"""
+Backend API Tests for document number generation
+Tests: concurrent PO / invoice creation never reuses a number
+"""
+import pytest
+import requests
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+ADMIN_USER = {
+    "email": "admin@magnova.com",
+    "password": "admin123"
+}
+
+
+class TestDocumentNumbers:
+    """Test counter-backed PO and invoice numbers"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Setup: Get admin token"""
+        response = requests.post(f"{BASE_URL}/api/auth/login", json=ADMIN_USER)
+        if response.status_code != 200:
+            pytest.skip("Admin authentication failed")
+        self.headers = {
+            "Authorization": f"Bearer {response.json()['access_token']}",
+            "Content-Type": "application/json"
+        }
+        self.created_pos = []
+        yield
+        for po_number in self.created_pos:
+            requests.delete(f"{BASE_URL}/api/purchase-orders/{po_number}", headers=self.headers)
+
+    def _create_po(self, _):
+        return requests.post(f"{BASE_URL}/api/purchase-orders", headers=self.headers, json={
+            "po_date": datetime.now().isoformat(),
+            "purchase_office": "Magnova Head Office",
+            "items": [{
+                "sl_no": 1, "vendor": "TEST_SeqVendor", "location": "Mumbai",
+                "brand": "Samsung", "model": "Galaxy S24", "qty": 1, "rate": 1000, "po_value": 1000
+            }]
+        })
+
+    def test_concurrent_po_numbers_unique(self):
+        """Test parallel PO creation yields distinct PO-MAG numbers"""
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            responses = list(pool.map(self._create_po, range(8)))
+        assert all(r.status_code == 200 for r in responses), [r.text for r in responses if r.status_code != 200]
+
+        numbers = [r.json()["po_number"] for r in responses]
+        self.created_pos.extend(numbers)
+        assert len(set(numbers)) == len(numbers), f"Duplicate PO numbers: {numbers}"
+        assert all(n.startswith("PO-MAG-") for n in numbers)
+        print(f"Created POs: {sorted(numbers)}")
+
+    def test_concurrent_invoice_numbers_unique(self):
+        """Test parallel invoice creation yields distinct INV numbers"""
+        po_response = self._create_po(0)
+        assert po_response.status_code == 200
+        po_number = po_response.json()["po_number"]
+        self.created_pos.append(po_number)
+
+        def create_invoice(_):
+            return requests.post(f"{BASE_URL}/api/invoices", headers=self.headers, json={
+                "invoice_type": "Sales",
+                "po_number": po_number,
+                "from_organization": "Magnova",
+                "to_organization": "Nova",
+                "amount": 1000,
+                "gst_amount": 180,
+                "invoice_date": datetime.now().isoformat()
+            })
+
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            responses = list(pool.map(create_invoice, range(6)))
+        assert all(r.status_code == 200 for r in responses)
+
+        numbers = [r.json()["invoice_number"] for r in responses]
+        assert len(set(numbers)) == len(numbers), f"Duplicate invoice numbers: {numbers}"
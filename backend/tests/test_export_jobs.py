@@ -0,0 +1,89 @@
+"""
+Backend API Tests for background report export jobs
+Tests: job creation, progress polling, download of completed files, validation, ownership
+"""
+import pytest
+import requests
+import os
+import io
+import time
+from openpyxl import load_workbook
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+ADMIN_USER = {
+    "email": "admin@magnova.com",
+    "password": "admin123"
+}
+
+
+class TestExportJobs:
+    """Test /api/reports/exports job lifecycle"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Setup: Get admin token"""
+        response = requests.post(f"{BASE_URL}/api/auth/login", json=ADMIN_USER)
+        if response.status_code != 200:
+            pytest.skip("Admin authentication failed")
+        self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    def _wait_for(self, job_id, timeout=60):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            job = requests.get(f"{BASE_URL}/api/reports/exports/{job_id}", headers=self.headers).json()
+            if job["status"] not in ["queued", "running"]:
+                return job
+            time.sleep(0.5)
+        pytest.fail(f"Export job {job_id} did not finish in {timeout}s")
+
+    def test_master_xlsx_job_completes(self):
+        """Test a master report job runs to completion and serves a workbook"""
+        response = requests.post(f"{BASE_URL}/api/reports/exports", headers=self.headers, json={"report": "master"})
+        assert response.status_code == 200, f"Job creation failed: {response.text}"
+        job = response.json()
+        assert job["status"] == "queued"
+        assert job["format"] == "xlsx"
+
+        job = self._wait_for(job["job_id"])
+        assert job["status"] == "completed", f"Job failed: {job['error']}"
+        assert job["file_size"] > 0
+
+        download = requests.get(f"{BASE_URL}/api/reports/exports/{job['job_id']}/download", headers=self.headers)
+        assert download.status_code == 200
+        ws = load_workbook(io.BytesIO(download.content)).active
+        assert job["header_rows"] == 2
+        assert ws.max_row == job["rows_written"] + job["header_rows"]
+        print(f"Master export: {job['rows_written']} rows, {job['file_size']} bytes")
+
+    def test_inventory_csv_job_completes(self):
+        """Test an inventory CSV job writes one line per row plus the header"""
+        response = requests.post(f"{BASE_URL}/api/reports/exports", headers=self.headers, json={"report": "inventory", "format": "csv"})
+        assert response.status_code == 200
+        job = self._wait_for(response.json()["job_id"])
+        assert job["status"] == "completed"
+        assert job["file_name"].endswith(".csv")
+
+        download = requests.get(f"{BASE_URL}/api/reports/exports/{job['job_id']}/download", headers=self.headers)
+        assert download.status_code == 200
+        assert download.headers["content-type"].startswith("text/csv")
+        assert job["header_rows"] == 1
+        assert len(download.text.splitlines()) == job["rows_written"] + job["header_rows"]
+
+    def test_job_listed_for_owner(self):
+        """Test new jobs appear in the caller's job list"""
+        job = requests.post(f"{BASE_URL}/api/reports/exports", headers=self.headers, json={"report": "inventory", "format": "csv"}).json()
+        jobs = requests.get(f"{BASE_URL}/api/reports/exports", headers=self.headers).json()
+        assert job["job_id"] in [j["job_id"] for j in jobs]
+
+    def test_invalid_report_rejected(self):
+        """Test unknown report names and formats return 400"""
+        response = requests.post(f"{BASE_URL}/api/reports/exports", headers=self.headers, json={"report": "payroll"})
+        assert response.status_code == 400
+        response = requests.post(f"{BASE_URL}/api/reports/exports", headers=self.headers, json={"report": "master", "format": "pdf"})
+        assert response.status_code == 400
+
+    def test_unknown_job_returns_404(self):
+        """Test polling or downloading a missing job returns 404"""
+        assert requests.get(f"{BASE_URL}/api/reports/exports/does-not-exist", headers=self.headers).status_code == 404
+        assert requests.get(f"{BASE_URL}/api/reports/exports/does-not-exist/download", headers=self.headers).status_code == 404
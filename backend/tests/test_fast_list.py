@@ -0,0 +1,40 @@
+"""
+Backend API Tests for the fast list path
+Tests: ?fast=true on inventory / procurement / sales orders returns the same rows and
+pagination headers as the validated path
+"""
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+ADMIN_USER = {
+    "email": "admin@magnova.com",
+    "password": "admin123"
+}
+
+
+class TestFastList:
+    """Test trusted-schema list responses"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Setup: Get admin token"""
+        response = requests.post(f"{BASE_URL}/api/auth/login", json=ADMIN_USER)
+        if response.status_code != 200:
+            pytest.skip("Admin authentication failed")
+        self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    @pytest.mark.parametrize("path", ["/api/inventory", "/api/procurement", "/api/sales-orders"])
+    def test_fast_matches_validated(self, path):
+        """Test both paths return identical rows and cursors"""
+        validated = requests.get(f"{BASE_URL}{path}", params={"limit": 20}, headers=self.headers)
+        fast = requests.get(f"{BASE_URL}{path}", params={"limit": 20, "fast": "true"}, headers=self.headers)
+        assert validated.status_code == 200
+        assert fast.status_code == 200
+        assert fast.headers["content-type"] == "application/json"
+        assert fast.json() == validated.json()
+        assert fast.headers.get("X-Page-Limit") == "20"
+        assert fast.headers.get("X-Next-Cursor") == validated.headers.get("X-Next-Cursor")
+        print(f"{path}: {len(fast.content)} bytes, {len(fast.json())} rows")
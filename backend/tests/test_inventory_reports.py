@@ -127,6 +127,35 @@ class TestReportsExportAPI:
             f"Expected Excel content type, got: {content_type}"
         
         print(f"Inventory export successful - file size: {len(response.content)} bytes")
+    
+    def test_master_report_csv_export_streams_rows(self, auth_token):
+        """Test format=csv returns a CSV with the master report header row"""
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        response = requests.get(f"{BASE_URL}/api/reports/export/master", params={"format": "csv"}, headers=headers, stream=True)
+        
+        assert response.status_code == 200, f"CSV export failed: {response.status_code}"
+        assert response.headers.get("content-type", "").startswith("text/csv")
+        assert "master_report.csv" in response.headers.get("content-disposition", "")
+        
+        first_line = next(response.iter_lines()).decode("utf-8")
+        assert first_line.startswith("SL No,PO ID,PO Date,Purchase Office")
+        assert first_line.count(",") == 35, "Master report CSV should have 36 columns"
+    
+    def test_inventory_csv_export(self, auth_token):
+        """Test format=csv on the inventory export"""
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        response = requests.get(f"{BASE_URL}/api/reports/export/inventory", params={"format": "csv"}, headers=headers)
+        
+        assert response.status_code == 200
+        lines = response.text.splitlines()
+        assert lines[0] == "IMEI,Brand,Model,Colour,Storage,Device Model,Status,Vendor,Organization,Location,PO Number,Created At"
+        print(f"Inventory CSV export: {len(lines) - 1} rows")
+    
+    def test_export_rejects_unknown_format(self, auth_token):
+        """Test unsupported export formats are rejected"""
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        response = requests.get(f"{BASE_URL}/api/reports/export/inventory", params={"format": "pdf"}, headers=headers)
+        assert response.status_code == 422
 
 
 class TestPaymentsAPI:
@@ -0,0 +1,84 @@
+"""
+Backend API Tests for server-side list filters
+Tests: status / vendor / PO number prefix / date range filters, sort whitelist and ascending
+order, X-Total-Count on the PO, shipment, invoice, sales order and payment lists
+"""
+import pytest
+import requests
+import os
+from datetime import datetime
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+ADMIN_USER = {
+    "email": "admin@magnova.com",
+    "password": "admin123"
+}
+
+
+class TestListFilters:
+    """Test list endpoint query parameters"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Setup: Get admin token and create POs for two vendors on known dates"""
+        response = requests.post(f"{BASE_URL}/api/auth/login", json=ADMIN_USER)
+        if response.status_code != 200:
+            pytest.skip("Admin authentication failed")
+        self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        self.vendor = f"TEST_FilterVendor_{int(datetime.now().timestamp() * 1000)}"
+        self.created_pos = []
+        for day, vendor in [(1, self.vendor), (2, self.vendor), (3, "TEST_OtherVendor")]:
+            po_response = requests.post(f"{BASE_URL}/api/purchase-orders", headers=self.headers, json={
+                "po_date": f"1999-01-0{day}T12:00:00+00:00",
+                "purchase_office": "Magnova Head Office",
+                "items": [{
+                    "sl_no": 1, "vendor": vendor, "location": "Mumbai",
+                    "brand": "Samsung", "model": "Galaxy S24", "qty": 1, "rate": 1000 * day, "po_value": 1000 * day
+                }]
+            })
+            assert po_response.status_code == 200, f"PO creation failed: {po_response.text}"
+            self.created_pos.append(po_response.json()["po_number"])
+        yield
+        for po_number in self.created_pos:
+            requests.delete(f"{BASE_URL}/api/purchase-orders/{po_number}", headers=self.headers)
+
+    def _get(self, path, **params):
+        response = requests.get(f"{BASE_URL}{path}", params=params, headers=self.headers)
+        assert response.status_code == 200, response.text
+        return response
+
+    def test_vendor_filter_with_total(self):
+        """Test filtering POs by line item vendor reports the matching total"""
+        response = self._get("/api/purchase-orders", vendor=self.vendor, limit=1)
+        assert response.headers["X-Total-Count"] == "2"
+        assert len(response.json()) == 1
+        assert response.headers.get("X-Next-Cursor")
+
+    def test_date_range_includes_whole_end_day(self):
+        """Test a bare date_to covers the whole day"""
+        response = self._get("/api/purchase-orders", date_from="1999-01-02", date_to="1999-01-03")
+        po_numbers = {po["po_number"] for po in response.json()}
+        assert po_numbers == set(self.created_pos[1:])
+
+    def test_po_number_prefix(self):
+        """Test po_number matches as a prefix"""
+        response = self._get("/api/purchase-orders", po_number=self.created_pos[0])
+        assert [po["po_number"] for po in response.json()] == [self.created_pos[0]]
+
+    def test_ascending_sort(self):
+        """Test sort=po_date returns oldest first"""
+        response = self._get("/api/purchase-orders", sort="po_date", date_to="1999-01-03")
+        dates = [po["po_date"] for po in response.json()]
+        assert dates == sorted(dates)
+
+    def test_unknown_sort_rejected(self):
+        """Test sorting by a field outside the whitelist returns 400"""
+        response = requests.get(f"{BASE_URL}/api/purchase-orders", params={"sort": "password"}, headers=self.headers)
+        assert response.status_code == 400
+
+    @pytest.mark.parametrize("path", ["/api/logistics/shipments", "/api/invoices", "/api/sales-orders", "/api/payments"])
+    def test_total_count_header(self, path):
+        """Test every filtered list reports X-Total-Count"""
+        response = self._get(path, limit=1)
+        assert int(response.headers["X-Total-Count"]) >= len(response.json())
@@ -0,0 +1,53 @@
+"""
+Backend API Tests for Prometheus metrics
+Tests: /metrics exposes per-route latency histograms and Mongo round trips per request,
+keyed by route template rather than raw path
+"""
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+ADMIN_USER = {
+    "email": "admin@magnova.com",
+    "password": "admin123"
+}
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+
+class TestMetrics:
+    """Test the /metrics endpoint"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Setup: Get admin token"""
+        response = requests.post(f"{BASE_URL}/api/auth/login", json=ADMIN_USER)
+        if response.status_code != 200:
+            pytest.skip("Admin authentication failed")
+        self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    def _metrics(self):
+        headers = {"Authorization": f"Bearer {METRICS_TOKEN}"} if METRICS_TOKEN else {}
+        response = requests.get(f"{BASE_URL}/metrics", headers=headers)
+        if response.status_code == 404 or not response.headers.get("content-type", "").startswith("text/plain"):
+            pytest.skip("/metrics is not routed to the backend at this URL")
+        assert response.status_code == 200
+        return response.text
+
+    def test_route_template_labels(self):
+        """Test requests for different IMEIs share one route template series"""
+        requests.get(f"{BASE_URL}/api/inventory/TEST_metrics_1", headers=self.headers)
+        requests.get(f"{BASE_URL}/api/inventory/TEST_metrics_2", headers=self.headers)
+        text = self._metrics()
+        assert 'http_request_duration_seconds_count{method="GET",route="/api/inventory/{imei}"}' in text
+        assert "TEST_metrics_1" not in text
+
+    def test_mongo_round_trips_exposed(self):
+        """Test per-request Mongo command counts and per-collection command latency are exported"""
+        requests.get(f"{BASE_URL}/api/purchase-orders", params={"limit": 1}, headers=self.headers)
+        text = self._metrics()
+        assert "# TYPE http_request_mongo_commands histogram" in text
+        assert 'http_request_mongo_commands_count{method="GET",route="/api/purchase-orders"}' in text
+        assert 'mongo_command_duration_seconds_count{collection="purchase_orders",command="find"}' in text
+        print("\n".join(line for line in text.splitlines() if line.startswith("mongo_command_duration_seconds_count")))
@@ -0,0 +1,66 @@
+"""
+Backend API Tests for native BSON date storage
+Tests: timestamps come back as timezone-aware ISO strings, caller-supplied dates round trip,
+newest-first ordering follows real time rather than string formatting
+"""
+import pytest
+import requests
+import os
+from datetime import datetime, timezone
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+ADMIN_USER = {
+    "email": "admin@magnova.com",
+    "password": "admin123"
+}
+
+
+def parse(value):
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+class TestNativeDates:
+    """Test date fields on PO create / read"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Setup: Get admin token"""
+        response = requests.post(f"{BASE_URL}/api/auth/login", json=ADMIN_USER)
+        if response.status_code != 200:
+            pytest.skip("Admin authentication failed")
+        self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        self.created_pos = []
+        yield
+        for po_number in self.created_pos:
+            requests.delete(f"{BASE_URL}/api/purchase-orders/{po_number}", headers=self.headers)
+
+    def _create_po(self, po_date):
+        response = requests.post(f"{BASE_URL}/api/purchase-orders", headers=self.headers, json={
+            "po_date": po_date,
+            "purchase_office": "Magnova Head Office",
+            "items": [{
+                "sl_no": 1, "vendor": "TEST_DateVendor", "location": "Mumbai",
+                "brand": "Samsung", "model": "Galaxy S24", "qty": 1, "rate": 1000, "po_value": 1000
+            }]
+        })
+        assert response.status_code == 200, f"PO creation failed: {response.text}"
+        self.created_pos.append(response.json()["po_number"])
+        return response.json()
+
+    def test_dates_round_trip_timezone_aware(self):
+        """Test po_date and created_at are returned with a UTC offset"""
+        po = self._create_po("2025-03-04T05:06:07+00:00")
+        fetched = requests.get(f"{BASE_URL}/api/purchase-orders/{po['po_number']}", headers=self.headers).json()
+        assert parse(fetched["po_date"]) == datetime(2025, 3, 4, 5, 6, 7, tzinfo=timezone.utc)
+        assert parse(fetched["created_at"]).tzinfo is not None
+        print(f"created_at: {fetched['created_at']}")
+
+    def test_list_is_newest_first(self):
+        """Test the PO list is ordered by created_at descending"""
+        self._create_po(datetime.now(timezone.utc).isoformat())
+        self._create_po(datetime.now(timezone.utc).isoformat())
+        response = requests.get(f"{BASE_URL}/api/purchase-orders", params={"limit": 50}, headers=self.headers)
+        assert response.status_code == 200
+        created = [parse(po["created_at"]) for po in response.json()]
+        assert created == sorted(created, reverse=True)
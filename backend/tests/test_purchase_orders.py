@@ -498,7 +498,30 @@ class TestDashboardAndReports:
         ]
         for field in required_fields:
             assert field in data, f"Missing dashboard field: {field}"
-    
+
+    def test_dashboard_stats_track_new_po(self):
+        """Test creating and deleting a PO moves total_pos and pending_pos"""
+        before = requests.get(f"{BASE_URL}/api/reports/dashboard", headers=self.headers).json()
+
+        response = requests.post(
+            f"{BASE_URL}/api/purchase-orders",
+            headers=self.headers,
+            json={
+                "po_date": datetime.now().isoformat(),
+                "purchase_office": "Magnova Head Office",
+                "items": [{"sl_no": 1, "vendor": "TEST_DashVendor", "location": "Mumbai", "brand": "Samsung", "model": "Galaxy S24", "qty": 1, "rate": 100, "po_value": 100}]
+            }
+        )
+        assert response.status_code == 200
+        po_number = response.json()["po_number"]
+
+        after = requests.get(f"{BASE_URL}/api/reports/dashboard", headers=self.headers).json()
+        requests.delete(f"{BASE_URL}/api/purchase-orders/{po_number}", headers=self.headers)
+
+        assert after["total_pos"] >= before["total_pos"] + 1
+        assert after["pending_pos"] >= before["pending_pos"] + 1
+        print(f"Dashboard before: {before}, after: {after}")
+
     def test_audit_logs(self):
         """Test audit logs endpoint"""
         response = requests.get(
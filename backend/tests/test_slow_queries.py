@@ -0,0 +1,60 @@
+"""
+Backend API Tests for the slow query log
+Tests: /api/admin/slow-queries returns captured commands with route, shape and plan summary,
+filters by collection and collscan, and is admin-only
+"""
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+ADMIN_USER = {
+    "email": "admin@magnova.com",
+    "password": "admin123"
+}
+
+
+class TestSlowQueries:
+    """Test slow query log endpoint"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Setup: Get admin token"""
+        response = requests.post(f"{BASE_URL}/api/auth/login", json=ADMIN_USER)
+        if response.status_code != 200:
+            pytest.skip("Admin authentication failed")
+        self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    def test_slow_query_log(self):
+        """Test entries carry the command shape, the route and a plan or the reason there is none"""
+        response = requests.get(f"{BASE_URL}/api/admin/slow-queries", params={"limit": 20}, headers=self.headers)
+        assert response.status_code == 200
+        data = response.json()
+        stats = data["slow_query_log"]
+        if not stats["enabled"]:
+            pytest.skip("SLOW_QUERY_MS not set on the server")
+        for entry in data["entries"]:
+            assert entry["duration_ms"] >= stats["threshold_ms"]
+            assert entry["collection"] != "slow_queries"
+            assert "plan" in entry
+            if entry["plan"] is None:
+                assert entry.get("plan_error") or entry.get("plan_skipped")
+        print(f"Slow query log: {stats}, {len(data['entries'])} recent entries")
+
+    def test_filters(self):
+        """Test collection and collscan filters narrow the entries"""
+        response = requests.get(
+            f"{BASE_URL}/api/admin/slow-queries",
+            params={"collection": "imei_inventory", "collscan": "true"},
+            headers=self.headers
+        )
+        assert response.status_code == 200
+        for entry in response.json()["entries"]:
+            assert entry["collection"] == "imei_inventory"
+            assert entry["plan"]["collscan"] is True
+
+    def test_requires_auth(self):
+        """Test the slow query log is not public"""
+        response = requests.get(f"{BASE_URL}/api/admin/slow-queries")
+        assert response.status_code in (401, 403)
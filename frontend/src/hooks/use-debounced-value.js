@@ -0,0 +1,14 @@
+import { useEffect, useState } from 'react';
+
+// Value that only updates once `value` has stopped changing for `delay` ms,
+// so search boxes don't refetch on every keystroke
+export function useDebouncedValue(value, delay = 300) {
+  const [debounced, setDebounced] = useState(value);
+
+  useEffect(() => {
+    const timer = setTimeout(() => setDebounced(value), delay);
+    return () => clearTimeout(timer);
+  }, [value, delay]);
+
+  return debounced;
+}
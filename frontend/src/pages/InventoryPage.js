@@ -1,6 +1,6 @@
 import React, { useEffect, useState } from 'react';
 import { Layout } from '../components/Layout';
-import api from '../utils/api';
+import api, { fetchAllPages } from '../utils/api';
 import { Button } from '../components/ui/button';
 import { Input } from '../components/ui/input';
 import { Label } from '../components/ui/label';
@@ -10,12 +10,13 @@ import { toast } from 'sonner';
 import { Scan, Search, Trash2, CheckCircle, AlertCircle, Bell, X, Package, FileText } from 'lucide-react';
 import { useAuth } from '../context/AuthContext';
 import { useDataRefresh } from '../context/DataRefreshContext';
+import { useDebouncedValue } from '../hooks/use-debounced-value';
 
 export const InventoryPage = () => {
   const [inventory, setInventory] = useState([]);
-  const [filteredInventory, setFilteredInventory] = useState([]);
   const [searchTerm, setSearchTerm] = useState('');
   const [statusFilter, setStatusFilter] = useState('all');
+  const debouncedSearch = useDebouncedValue(searchTerm.trim());
   const [dialogOpen, setDialogOpen] = useState(false);
   const [locations, setLocations] = useState([]);
   const [vendors, setVendors] = useState([]);
@@ -41,17 +42,22 @@ export const InventoryPage = () => {
   });
 
   useEffect(() => {
-    fetchInventory();
     fetchPOData();
   }, [refreshTimestamps.inventory, refreshTimestamps.purchaseOrders]);
 
   useEffect(() => {
-    filterInventory();
-  }, [inventory, searchTerm, statusFilter]);
+    fetchInventory();
+  }, [refreshTimestamps.inventory, refreshTimestamps.purchaseOrders, debouncedSearch, statusFilter]);
 
   const fetchInventory = async () => {
+    // Filtering happens server-side: digits are an IMEI prefix, anything else
+    // is a text search over model and brand
+    const params = { fast: true };
+    if (statusFilter !== 'all') params.status = statusFilter;
+    if (/^\d+$/.test(debouncedSearch)) params.imei = debouncedSearch;
+    else if (debouncedSearch) params.q = debouncedSearch;
     try {
-      const response = await api.get('/inventory');
+      const response = await fetchAllPages('/inventory', { params });
       setInventory(response.data);
     } catch (error) {
       toast.error('Failed to fetch inventory');
@@ -61,7 +67,7 @@ export const InventoryPage = () => {
   // Fetch unique locations and vendors from POs
   const fetchPOData = async () => {
     try {
-      const response = await api.get('/purchase-orders');
+      const response = await fetchAllPages('/purchase-orders');
       const allLocations = new Set();
       const allVendors = new Set();
       response.data.forEach(po => {
@@ -79,22 +85,6 @@ export const InventoryPage = () => {
     }
   };
 
-  const filterInventory = () => {
-    let filtered = inventory;
-    if (searchTerm) {
-      filtered = filtered.filter(
-        (item) =>
-          item.imei.toLowerCase().includes(searchTerm.toLowerCase()) ||
-          item.device_model?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-          item.brand?.toLowerCase().includes(searchTerm.toLowerCase())
-      );
-    }
-    if (statusFilter !== 'all') {
-      filtered = filtered.filter((item) => item.status === statusFilter);
-    }
-    setFilteredInventory(filtered);
-  };
-
   // Lookup IMEI when user enters IMEI number
   const handleImeiChange = async (imei) => {
     setScanData(prev => ({ ...prev, imei }));
@@ -532,14 +522,14 @@ export const InventoryPage = () => {
                 </tr>
               </thead>
               <tbody>
-                {filteredInventory.length === 0 ? (
+                {inventory.length === 0 ? (
                   <tr>
                     <td colSpan={isAdmin ? 8 : 7} className="px-4 py-8 text-center text-slate-500">
                       No inventory items found
                     </td>
                   </tr>
                 ) : (
-                  filteredInventory.map((item) => (
+                  inventory.map((item) => (
                     <tr key={item.imei} className="table-row border-b border-slate-100 hover:bg-slate-50" data-testid="inventory-row">
                       <td className="px-4 py-3 text-sm font-mono font-medium text-slate-900">{item.imei}</td>
                       <td className="px-4 py-3 text-sm text-slate-900">{item.brand || '-'}</td>
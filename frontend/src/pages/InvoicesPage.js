@@ -1,6 +1,6 @@
 import React, { useEffect, useState, useRef } from 'react';
 import { Layout } from '../components/Layout';
-import api from '../utils/api';
+import api, { fetchAllPages } from '../utils/api';
 import { Button } from '../components/ui/button';
 import { Input } from '../components/ui/input';
 import { Label } from '../components/ui/label';
@@ -70,7 +70,7 @@ export const InvoicesPage = () => {
 
   const fetchInvoices = async () => {
     try {
-      const response = await api.get('/invoices');
+      const response = await fetchAllPages('/invoices');
       setInvoices(response.data);
     } catch (error) {
       toast.error('Failed to fetch invoices');
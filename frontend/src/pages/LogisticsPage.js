@@ -1,6 +1,6 @@
 import React, { useEffect, useState } from 'react';
 import { Layout } from '../components/Layout';
-import api from '../utils/api';
+import api, { fetchAllPages } from '../utils/api';
 import { Button } from '../components/ui/button';
 import { Input } from '../components/ui/input';
 import { Label } from '../components/ui/label';
@@ -53,7 +53,7 @@ export const LogisticsPage = () => {
 
   const fetchShipments = async () => {
     try {
-      const response = await api.get('/logistics/shipments');
+      const response = await fetchAllPages('/logistics/shipments');
       setShipments(response.data);
     } catch (error) {
       toast.error('Failed to fetch shipments');
@@ -62,9 +62,8 @@ export const LogisticsPage = () => {
 
   const fetchPOs = async () => {
     try {
-      const response = await api.get('/purchase-orders');
-      const approved = response.data.filter((po) => po.approval_status === 'Approved');
-      setPOs(approved);
+      const response = await fetchAllPages('/purchase-orders', { params: { approval_status: 'Approved' } });
+      setPOs(response.data);
     } catch (error) {
       console.error('Error fetching POs:', error);
     }
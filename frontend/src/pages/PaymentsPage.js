@@ -1,6 +1,6 @@
 import React, { useEffect, useState } from 'react';
 import { Layout } from '../components/Layout';
-import api from '../utils/api';
+import api, { fetchAllPages } from '../utils/api';
 import { Button } from '../components/ui/button';
 import { Input } from '../components/ui/input';
 import { Label } from '../components/ui/label';
@@ -73,7 +73,7 @@ export const PaymentsPage = () => {
 
   const fetchPayments = async () => {
     try {
-      const response = await api.get('/payments');
+      const response = await fetchAllPages('/payments');
       setPayments(response.data);
     } catch (error) {
       toast.error('Failed to fetch payments');
@@ -82,7 +82,7 @@ export const PaymentsPage = () => {
 
   const fetchPOs = async () => {
     try {
-      const response = await api.get('/purchase-orders');
+      const response = await fetchAllPages('/purchase-orders');
       setPOs(response.data);
     } catch (error) {
       console.error('Error fetching POs:', error);
@@ -1,6 +1,6 @@
 import React, { useEffect, useState } from 'react';
 import { Layout } from '../components/Layout';
-import api from '../utils/api';
+import api, { fetchAllPages } from '../utils/api';
 import { Button } from '../components/ui/button';
 import { Input } from '../components/ui/input';
 import { Label } from '../components/ui/label';
@@ -10,11 +10,12 @@ import { toast } from 'sonner';
 import { Plus, Trash2, Bell, Package, X } from 'lucide-react';
 import { useAuth } from '../context/AuthContext';
 import { useDataRefresh } from '../context/DataRefreshContext';
+import { useDebouncedValue } from '../hooks/use-debounced-value';
 
 export const ProcurementPage = () => {
   const [records, setRecords] = useState([]);
-  const [filteredRecords, setFilteredRecords] = useState([]);
   const [searchImei, setSearchImei] = useState('');
+  const debouncedImei = useDebouncedValue(searchImei.trim());
   const [pos, setPOs] = useState([]);
   const [dialogOpen, setDialogOpen] = useState(false);
   const [selectedPO, setSelectedPO] = useState(null);
@@ -44,27 +45,20 @@ export const ProcurementPage = () => {
   });
 
   useEffect(() => {
-    fetchRecords();
     fetchPOs();
   }, [refreshTimestamps.procurement, refreshTimestamps.purchaseOrders]);
 
-  // Filter records when search IMEI changes
+  // The IMEI search is a prefix match done by the API
   useEffect(() => {
-    if (searchImei.trim() === '') {
-      setFilteredRecords(records);
-    } else {
-      const filtered = records.filter(record => 
-        record.imei && record.imei.toLowerCase().includes(searchImei.toLowerCase())
-      );
-      setFilteredRecords(filtered);
-    }
-  }, [searchImei, records]);
+    fetchRecords();
+  }, [refreshTimestamps.procurement, refreshTimestamps.purchaseOrders, debouncedImei]);
 
   const fetchRecords = async () => {
+    const params = { fast: true };
+    if (debouncedImei) params.imei = debouncedImei;
     try {
-      const response = await api.get('/procurement');
+      const response = await fetchAllPages('/procurement', { params });
       setRecords(response.data);
-      setFilteredRecords(response.data);
     } catch (error) {
       toast.error('Failed to fetch procurement records');
     }
@@ -72,7 +66,7 @@ export const ProcurementPage = () => {
 
   const fetchPOs = async () => {
     try {
-      const response = await api.get('/purchase-orders');
+      const response = await fetchAllPages('/purchase-orders');
       // Show ALL POs - not just approved ones
       setPOs(response.data);
     } catch (error) {
@@ -457,7 +451,7 @@ export const ProcurementPage = () => {
               <Input
                 value={searchImei}
                 onChange={(e) => setSearchImei(e.target.value)}
-                placeholder="Enter IMEI to filter records..."
+                placeholder="Enter the start of an IMEI to filter records..."
                 className="bg-white text-slate-900 font-mono"
                 data-testid="imei-search-input"
               />
@@ -465,7 +459,7 @@ export const ProcurementPage = () => {
             {searchImei && (
               <div className="flex items-center gap-2 mt-6">
                 <span className="text-sm text-slate-500">
-                  Showing {filteredRecords.length} of {records.length} records
+                  Showing {records.length} matching records
                 </span>
                 <Button
                   variant="ghost"
@@ -497,14 +491,14 @@ export const ProcurementPage = () => {
                 </tr>
               </thead>
               <tbody>
-                {filteredRecords.length === 0 ? (
+                {records.length === 0 ? (
                   <tr>
                     <td colSpan={isAdmin ? 9 : 8} className="px-4 py-8 text-center text-slate-500">
                       {searchImei ? `No records found for IMEI "${searchImei}"` : 'No procurement records found'}
                     </td>
                   </tr>
                 ) : (
-                  filteredRecords.map((record) => (
+                  records.map((record) => (
                     <tr key={record.procurement_id} className="table-row border-b border-slate-100 hover:bg-slate-50" data-testid="procurement-row">
                       <td className="px-4 py-3 text-sm font-mono font-medium text-magnova-blue">{record.po_number}</td>
                       <td className="px-4 py-3 text-sm font-mono text-slate-900">{record.imei}</td>
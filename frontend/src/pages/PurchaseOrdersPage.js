@@ -1,6 +1,6 @@
 import React, { useEffect, useState } from 'react';
 import { Layout } from '../components/Layout';
-import api from '../utils/api';
+import api, { fetchAllPages } from '../utils/api';
 import { Button } from '../components/ui/button';
 import { Input } from '../components/ui/input';
 import { Label } from '../components/ui/label';
@@ -46,7 +46,7 @@ export const PurchaseOrdersPage = () => {
 
   const fetchPOs = async () => {
     try {
-      const response = await api.get('/purchase-orders');
+      const response = await fetchAllPages('/purchase-orders');
       setPos(response.data);
     } catch (error) {
       toast.error('Failed to fetch purchase orders');
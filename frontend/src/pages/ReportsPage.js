@@ -1,6 +1,6 @@
 import React, { useEffect, useState } from 'react';
 import { Layout } from '../components/Layout';
-import api from '../utils/api';
+import api, { fetchAllPages } from '../utils/api';
 import { Button } from '../components/ui/button';
 import { Input } from '../components/ui/input';
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from '../components/ui/select';
@@ -23,9 +23,12 @@ export const ReportsPage = () => {
 
   useEffect(() => {
     fetchStats();
-    fetchMasterReport();
   }, [refreshTimestamps.reports]);
 
+  useEffect(() => {
+    fetchMasterReport();
+  }, [refreshTimestamps.reports, poFilter]);
+
   useEffect(() => {
     filterReport();
   }, [masterReport, searchTerm, poFilter]);
@@ -42,13 +45,15 @@ export const ReportsPage = () => {
   const fetchMasterReport = async () => {
     setLoading(true);
     try {
-      // Fetch all data from different modules
+      // Fetch all data from different modules; a selected PO narrows every
+      // PO-linked module on the server (inventory is matched by model)
+      const byPO = poFilter !== 'all' ? { params: { po_number: poFilter } } : {};
       const [posRes, procurementRes, paymentsRes, shipmentsRes, inventoryRes] = await Promise.all([
-        api.get('/purchase-orders'),
-        api.get('/procurement'),
-        api.get('/payments'),
-        api.get('/logistics/shipments'),
-        api.get('/inventory'),
+        fetchAllPages('/purchase-orders', byPO),
+        fetchAllPages('/procurement', byPO),
+        fetchAllPages('/payments', byPO),
+        fetchAllPages('/logistics/shipments', byPO),
+        fetchAllPages('/inventory'),
       ]);
 
       const pos = posRes.data;
@@ -148,9 +153,11 @@ export const ReportsPage = () => {
 
       setMasterReport(report);
       
-      // Extract unique POs for filter
-      const uniquePOList = [...new Set(report.map(r => r.po_id))];
-      setUniquePOs(uniquePOList);
+      // Extract unique POs for filter; a filtered fetch keeps the full list
+      if (poFilter === 'all') {
+        const uniquePOList = [...new Set(report.map(r => r.po_id))];
+        setUniquePOs(uniquePOList);
+      }
       
     } catch (error) {
       toast.error('Failed to fetch report data');
@@ -174,6 +181,7 @@ export const ReportsPage = () => {
       );
     }
     
+    // The PO list endpoint matches po_number as a prefix
     if (poFilter !== 'all') {
       filtered = filtered.filter(row => row.po_id === poFilter);
     }
@@ -238,7 +246,16 @@ export const ReportsPage = () => {
   const handleExportExcel = async () => {
     try {
       toast.info('Generating Excel report...');
-      const response = await api.get('/reports/export/master', {
+      let job = (await api.post('/reports/exports', { report: 'master', format: 'xlsx' })).data;
+      while (job.status === 'queued' || job.status === 'running') {
+        await new Promise((resolve) => setTimeout(resolve, 1000));
+        job = (await api.get(`/reports/exports/${job.job_id}`)).data;
+      }
+      if (job.status !== 'completed') {
+        toast.error(job.error || 'Failed to export Excel report');
+        return;
+      }
+      const response = await api.get(`/reports/exports/${job.job_id}/download`, {
         responseType: 'blob'
       });
       
@@ -248,7 +265,7 @@ export const ReportsPage = () => {
       const url = window.URL.createObjectURL(blob);
       const link = document.createElement('a');
       link.href = url;
-      link.setAttribute('download', `master_report_${new Date().toISOString().split('T')[0]}.xlsx`);
+      link.setAttribute('download', job.file_name);
       document.body.appendChild(link);
       link.click();
       link.remove();
@@ -1,6 +1,6 @@
 import React, { useEffect, useState } from 'react';
 import { Layout } from '../components/Layout';
-import api from '../utils/api';
+import api, { fetchAllPages } from '../utils/api';
 import { Button } from '../components/ui/button';
 import { Input } from '../components/ui/input';
 import { Label } from '../components/ui/label';
@@ -29,7 +29,7 @@ export const SalesOrdersPage = () => {
 
   const fetchSalesOrders = async () => {
     try {
-      const response = await api.get('/sales-orders');
+      const response = await fetchAllPages('/sales-orders');
       setSalesOrders(response.data);
     } catch (error) {
       toast.error('Failed to fetch sales orders');
@@ -57,7 +57,15 @@ export const SalesOrdersPage = () => {
       });
       fetchSalesOrders();
     } catch (error) {
-      toast.error(error.response?.data?.detail || 'Failed to create sales order');
+      const detail = error.response?.data?.detail;
+      if (detail?.results) {
+        const blocked = detail.results
+          .filter((r) => r.result !== 'available')
+          .map((r) => `${r.imei} (${r.result === 'not_found' ? 'not in inventory' : r.status})`);
+        toast.error(`${detail.message}: ${blocked.slice(0, 5).join(', ')}${blocked.length > 5 ? ', ...' : ''}`);
+      } else {
+        toast.error(detail || 'Failed to create sales order');
+      }
     }
   };
 
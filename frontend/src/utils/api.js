@@ -27,4 +27,20 @@ api.interceptors.response.use(
   }
 );
 
+// List endpoints are cursor-paginated: follow X-Next-Cursor until the last page.
+// Resolves to an axios-like { data } object so callers can swap it in for api.get.
+export const fetchAllPages = async (url, config = {}) => {
+  const data = [];
+  let cursor;
+  do {
+    const response = await api.get(url, {
+      ...config,
+      params: { ...config.params, cursor },
+    });
+    data.push(...response.data);
+    cursor = response.headers['x-next-cursor'];
+  } while (cursor);
+  return { data };
+};
+
 export default api;